@@ -0,0 +1,243 @@
+"""
+Background__c Persona Parser for PLG Telemetry
+Turns the Background__c text of Contact records (see "Background field guide")
+into a typed persona profile table with one row per contact: tags such as
+[SEGMENT], [CHURN_RISK], [AVERAGE_SESSION_FREQUENCY], [PRIMARY_FEATURES],
+[SIGNUP] and [LAST_LOGIN] become categorical, integer, boolean and datetime
+columns, plus the story summary bullet points.
+
+Both the guide's hierarchical layout ("** [TAG]: value ;" lines under
+section headers) and the older inline layout found in existing exports
+("[TAG]: value [TAG]: value", plain dates, [SESSION_FREQUENCY]: daily) are
+accepted. Patterns are compiled once, identical texts are parsed once, and
+parsed results for a whole export are cached on disk keyed by the export's
+content hash. Texts that cannot be parsed are collected and reported
+together instead of stopping the run.
+
+Used by contact-driven telemetry generation (load_background_profiles)
+"""
+
+import os
+import pickle
+import re
+from datetime import datetime
+
+import pandas as pd
+
+from plg_contacts import load_contacts, source_digest, default_cache_dir
+
+# Bumped whenever parsed profiles change shape, so stale caches are ignored
+PARSER_VERSION = 1
+
+# Tag name and value up to the next ';', line break or tag (values have trailing blanks stripped)
+TAG_PATTERN = re.compile(r'\[([A-Z][A-Z0-9_]*)\]:[ \t]*([^;\n\[]*)')
+STORY_PATTERN = re.compile(r'^[ \t]*•[ \t]*(.+?)[ \t]*;?[ \t]*$', re.MULTILINE)
+DATE_PATTERN = re.compile(r'(?:Fixed Date = )?(\d{4}-\d{2}-\d{2})(?:[ T](\d{2}:\d{2}:\d{2}))?(?:, Relative Date = -?\d+)?$')
+FREQUENCY_PATTERN = re.compile(r'(\d+)/day, (\d+)/week, (\d+)/month$')
+FEATURE_PATTERN = re.compile(r'(\w+):(\d+)$')
+
+SEGMENTS = ['champion', 'engaged', 'casual', 'conversion_ready', 'at_risk']
+CHOICE_TAGS = {
+    'SEGMENT': SEGMENTS,
+    'CHURN_RISK': ['low', 'medium', 'high'],
+    'CURRENT_PLAN': ['free', 'starter', 'professional', 'enterprise'],
+    'SOPHISTICATION': ['basic', 'intermediate', 'advanced', 'expert'],
+    'COLLABORATION': ['none', 'low', 'medium', 'high'],
+    'SESSION_FREQUENCY': ['daily', 'weekly', 'monthly', 'declining']
+}
+PERCENT_TAGS = ['CONVERSION_PROBABILITY', 'USAGE_PERCENTILE']
+COUNT_TAGS = ['VALUE_EVENTS_MONTHLY', 'SUPPORT_TICKETS_MONTHLY', 'USAGE_LIMITS_HIT', 'TENURE_MONTHS']
+BOOLEAN_TAGS = ['API_USAGE', 'VIRAL_BEHAVIOR', 'UPGRADE_EXPLORATION', 'PREMIUM_EXPLORATION']
+DATE_TAGS = ['SIGNUP', 'LAST_UPGRADE', 'LAST_LOGIN']
+
+REQUIRED_TAGS = ['SEGMENT', 'CHURN_RISK', 'CONVERSION_PROBABILITY', 'SIGNUP', 'LAST_LOGIN']
+
+# Standard [PRIMARY_FEATURES] names; each becomes a feature_<name> percentage column (0 when absent)
+FEATURE_NAMES = [
+    'basic_dashboard', 'core_analytics', 'advanced_analytics', 'custom_dashboards', 'api_integration',
+    'team_collaboration', 'data_export', 'help_center', 'premium_preview', 'admin_settings', 'automation_setup', 'login'
+]
+
+# [AVERAGE_SESSION_FREQUENCY] X/day, Y/week, Z/month is split into these columns
+FREQUENCY_COLUMNS = ['sessions_per_day', 'sessions_per_week', 'sessions_per_month']
+
+# (per day, per week, per month) sessions for the older single-word [SESSION_FREQUENCY] tag
+LEGACY_SESSION_FREQUENCIES = {
+    'daily': (1, 7, 30),
+    'weekly': (0, 2, 8),
+    'declining': (0, 1, 4),
+    'monthly': (0, 0, 3)
+}
+
+# Column dtypes of a persona profile table; optional tags use nullable dtypes
+PROFILE_DTYPES = {tag.lower(): pd.CategoricalDtype(labels) for tag, labels in CHOICE_TAGS.items()}
+PROFILE_DTYPES.update({tag.lower(): 'Int8' for tag in PERCENT_TAGS})
+PROFILE_DTYPES.update({tag.lower(): 'Int16' for tag in COUNT_TAGS})
+PROFILE_DTYPES.update({tag.lower(): 'boolean' for tag in BOOLEAN_TAGS})
+PROFILE_DTYPES.update({tag.lower(): 'datetime64[us]' for tag in DATE_TAGS})
+PROFILE_DTYPES.update({column: 'Int16' for column in FREQUENCY_COLUMNS})
+PROFILE_DTYPES.update({f'feature_{name}': 'int8' for name in FEATURE_NAMES})
+PROFILE_DTYPES.update({'error_rate': 'float64', 'story': 'str'})
+
+# Parse errors listed individually by report_parse_errors
+MAX_REPORTED_ERRORS = 10
+
+
+class BackgroundParseError(ValueError):
+    """Background__c text that is missing required tags or has malformed values"""
+
+
+def _parse_value(tag, value):
+    """Typed value of one known tag"""
+    if tag in CHOICE_TAGS:
+        value = value.lower()
+        if value not in CHOICE_TAGS[tag]:
+            raise BackgroundParseError(f"[{tag}] must be one of {'|'.join(CHOICE_TAGS[tag])} (got {value!r})")
+        return value
+    if tag in PERCENT_TAGS or tag in COUNT_TAGS:
+        if not value.isdigit():
+            raise BackgroundParseError(f"[{tag}] must be a non-negative integer (got {value!r})")
+        number = int(value)
+        if tag in PERCENT_TAGS and number > 100:
+            raise BackgroundParseError(f"[{tag}] must be between 0 and 100 (got {number})")
+        return number
+    if tag == 'ERROR_RATE':
+        try:
+            rate = float(value)
+        except ValueError:
+            raise BackgroundParseError(f"[ERROR_RATE] must be a number (got {value!r})") from None
+        if not 0.0 <= rate <= 100.0:
+            raise BackgroundParseError(f"[ERROR_RATE] must be between 0 and 100 (got {rate})")
+        return rate
+    if tag in BOOLEAN_TAGS:
+        if value not in ('true', 'false'):
+            raise BackgroundParseError(f"[{tag}] must be true or false (got {value!r})")
+        return value == 'true'
+    if tag in DATE_TAGS:
+        match = DATE_PATTERN.match(value)
+        if match is None:
+            raise BackgroundParseError(f"[{tag}] must be 'Fixed Date = YYYY-MM-DD HH:MM:SS, ...' or YYYY-MM-DD (got {value!r})")
+        day, time = match.groups()
+        try:
+            return datetime.fromisoformat(f'{day} {time or "00:00:00"}')
+        except ValueError:
+            raise BackgroundParseError(f"[{tag}] is not a valid date (got {value!r})") from None
+    if tag == 'AVERAGE_SESSION_FREQUENCY':
+        match = FREQUENCY_PATTERN.match(value)
+        if match is None:
+            raise BackgroundParseError(f"[AVERAGE_SESSION_FREQUENCY] must be 'X/day, Y/week, Z/month' (got {value!r})")
+        return tuple(int(count) for count in match.groups())
+    if tag == 'PRIMARY_FEATURES':
+        features = {}
+        for item in value.split(','):
+            match = FEATURE_PATTERN.match(item.strip())
+            if match is None or int(match.group(2)) > 100:
+                raise BackgroundParseError(f"[PRIMARY_FEATURES] entries must be feature:percentage (got {item.strip()!r})")
+            if match.group(1) not in FEATURE_NAMES:
+                raise BackgroundParseError(f"[PRIMARY_FEATURES] has unknown feature {match.group(1)!r}")
+            features[match.group(1)] = int(match.group(2))
+        return features
+    raise KeyError(tag)
+
+
+# Tags with a typed value; any other [TAG] is ignored
+KNOWN_TAGS = set(CHOICE_TAGS) | set(PERCENT_TAGS) | set(COUNT_TAGS) | set(BOOLEAN_TAGS) | set(DATE_TAGS) | {
+    'ERROR_RATE', 'AVERAGE_SESSION_FREQUENCY', 'PRIMARY_FEATURES'}
+
+
+def parse_background(text):
+    """Flat persona profile dict (keys of PROFILE_DTYPES) for one Background__c text
+
+    Tags map to their lowercased names, [AVERAGE_SESSION_FREQUENCY] to FREQUENCY_COLUMNS
+    (derived from a legacy [SESSION_FREQUENCY] when absent), [PRIMARY_FEATURES] to
+    feature_<name> percentages and the summary bullet points to one newline-joined 'story'.
+    Raises BackgroundParseError for missing required tags or malformed values.
+    """
+    tags = {}
+    for tag, value in TAG_PATTERN.findall(text):
+        if tag in KNOWN_TAGS:
+            tags[tag] = _parse_value(tag, value.rstrip())
+    missing = [tag for tag in REQUIRED_TAGS if tag not in tags]
+    if missing:
+        raise BackgroundParseError(f"missing required tags: {', '.join(missing)}")
+
+    frequency = tags.pop('AVERAGE_SESSION_FREQUENCY', None)
+    if frequency is None and 'SESSION_FREQUENCY' in tags:
+        frequency = LEGACY_SESSION_FREQUENCIES[tags['SESSION_FREQUENCY']]
+    features = tags.pop('PRIMARY_FEATURES', {})
+
+    profile = {tag.lower(): value for tag, value in tags.items()}
+    if frequency is not None:
+        profile.update(zip(FREQUENCY_COLUMNS, frequency))
+    profile.update({f'feature_{name}': features.get(name, 0) for name in FEATURE_NAMES})
+    profile['story'] = '\n'.join(STORY_PATTERN.findall(text))
+    return profile
+
+
+def profile_frame(profiles, index=None):
+    """DataFrame of profile dicts with every PROFILE_DTYPES column, missing tags as NA"""
+    df = pd.DataFrame.from_records(profiles, index=index, columns=list(PROFILE_DTYPES))
+    return df.astype(PROFILE_DTYPES)
+
+
+def parse_backgrounds(keys, texts):
+    """Parse many Background__c texts; returns (profile DataFrame indexed by key, [(key, error message)])
+
+    Empty texts are skipped (contacts without a persona), identical texts are parsed
+    once, and failures are collected rather than raised.
+    """
+    profiles, profile_keys, errors, parsed = [], [], [], {}
+    for key, text in zip(keys, texts):
+        if not isinstance(text, str) or not text.strip():
+            continue
+        result = parsed.get(text)
+        if result is None:
+            try:
+                result = parse_background(text)
+            except BackgroundParseError as error:
+                result = error
+            parsed[text] = result
+        if isinstance(result, BackgroundParseError):
+            errors.append((key, str(result)))
+        else:
+            profiles.append(result)
+            profile_keys.append(key)
+    return profile_frame(profiles, pd.Index(profile_keys, name='contact_id', dtype=object)), errors
+
+
+def report_parse_errors(errors, total):
+    """Print one summary line for unparseable Background__c values, plus the first few reasons"""
+    if not errors:
+        return
+    print(f"⚠️  {len(errors)} of {total} Background__c values could not be parsed and were skipped")
+    for key, message in errors[:MAX_REPORTED_ERRORS]:
+        print(f"  {key}: {message}")
+    if len(errors) > MAX_REPORTED_ERRORS:
+        print(f"  ... and {len(errors) - MAX_REPORTED_ERRORS} more")
+
+
+def load_background_profiles(path, cache_dir=None, id_column='Id', use_cache=True):
+    """Parsed persona profiles for every contact of a Contact export, indexed by id_column
+
+    Returns (profiles, errors) as parse_backgrounds does. Results are cached under
+    cache_dir (default: default_cache_dir(path)) by the export's content hash, so an
+    unchanged export is only parsed once.
+    """
+    cache_path = None
+    if use_cache:
+        cache_dir = cache_dir or default_cache_dir(path)
+        cache_path = os.path.join(cache_dir, f'background_v{PARSER_VERSION}_{source_digest(path, cache_dir)[:32]}.pkl')
+        if os.path.exists(cache_path):
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+
+    contacts = load_contacts(path, cache_dir, use_cache)
+    result = parse_backgrounds(contacts[id_column], contacts['Background__c'])
+
+    if cache_path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    return result
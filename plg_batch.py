@@ -0,0 +1,775 @@
+"""
+Vectorized Batch Engine for PLG Telemetry
+Generates whole telemetry columns for blocks of users at once with NumPy
+instead of drawing every field of every event in Python, then assembles the
+DataFrame directly from the column arrays.
+
+Used by PLGTelemetryGenerator.generate_dataset(engine='batch')
+"""
+
+import json
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from plg_markov import MarkovSessionModel
+from plg_schema import (CONTEXT_COLUMNS, CUSTOM_PROPERTY_KEYS, EVENT_COLUMNS, EVENT_FIELDS, PROPERTY_COLUMNS,
+                        TIER_CONTEXT_FIELDS, output_columns)
+
+MICROS_PER_MINUTE = 60 * 1000000
+MICROS_PER_HOUR = 60 * MICROS_PER_MINUTE
+MICROS_PER_DAY = 24 * MICROS_PER_HOUR
+
+# Users per block of a dataset (iter_blocks, and the shards of plg_parallel); each block is generated
+# from its own stream, so it is part of the output definition (changing it changes the data for a seed)
+BLOCK_USERS = 5000
+
+# Two lowercase hex characters for every byte value
+HEX_TABLE = np.array([f'{i:02x}' for i in range(256)])
+
+
+def dataset_rng(seed):
+    """RNG for per-dataset draws (tier session counts, ID key), independent of every block stream"""
+    return np.random.default_rng(np.random.SeedSequence(seed))
+
+
+def block_rng(seed, block_index):
+    """Independent RNG stream for one block of BLOCK_USERS users, derived from the dataset seed and block index"""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(block_index,)))
+
+
+# ============================================================================
+# BATCH-ONLY TABLES (scenario tables are compiled by PLGTelemetryGenerator)
+# ============================================================================
+
+LIMIT_PROXIMITY_LEVELS = ['low', 'medium', 'high', 'exceeded']
+
+EXPERIMENT_VARIANTS = ['control', 'variant_a', 'variant_b']
+COHORT_MONTHS = 12
+
+BOOLEAN_LABELS = [True, False]
+
+SOURCE_SYSTEM = 'plg_telemetry_generator_v2.0_tier_aware'
+
+# Narrow numeric dtypes for compact frames; a column keeps its dtype if its values do not fit
+COMPACT_NUMERIC_DTYPES = {
+    'response_time_ms': 'int32', 'mrr_contribution': 'int16', 'arr_contribution': 'int32',
+    'customer_lifetime_value': 'int32', 'account_health_score': 'int8', 'engagement_score': 'int8',
+    'seat_utilization': 'float32', 'storage_utilization': 'float32', 'integration_count': 'int8',
+    'support_ticket_count': 'int8', 'churn_risk_score': 'int8', 'conversion_propensity': 'int8',
+    'upsell_propensity': 'int8', 'retention_probability': 'int8'
+}
+
+# High-cardinality identifiers are held as pandas strings (Arrow-backed when pyarrow is installed)
+COMPACT_STRING_COLUMNS = ['event_id', 'user_id', 'session_id', 'contact_external_id', 'user_email']
+
+
+def hex_strings(values, nchars):
+    """Format unsigned integers (below 16**nchars) as fixed-width lowercase hex strings"""
+    nbytes = (nchars + 1) // 2
+    raw = np.asarray(values, dtype='>u8').view(np.uint8).reshape(-1, 8)[:, 8 - nbytes:]
+    text = np.ascontiguousarray(HEX_TABLE[raw]).view(f'U{2 * nbytes}').ravel()
+    return text if nchars % 2 == 0 else np.strings.slice(text, 1, None)
+
+
+def compact_frame(df, category_dtypes):
+    """Convert label columns to the given CategoricalDtypes, identifiers to pandas strings,
+    sparse flags to nullable booleans and scores to COMPACT_NUMERIC_DTYPES
+
+    Labels outside a column's categories are appended to them rather than lost.
+    """
+    converted = {}
+    for column in COMPACT_STRING_COLUMNS:
+        if column in df and df[column].dtype == object:
+            converted[column] = df[column].astype('str')
+    for column in CONTEXT_COLUMNS:
+        if EVENT_FIELDS[column].kind == 'bool' and column in df and df[column].dtype == object:
+            converted[column] = df[column].astype('boolean')
+    for column, dtype in category_dtypes.items():
+        if column not in df or df[column].dtype == dtype:
+            continue
+        values = df[column].astype(object)
+        unknown = pd.unique(values[values.notna() & ~values.isin(dtype.categories)])
+        if len(unknown):
+            dtype = pd.CategoricalDtype(list(dtype.categories) + list(unknown))
+        converted[column] = values.astype(dtype)
+    for column, dtype in COMPACT_NUMERIC_DTYPES.items():
+        if column not in df or df[column].dtype == dtype:
+            continue
+        values = df[column]
+        if np.dtype(dtype).kind == 'i' and len(values):
+            info = np.iinfo(dtype)
+            if values.min() < info.min or values.max() > info.max:
+                continue
+        converted[column] = values.astype(dtype)
+    return df.assign(**converted) if converted else df
+
+
+def iso_strings(micros):
+    """Format epoch microseconds (or datetime64 values) like datetime.isoformat() + 'Z'"""
+    micros = np.asarray(micros)
+    if micros.dtype.kind == 'M':
+        micros = micros.astype('datetime64[us]').view(np.int64)
+    stamps = micros.astype(np.int64).astype('datetime64[us]')
+    text = np.datetime_as_string(stamps, unit='us')
+    whole_seconds = (micros % 1000000) == 0
+    if whole_seconds.any():
+        text[whole_seconds] = np.datetime_as_string(stamps[whole_seconds], unit='s')
+    return np.strings.add(text, 'Z')
+
+
+class BatchTelemetryEngine:
+    """Columnar, NumPy-backed event generation for a PLGTelemetryGenerator"""
+
+    def __init__(self, generator):
+        self.generator = generator
+        self._compile_tables()
+
+    # ------------------------------------------------------------------
+    # One-time table compilation
+    # ------------------------------------------------------------------
+
+    def _compile_tables(self):
+        """Turn the generator's compiled scenario model into integer-coded arrays"""
+        gen = self.generator
+        self.tiers, self.segments, self.event_types = gen.tiers, gen.segments, gen.event_types
+        self.tier_index, self.segment_index, self.event_index = gen.tier_index, gen.segment_index, gen.event_index
+        num_tiers, num_segments = len(self.tiers), len(self.segments)
+        pairs = [[gen.scenario_params[(tier, segment)] for segment in self.segments] for tier in self.tiers]
+        tier_params = [gen.tier_params[tier] for tier in self.tiers]
+
+        def segment_table(key):
+            return np.array([[params[key] for params in row] for row in pairs])
+
+        def event_mask(events):
+            return np.array([e in events for e in self.event_types])
+
+        # Session patterns flattened into one event-code array with per-pattern offsets
+        fallback = {'basic_usage': ['login', 'dashboard_view', 'logout']}
+        self.pattern_names = []
+        pattern_tier, pattern_segment, sequences = [], [], []
+        self.pattern_start = np.zeros((num_tiers, num_segments), dtype=np.int64)
+        self.pattern_count = np.zeros((num_tiers, num_segments), dtype=np.int64)
+        for t, tier in enumerate(self.tiers):
+            tier_patterns = gen.tier_session_patterns.get(tier, gen.tier_session_patterns['Free'])
+            for s, segment in enumerate(self.segments):
+                segment_patterns = tier_patterns.get(segment, fallback) or fallback
+                self.pattern_start[t, s] = len(self.pattern_names)
+                self.pattern_count[t, s] = len(segment_patterns)
+                for pattern_name, sequence in segment_patterns.items():
+                    self.pattern_names.append(pattern_name)
+                    pattern_tier.append(t)
+                    pattern_segment.append(s)
+                    sequences.append(sequence)
+        self.pattern_tier = np.array(pattern_tier, dtype=np.int8)
+        self.pattern_segment = np.array(pattern_segment, dtype=np.int8)
+        self.pattern_length = np.array([len(seq) for seq in sequences], dtype=np.int64)
+        self.pattern_offset = np.cumsum(self.pattern_length) - self.pattern_length
+        self.pattern_events = np.array([self.event_index[e] for seq in sequences for e in seq], dtype=np.int16)
+
+        # Events per session of each pattern: the pattern itself, or a walk of its (tier, segment) chain
+        self.markov = MarkovSessionModel(self) if gen.session_model == 'markov' else None
+        if self.markov is None:
+            self.mean_session_length = self.pattern_length.astype(float)
+            self.max_session_events = int(self.pattern_length.max())
+        else:
+            self.mean_session_length = self.markov.mean_length
+            self.max_session_events = self.markov.max_events
+
+        # User-level tables: each distinct title list is stored once
+        self.titles = []
+        title_slots = {}
+        self.title_start = np.zeros((num_tiers, num_segments), dtype=np.int64)
+        self.title_count = np.zeros((num_tiers, num_segments), dtype=np.int64)
+        self.plg_scenarios = list(gen.scenario_actions.keys())
+        self.scenario_code = np.zeros((num_tiers, num_segments), dtype=np.int8)
+        self.transition_candidates = []
+        self.transition_code = np.zeros((num_tiers, num_segments), dtype=np.int8)
+        for t in range(num_tiers):
+            for s in range(num_segments):
+                params = pairs[t][s]
+                titles = tuple(params['titles'])
+                if titles not in title_slots:
+                    title_slots[titles] = (len(self.titles), len(titles))
+                    self.titles.extend(titles)
+                self.title_start[t, s], self.title_count[t, s] = title_slots[titles]
+                if params['plg_scenario'] not in self.plg_scenarios:
+                    self.plg_scenarios.append(params['plg_scenario'])
+                self.scenario_code[t, s] = self.plg_scenarios.index(params['plg_scenario'])
+                if params['transition_candidate'] not in self.transition_candidates:
+                    self.transition_candidates.append(params['transition_candidate'])
+                self.transition_code[t, s] = self.transition_candidates.index(params['transition_candidate'])
+        self.first_names_lower = np.array([name.lower() for name in gen.first_names])
+        self.last_names_lower = np.array([name.lower() for name in gen.last_names])
+        tier_sessions = [gen.tier_session_ranges.get(tier, (2, 2)) for tier in self.tiers]
+        self.tier_session_low = np.array([low for low, high in tier_sessions])
+        self.tier_session_high = np.array([high for low, high in tier_sessions])
+
+        # Event-type lookups
+        self.feature_names = np.array([gen.feature_mapping.get(e, 'General Feature') for e in self.event_types], dtype=object)
+        self.page_urls = np.array([f'/app/{e.replace("_", "-")}' for e in self.event_types], dtype=object)
+        self.sophistication_levels = list(gen.feature_sophistication.keys())
+        if 'intermediate' not in self.sophistication_levels:
+            self.sophistication_levels.append('intermediate')
+        self.event_sophistication = np.array(
+            [self.sophistication_levels.index(gen.get_feature_sophistication(e)) for e in self.event_types], dtype=np.int8)
+        response_ranges = np.array([gen.response_time_ranges.get(e, (300, 1800)) for e in self.event_types])
+        self.response_low = response_ranges[:, 0]
+        self.response_high = response_ranges[:, 1]
+        self.response_multiplier = np.array([params['response_multiplier'] for params in tier_params])
+        gaps = np.array([params['session_gap'] for params in tier_params])
+        self.gap_low = gaps[:, 0]
+        self.gap_high = gaps[:, 1]
+
+        # Tier-level business lookups
+        self.plan_tiers = [params['plan_tier'] for params in tier_params]
+        self.mrr = np.array([params['mrr'] for params in tier_params], dtype=np.int64)
+        self.lifetime_value = np.array([params['lifetime_value'] for params in tier_params], dtype=np.int64)
+        self.paid_tier = np.array([tier in ('Basic', 'Premium') for tier in self.tiers])
+        self.payment_statuses = gen.payment_status_sampler.labels + ['n/a', 'cancelled']
+        self.fixed_payment_status = np.array(
+            [self.payment_statuses.index('n/a' if tier == 'Free' else 'cancelled') for tier in self.tiers], dtype=np.int8)
+        self.usage_ranges = {key: np.array([params['usage'][key] for params in tier_params])
+                             for key in gen.usage_patterns['Free']}
+
+        # (tier, segment) score tables
+        self.health_ranges = segment_table('health_score_range')
+        self.engagement_base = segment_table('engagement_base')
+        self.churn_base = segment_table('churn_base')
+        self.retention_base = segment_table('retention_base')
+        self.depth_levels = gen.depth_levels
+
+        # Propensity tables: base and noise by (tier, segment), boost by (tier, event_type); -1 base = always zero.
+        # Rows without a rule borrow the first rule's noise so every event makes the same draws
+        def propensity_tables(kind, rules, boosts):
+            default_noise = next(iter(rules.values()))['noise'] if rules else (0, 0)
+            base = np.array([[-1 if params[f'{kind}_base'] is None else params[f'{kind}_base'] for params in row]
+                             for row in pairs], dtype=np.int64)
+            noise = np.array([[params[f'{kind}_noise'] or default_noise for params in row] for row in pairs], dtype=np.int64)
+            boost = np.array([[boosts.get((tier, e), 0) for e in self.event_types] for tier in self.tiers], dtype=np.int64)
+            return base, noise, boost
+        self.conversion_base, self.conversion_noise, self.conversion_boost = propensity_tables(
+            'conversion', gen.conversion_propensity_rules, gen.conversion_boosts)
+        self.upsell_base, self.upsell_noise, self.upsell_boost = propensity_tables(
+            'upsell', gen.upsell_propensity_rules, gen.upsell_boosts)
+
+        # Next best actions per scenario, flattened
+        self.actions = []
+        self.action_start = np.zeros(len(self.plg_scenarios), dtype=np.int64)
+        self.action_count = np.zeros(len(self.plg_scenarios), dtype=np.int64)
+        for i, scenario in enumerate(self.plg_scenarios):
+            actions = gen.scenario_actions.get(scenario, ['standard_engagement'])
+            self.action_start[i] = len(self.actions)
+            self.action_count[i] = len(actions)
+            self.actions.extend(actions)
+
+        # Signals as [tier, event_type] bitmasks (bit order of gen.signal_names)
+        self.signal_bits = np.array([[gen.tier_event_signal_bits[(tier, e)] for e in self.event_types]
+                                     for tier in self.tiers], dtype=np.int64)
+        self.signal_bit = {name: bit for bit, name in enumerate(gen.signal_names)}
+        self.proximity_tier_segment = (self.tier_index.get('Free', -1), self.segment_index.get('conversion_ready', -1))
+        self.proximity_exceeded = event_mask(['usage_limit_hit'])
+        self.proximity_random = event_mask(['core_feature_usage', 'data_export'])
+
+        # Intervention priority is deterministic per (tier, segment, event_type)
+        self.priorities = ['high', 'medium', 'low']
+        self.priority_code = np.array([[[self.priorities.index(gen.intervention_priorities[(tier, segment, e)])
+                                         for e in self.event_types] for segment in self.segments] for tier in self.tiers],
+                                      dtype=np.int8)
+
+        # custom_properties values for every (pattern, cohort, variant) combination, serialized once
+        properties = []
+        for p, pattern_name in enumerate(self.pattern_names):
+            t, s = self.pattern_tier[p], self.pattern_segment[p]
+            for month in range(1, COHORT_MONTHS + 1):
+                for variant in EXPERIMENT_VARIANTS:
+                    properties.append((pattern_name, self.plg_scenarios[self.scenario_code[t, s]],
+                                       self.transition_candidates[self.transition_code[t, s]], f'2024-{month:02d}', variant))
+        self.custom_properties = np.array([json.dumps(dict(zip(CUSTOM_PROPERTY_KEYS, values))) for values in properties],
+                                          dtype=object)
+        self.property_tables = {column: np.array(values, dtype=object)
+                                for column, values in zip(PROPERTY_COLUMNS, zip(*properties))}
+
+        self.ip_addresses = np.array([f'192.168.{octet}.xxx' for octet in range(1, 256)], dtype=object)
+        self.value_ranges = np.array([params['value_range'] for params in tier_params])
+        self.file_size_ranges = np.array([params['file_size_range'] for params in tier_params])
+        self.value_event_mask = event_mask(gen.value_events)
+        self.file_event_mask = event_mask(gen.file_events)
+
+        # Label lists of the sparse context columns
+        self.context_labels = {column: spec if isinstance(spec, list) else [spec]
+                               for column, tier, trigger, kind, spec in TIER_CONTEXT_FIELDS if kind != 'int'}
+        self.context_labels.update({'error_code': gen.error_codes, 'error_message': gen.error_messages,
+                                    'tier_related_error': BOOLEAN_LABELS})
+
+        # Fixed categories of every label column in compact frames, so chunks and shards concatenate
+        category_labels = {
+            'event_type': self.event_types, 'product_name': gen.product_names, 'feature_name': self.feature_names,
+            'page_url': self.page_urls, 'device_type': gen.device_types, 'browser_name': gen.browsers,
+            'operating_system': gen.operating_systems, 'geography_country': ['US'], 'geography_region': gen.regions,
+            'geography_city': gen.cities, 'ip_address': self.ip_addresses, 'user_first_name': gen.first_names,
+            'user_last_name': gen.last_names, 'user_title': self.titles, 'user_department': gen.departments,
+            'subscription_tier': self.tiers, 'user_segment': self.segments, 'plg_scenario': self.plg_scenarios,
+            'session_type': self.pattern_names, 'engagement_depth': self.depth_levels,
+            'feature_sophistication': self.sophistication_levels, 'usage_limit_proximity': LIMIT_PROXIMITY_LEVELS,
+            'current_plan_tier': self.plan_tiers, 'payment_status': self.payment_statuses,
+            'next_best_action': self.actions, 'intervention_priority': self.priorities,
+            'source_system': [SOURCE_SYSTEM], 'custom_properties': self.custom_properties
+        }
+        category_labels.update(self.property_tables)
+        category_labels.update({column: labels for column, labels in self.context_labels.items()
+                                if EVENT_FIELDS[column].kind == 'string'})
+        self.category_dtypes = {column: pd.CategoricalDtype(pd.unique(np.asarray(labels, dtype=object)))
+                                for column, labels in category_labels.items()}
+
+    # ------------------------------------------------------------------
+    # Block generation
+    # ------------------------------------------------------------------
+
+    def draw_tier_session_counts(self, rng):
+        """Base sessions per tier, drawn once per dataset like generate_dataset does"""
+        return rng.integers(self.tier_session_low, self.tier_session_high + 1)
+
+    def expected_events_per_user(self, tier_session_counts):
+        """Mean events per user implied by the tier/segment mix, session counts and session lengths"""
+        lengths = np.array([[self.mean_session_length[start:start + count].mean()
+                             for start, count in zip(starts, counts)]
+                            for starts, counts in zip(self.pattern_start, self.pattern_count)])
+        sessions = np.repeat(np.asarray(tier_session_counts, dtype=float)[:, None], len(self.segments), axis=1)
+        champion = self.segment_index.get('champion')
+        if champion is not None:
+            sessions[:, champion] += 1.5
+        at_risk = self.segment_index.get('at_risk')
+        if at_risk is not None:
+            sessions[:, at_risk] = np.maximum(1, sessions[:, at_risk] - 1.5)
+        segment_p = self.generator.segment_sampler.probabilities()
+        tier_p = np.diff(self.generator.tier_sampler.cdf, prepend=0)
+        return float((tier_p[:, None] * segment_p * sessions * lengths).sum())
+
+    def generate_block(self, rng, user_start, num_users, tier_session_counts, ids, reference_time):
+        """Generate raw (integer-coded) event columns for users user_start..user_start+num_users-1
+
+        ids is the dataset's plg_ids.TelemetryIds; event and session tokens are its suffix codes.
+        """
+        reference = np.datetime64(reference_time, 'us').astype(np.int64)
+        reference_day = reference - reference % MICROS_PER_DAY
+
+        # Users
+        user_index = np.arange(user_start, user_start + num_users, dtype=np.int64)
+        users = self.draw_users(rng, num_users)
+        sessions = self.draw_user_session_counts(rng, users, tier_session_counts)
+
+        # Sessions
+        session_user = np.repeat(np.arange(num_users), sessions)
+        num_sessions = len(session_user)
+        pattern = self.draw_patterns(rng, users, session_user)
+        session_start = (reference_day
+                         - rng.integers(0, 31, num_sessions) * MICROS_PER_DAY
+                         + rng.integers(7, 20, num_sessions) * MICROS_PER_HOUR
+                         + rng.integers(0, 60, num_sessions) * MICROS_PER_MINUTE)
+        return self.session_block(rng, user_index, users, sessions, pattern, session_start, ids)
+
+    def draw_users(self, rng, num_users):
+        """Per-user code arrays: tier, segment, first_name, last_name, title and department"""
+        tier = self.generator.tier_sampler.draw_codes(num_users, rng).astype(np.int8)
+        segment = self.generator.segment_sampler.draw_codes(tier, rng).astype(np.int8)
+        first_name = rng.integers(0, len(self.first_names_lower), num_users).astype(np.int8)
+        last_name = rng.integers(0, len(self.last_names_lower), num_users).astype(np.int8)
+        title = (self.title_start[tier, segment] +
+                 (rng.random(num_users) * self.title_count[tier, segment]).astype(np.int64)).astype(np.int8)
+        department = rng.integers(0, len(self.generator.departments), num_users).astype(np.int8)
+        return {'tier': tier, 'segment': segment, 'first_name': first_name, 'last_name': last_name,
+                'title': title, 'department': department}
+
+    def draw_user_session_counts(self, rng, users, tier_session_counts):
+        """Sessions per user in the 30-day window: the tier's count with champion / at_risk adjustments"""
+        segment = users['segment']
+        sessions = tier_session_counts[users['tier']].astype(np.int64)
+        champion = segment == self.segment_index.get('champion', -1)
+        sessions[champion] += rng.integers(1, 3, champion.sum())
+        at_risk = segment == self.segment_index.get('at_risk', -1)
+        sessions[at_risk] = np.maximum(1, sessions[at_risk] - rng.integers(1, 3, at_risk.sum()))
+        return sessions
+
+    def draw_patterns(self, rng, users, session_user):
+        """Session pattern codes, uniform over each session user's (tier, segment) patterns"""
+        s_tier, s_segment = users['tier'][session_user], users['segment'][session_user]
+        return (self.pattern_start[s_tier, s_segment] +
+                (rng.random(len(session_user)) * self.pattern_count[s_tier, s_segment]).astype(np.int64))
+
+    def session_block(self, rng, user_index, users, sessions, pattern, session_start, ids, error_rate=None,
+                      session_base=None, event_base=None):
+        """Raw event columns for planned sessions: expand each session's pattern and sample the event fields
+
+        users holds per-user code arrays (tier, segment, first_name, last_name, title, department)
+        for the block's users user_index; sessions is the session count per user, and pattern and
+        session_start (int epoch microseconds) describe each session, grouped by user in order.
+        With error_rate (percent per user), that share of non-initial events becomes error_event.
+        session_base / event_base are per-user counts of sessions / events already issued, so ID
+        sequence numbers continue after earlier output instead of restarting at 0.
+        """
+        tier, segment = users['tier'], users['segment']
+        num_users = len(user_index)
+        session_user = np.repeat(np.arange(num_users), sessions)
+        num_sessions = len(session_user)
+        session_seq = np.arange(num_sessions) - (np.cumsum(sessions) - sessions)[session_user]
+        if session_base is not None:
+            session_seq += session_base[session_user]
+        session_token = ids.session_codes(user_index[session_user], session_seq)
+
+        # Events: each session's pattern as is, or a walk of its (tier, segment) chain opening like it
+        if self.markov is None:
+            length = self.pattern_length[pattern]
+        else:
+            length, event_type = self.markov.sample(rng, pattern)
+        event_session = np.repeat(np.arange(num_sessions), length)
+        num_events = len(event_session)
+        first_event = np.cumsum(length) - length
+        position = np.arange(num_events) - first_event[event_session]
+        if self.markov is None:
+            event_type = self.pattern_events[self.pattern_offset[pattern][event_session] + position]
+        event_user = session_user[event_session]
+        if error_rate is not None:
+            errors = (position > 0) & (rng.random(num_events) * 100 < error_rate[event_user])
+            event_type = np.where(errors, self.event_index['error_event'], event_type).astype(event_type.dtype)
+        e_tier, e_segment = tier[event_user], segment[event_user]
+        event_count = np.bincount(event_user, minlength=num_users)
+        event_seq = np.arange(num_events) - (np.cumsum(event_count) - event_count)[event_user]
+        if event_base is not None:
+            event_seq += event_base[event_user]
+
+        gap = np.rint(rng.uniform(self.gap_low[e_tier], self.gap_high[e_tier]) * MICROS_PER_MINUTE).astype(np.int64)
+        gap[position == 0] = 0
+        elapsed = np.cumsum(gap)
+        elapsed -= elapsed[first_event][event_session]
+        timestamp = session_start[event_session] + elapsed
+
+        cols = {
+            'user_index': user_index[event_user],
+            'event_token': ids.event_codes(user_index[event_user], event_seq),
+            'session_token': session_token[event_session],
+            'event_type': event_type,
+            'timestamp': timestamp,
+            'session_start_time': session_start[event_session],
+            'session_duration_minutes': np.round(elapsed / MICROS_PER_MINUTE, 2),
+            'product_name': rng.integers(0, len(self.generator.product_names), num_events).astype(np.int8),
+            'device_type': rng.integers(0, len(self.generator.device_types), num_events).astype(np.int8),
+            'browser_name': rng.integers(0, len(self.generator.browsers), num_events).astype(np.int8),
+            'operating_system': rng.integers(0, len(self.generator.operating_systems), num_events).astype(np.int8),
+            'geography_region': rng.integers(0, len(self.generator.regions), num_events).astype(np.int8),
+            'geography_city': rng.integers(0, len(self.generator.cities), num_events).astype(np.int8),
+            'ip_octet': rng.integers(0, 255, num_events).astype(np.uint8),
+            'first_name': users['first_name'][event_user],
+            'last_name': users['last_name'][event_user],
+            'user_title': users['title'][event_user],
+            'user_department': users['department'][event_user],
+            'subscription_tier': e_tier,
+            'user_segment': e_segment,
+            'session_type': pattern[event_session].astype(np.int16)
+        }
+
+        base_time = rng.integers(self.response_low[event_type], self.response_high[event_type] + 1)
+        cols['response_time_ms'] = (base_time * self.response_multiplier[e_tier]).astype(np.int64)
+        cols['engagement_depth'] = self.generator.depth_sampler.draw_codes(
+            e_tier.astype(np.int64) * len(self.segments) + e_segment, rng).astype(np.int8)
+
+        hour = (timestamp // MICROS_PER_HOUR) % 24
+        weekday = (timestamp // MICROS_PER_DAY + 3) % 7  # 1970-01-01 was a Thursday
+        cols['business_hours_indicator'] = (hour >= 8) & (hour <= 18) & (weekday < 5)
+        cols['mobile_usage_indicator'] = rng.integers(0, len(self.generator.device_types), num_events) == \
+            self.generator.device_types.index('mobile')
+        cols['weekend_usage_indicator'] = weekday >= 5
+
+        # PLG signals
+        proximity = np.zeros(num_events, dtype=np.int8)
+        free_t, ready_s = self.proximity_tier_segment
+        targeted = (e_tier == free_t) & (e_segment == ready_s)
+        proximity[targeted & self.proximity_exceeded[event_type]] = LIMIT_PROXIMITY_LEVELS.index('exceeded')
+        random_level = targeted & self.proximity_random[event_type]
+        proximity[random_level] = rng.integers(1, 3, random_level.sum())
+        bits = self.signal_bits[e_tier, event_type]
+        for name, bit in self.signal_bit.items():
+            cols[name] = (bits >> bit & 1).astype(bool)
+        cols['usage_limit_proximity'] = proximity
+        cols['feature_adoption_success'] = ~cols['friction_encountered']
+
+        # Revenue, health and predictive scores
+        payment = self.fixed_payment_status[e_tier].copy()
+        paid = self.paid_tier[e_tier]
+        payment[paid] = self.generator.payment_status_sampler.draw_codes(paid.sum(), rng)
+        cols['payment_status'] = payment
+        health = self.health_ranges[e_tier, e_segment]
+        cols['account_health_score'] = rng.integers(health[:, 0], health[:, 1] + 1)
+        cols['engagement_score'] = np.clip(self.engagement_base[e_tier, e_segment] + rng.integers(-10, 16, num_events), 0, 100)
+        for key, column in (('seat_utilization', 'seat_utilization'), ('storage_utilization', 'storage_utilization')):
+            bounds = self.usage_ranges[key][e_tier]
+            cols[column] = np.round(rng.uniform(bounds[:, 0], bounds[:, 1]), 2)
+        for key, column in (('integrations', 'integration_count'), ('support_tickets', 'support_ticket_count')):
+            bounds = self.usage_ranges[key][e_tier]
+            cols[column] = rng.integers(bounds[:, 0], bounds[:, 1] + 1)
+        cols['churn_risk_score'] = self.churn_base[e_tier, e_segment] + rng.integers(-10, 16, num_events)
+        cols['conversion_propensity'] = self._propensity(
+            rng, self.conversion_base[e_tier, e_segment], self.conversion_boost[e_tier, event_type],
+            self.conversion_noise[e_tier, e_segment])
+        cols['upsell_propensity'] = self._propensity(
+            rng, self.upsell_base[e_tier, e_segment], self.upsell_boost[e_tier, event_type],
+            self.upsell_noise[e_tier, e_segment])
+        cols['retention_probability'] = self.retention_base[e_tier, e_segment] + rng.integers(-10, 11, num_events)
+
+        scenario = self.scenario_code[e_tier, e_segment]
+        cols['next_best_action'] = (self.action_start[scenario] +
+                                    (rng.random(num_events) * self.action_count[scenario]).astype(np.int64)).astype(np.int16)
+        cols['intervention_priority'] = self.priority_code[e_tier, e_segment, event_type]
+        cohort = rng.integers(0, COHORT_MONTHS, num_events)
+        variant = rng.integers(0, len(EXPERIMENT_VARIANTS), num_events)
+        cols['custom_properties'] = ((cols['session_type'].astype(np.int64) * COHORT_MONTHS + cohort)
+                                     * len(EXPERIMENT_VARIANTS) + variant).astype(np.int32)
+
+        self._add_tier_specific_context(rng, cols, event_type, e_tier)
+
+        summary = {'tier': tier, 'plg_scenario': self.scenario_code[tier, segment], 'event_count': event_count}
+        return summary, cols
+
+    @staticmethod
+    def _propensity(rng, base, boost, noise):
+        """min(95, base + boost + randint(*noise)), or 0 where the tier has no propensity"""
+        score = np.minimum(95, base + boost + rng.integers(noise[:, 0], noise[:, 1] + 1))
+        score[base < 0] = 0
+        return score
+
+    def _add_tier_specific_context(self, rng, cols, event_type, e_tier):
+        """Sparse tier-specific columns; categorical codes use -1 and numbers NaN where absent"""
+        num_events = len(event_type)
+        for column, tier, trigger, kind, spec in TIER_CONTEXT_FIELDS:
+            mask = (e_tier == self.tier_index.get(tier, -1)) & (event_type == self.event_index.get(trigger, -1))
+            count = int(mask.sum())
+            if kind == 'int':
+                values = np.full(num_events, np.nan)
+                values[mask] = rng.integers(spec[0], spec[1] + 1, count)
+            else:
+                values = np.full(num_events, -1, dtype=np.int8)
+                values[mask] = rng.integers(0, len(spec), count) if kind == 'choice' else 0
+            cols[column] = values
+
+        conversion_value = np.full(num_events, np.nan)
+        mask = self.value_event_mask[event_type]
+        bounds = self.value_ranges[e_tier[mask]]
+        conversion_value[mask] = rng.integers(bounds[:, 0], bounds[:, 1] + 1)
+        cols['conversion_value'] = conversion_value
+
+        errors = event_type == self.event_index.get('error_event', -1)
+        count = int(errors.sum())
+        for column, labels in (('error_code', self.generator.error_codes), ('error_message', self.generator.error_messages)):
+            values = np.full(num_events, -1, dtype=np.int8)
+            values[errors] = rng.integers(0, len(labels), count)
+            cols[column] = values
+        tier_related = np.full(num_events, -1, dtype=np.int8)
+        tier_related[errors] = BOOLEAN_LABELS.index(False)
+        free_errors = errors & (e_tier == self.tier_index.get('Free', -1))
+        tier_related[free_errors] = rng.integers(0, 2, free_errors.sum())
+        cols['tier_related_error'] = tier_related
+
+        file_size = np.full(num_events, np.nan)
+        mask = self.file_event_mask[event_type]
+        bounds = self.file_size_ranges[e_tier[mask]]
+        file_size[mask] = rng.integers(bounds[:, 0], bounds[:, 1] + 1)
+        cols['file_size_bytes'] = file_size
+
+    # ------------------------------------------------------------------
+    # Dataset assembly
+    # ------------------------------------------------------------------
+
+    def iter_blocks(self, total_records, num_users, seed, reference_time=None):
+        """Yield (users, cols) blocks of BLOCK_USERS users until total_records events exist, trimmed like
+        generate_dataset
+
+        Per-dataset draws come from dataset_rng(seed) and each block from block_rng(seed, block index),
+        so the events never depend on how the blocks are consumed (in memory, streamed in any chunk
+        size, or as the shards of plg_parallel on any number of workers).
+        """
+        reference_time = reference_time or datetime.now()
+        rng = dataset_rng(seed)
+        tier_session_counts = self.draw_tier_session_counts(rng)
+        ids = self.generator.new_telemetry_ids(rng, num_users)
+        generated_events = 0
+        for block_index, user_start in enumerate(range(0, num_users, BLOCK_USERS)):
+            if generated_events >= total_records:
+                break
+            users, cols = self.generate_block(block_rng(seed, block_index), user_start,
+                                              min(BLOCK_USERS, num_users - user_start), tier_session_counts, ids,
+                                              reference_time)
+            users, cols = self.trim_block(users, cols, total_records - generated_events)
+            generated_events += len(cols['timestamp'])
+            yield users, cols
+
+    @staticmethod
+    def trim_block(users, cols, max_events):
+        """Keep users up to the one whose events reach max_events, then trim events to max_events"""
+        if len(cols['timestamp']) < max_events:
+            return users, cols
+        last_user = int(np.searchsorted(np.cumsum(users['event_count']), max_events))
+        users = {key: values[:last_user + 1] for key, values in users.items()}
+        cols = {key: values[:max_events] for key, values in cols.items()}
+        return users, cols
+
+    def generate(self, total_records, num_users, seed, reference_time=None):
+        """Generate all blocks for a dataset and return the concatenated (users, cols)"""
+        blocks = list(self.iter_blocks(total_records, num_users, seed, reference_time))
+        return self.concat([users for users, cols in blocks]), self.concat([cols for users, cols in blocks])
+
+    @staticmethod
+    def concat(blocks):
+        """Concatenate a list of column dicts"""
+        if len(blocks) == 1:
+            return blocks[0]
+        if not blocks:
+            return {}
+        return {key: np.concatenate([block[key] for block in blocks]) for key in blocks[0]}
+
+    @staticmethod
+    def take(cols, order):
+        """Reorder (or subset) every column"""
+        return {key: values[order] for key, values in cols.items()}
+
+    def sort_by_time(self, cols):
+        """Stable numeric sort on the int64 timestamp column"""
+        return self.take(cols, np.argsort(cols['timestamp'], kind='stable'))
+
+    def _labels(self, labels, codes, copy_values=False):
+        """Map integer codes to labels; code -1 becomes NaN"""
+        table = np.empty(len(labels) + 1, dtype=object)
+        for i, label in enumerate(labels):
+            table[i] = label
+        table[-1] = np.nan
+        values = table[np.where(codes < 0, len(labels), codes)]
+        if copy_values:
+            present = np.flatnonzero(codes >= 0)
+            values[present] = [list(values[i]) for i in present]
+        return values
+
+    def _categorical(self, column, labels, codes):
+        """Categorical of the labels selected by codes (-1 is NaN), in the column's fixed categories"""
+        dtype = self.category_dtypes[column]
+        remap = dtype.categories.get_indexer(pd.Index(np.asarray(labels, dtype=object)))
+        return pd.Categorical.from_codes(np.where(codes < 0, -1, remap[codes]), dtype=dtype)
+
+    @staticmethod
+    def _format_distinct(values, formatter):
+        """Apply a vectorized formatter to the distinct values only and expand back"""
+        unique, inverse = np.unique(values, return_inverse=True)
+        return formatter(unique)[inverse]
+
+    def to_frame(self, cols, compact=False, identities=None):
+        """Materialize raw columns into the same DataFrame layout as the scalar path
+
+        With compact=True the frame has the dtypes of compact_frame, with label columns built
+        directly as Categoricals over self.category_dtypes.
+        identities maps user columns (user_id, user_email, ...) to per-user value arrays indexed by
+        user_index, replacing the generated names for real contacts (see plg_history).
+        """
+        # Object columns are passed through as-is rather than re-inferred element by element, and copy=False
+        # keeps one block per column instead of consolidating them (most of the frame build time otherwise)
+        frame = {}
+        for column, values in self.frame_columns(cols, compact, identities).items():
+            if isinstance(values, np.ndarray) and values.dtype.kind in 'OU':
+                values = pd.Series(values, dtype=object, copy=False)
+            frame[column] = values
+        frame = pd.DataFrame(frame, copy=False)
+        return compact_frame(frame, self.category_dtypes) if compact else frame
+
+    def frame_columns(self, cols, compact=False, identities=None):
+        """to_frame's columns, in order, as arrays (Categoricals for compact labels) without the DataFrame"""
+        gen = self.generator
+
+        def label(column, labels, codes):
+            if compact:
+                return self._categorical(column, labels, codes)
+            return self._labels(labels, codes)
+
+        n = len(cols['timestamp'])
+        event_type = cols['event_type']
+        e_tier = cols['subscription_tier']
+        scenario = self.scenario_code[e_tier, cols['user_segment']]
+
+        # User strings are formatted once per user (user indexes are contiguous) and taken per event
+        first_user = int(cols['user_index'].min()) if n else 0
+        user_pos = cols['user_index'] - first_user
+        num_users = int(user_pos.max()) + 1 if n else 0
+        first = np.zeros(num_users, dtype=np.int8)
+        last = np.zeros(num_users, dtype=np.int8)
+        first[user_pos] = cols['first_name']
+        last[user_pos] = cols['last_name']
+        first, last = self.first_names_lower[first], self.last_names_lower[last]
+        index_text = np.arange(first_user, first_user + num_users).astype(str)
+        user_ids = np.strings.add(np.strings.add(np.strings.add(np.strings.add('user_', first), '_'), last), '_')
+        user_ids = np.strings.add(user_ids, np.strings.zfill(index_text, 4)).astype(object)
+        emails = np.strings.add(np.strings.add(np.strings.add(first, '.'), last), '@example.com').astype(object)
+        external_ids = np.strings.add('EXT_', np.strings.zfill(index_text, 6)).astype(object)
+
+        # Day prefixes and session start strings repeat heavily, so format each distinct value once
+        day_prefix = self._format_distinct(cols['timestamp'] // MICROS_PER_DAY, lambda days: np.array(
+            ['evt_' + str(day).replace('-', '') + '_' for day in days.astype('datetime64[D]')]))
+
+        data = {
+            'event_id': np.strings.add(day_prefix, hex_strings(cols['event_token'], gen.event_id_chars)),
+            'user_id': user_ids[user_pos],
+            'session_id': np.strings.add('sess_', hex_strings(cols['session_token'], gen.session_id_chars)),
+            'event_type': label('event_type', self.event_types, event_type),
+            'timestamp': cols['timestamp'].astype('datetime64[us]'),
+            'session_start_time': cols['session_start_time'].astype('datetime64[us]'),
+            'session_duration_minutes': cols['session_duration_minutes'],
+            'product_name': label('product_name', gen.product_names, cols['product_name']),
+            'feature_name': label('feature_name', self.feature_names, event_type),
+            'page_url': label('page_url', self.page_urls, event_type),
+            'device_type': label('device_type', gen.device_types, cols['device_type']),
+            'browser_name': label('browser_name', gen.browsers, cols['browser_name']),
+            'operating_system': label('operating_system', gen.operating_systems, cols['operating_system']),
+            'response_time_ms': cols['response_time_ms'],
+            'geography_country': label('geography_country', ['US'], np.zeros(n, dtype=np.int8)),
+            'geography_region': label('geography_region', gen.regions, cols['geography_region']),
+            'geography_city': label('geography_city', gen.cities, cols['geography_city']),
+            'ip_address': label('ip_address', self.ip_addresses, cols['ip_octet']),
+            'contact_external_id': external_ids[user_pos],
+            'user_email': emails[user_pos],
+            'user_first_name': label('user_first_name', gen.first_names, cols['first_name']),
+            'user_last_name': label('user_last_name', gen.last_names, cols['last_name']),
+            'user_title': label('user_title', self.titles, cols['user_title']),
+            'user_department': label('user_department', gen.departments, cols['user_department']),
+            'subscription_tier': label('subscription_tier', self.tiers, e_tier),
+            'user_segment': label('user_segment', self.segments, cols['user_segment']),
+            'plg_scenario': label('plg_scenario', self.plg_scenarios, scenario),
+            'session_type': label('session_type', self.pattern_names, cols['session_type']),
+            'engagement_depth': label('engagement_depth', self.depth_levels, cols['engagement_depth']),
+            'feature_sophistication': label('feature_sophistication', self.sophistication_levels, self.event_sophistication[event_type]),
+            'usage_limit_proximity': label('usage_limit_proximity', LIMIT_PROXIMITY_LEVELS, cols['usage_limit_proximity']),
+            'current_plan_tier': label('current_plan_tier', self.plan_tiers, e_tier),
+            'mrr_contribution': self.mrr[e_tier],
+            'arr_contribution': self.mrr[e_tier] * 12,
+            'customer_lifetime_value': self.lifetime_value[e_tier],
+            'payment_status': label('payment_status', self.payment_statuses, cols['payment_status']),
+            'next_best_action': label('next_best_action', self.actions, cols['next_best_action']),
+            'intervention_priority': label('intervention_priority', self.priorities, cols['intervention_priority']),
+            'is_demo_data': np.ones(n, dtype=bool),
+            'source_system': label('source_system', [SOURCE_SYSTEM], np.zeros(n, dtype=np.int8)),
+        }
+        if gen.properties_format == 'columns':
+            for column, table in self.property_tables.items():
+                data[column] = label(column, table, cols['custom_properties'])
+        else:
+            data['custom_properties'] = label('custom_properties', self.custom_properties, cols['custom_properties'])
+        for column in EVENT_COLUMNS:
+            if column not in data:
+                data[column] = cols[column]
+        for column, values in (identities or {}).items():
+            data[column] = values[cols['user_index']]
+
+        for column in CONTEXT_COLUMNS:
+            labels = self.context_labels.get(column)
+            if labels is None:
+                data[column] = cols[column]
+            elif compact and column in self.category_dtypes:
+                data[column] = self._categorical(column, labels, cols[column])
+            else:
+                data[column] = self._labels(labels, cols[column], copy_values=column == 'plans_viewed')
+        return {column: data[column] for column in output_columns(gen.properties_format)}
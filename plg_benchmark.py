@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite for PLG Telemetry
+Times the generator's hot paths (generate_user_profile, create_telemetry_event,
+generate_session_events, generate_dataset per engine and the streaming output
+writers) at increasing record counts, and stores events/sec and peak RSS per
+case as JSON so runs can be compared across commits.
+
+Each (case, records) pair runs in a fresh Python process, so its peak RSS is
+its own, with fixed seeds and a fixed reference time so the work done is
+identical between runs. Nothing needs network access.
+
+    python plg_benchmark.py                                   # every case at 1k, 100k, 1M and 10M records
+    python plg_benchmark.py --sizes 1000 100000 --output before.json
+    python plg_benchmark.py --sizes 1000 100000 --compare before.json
+
+Used for performance work on the plg_* modules
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from plg_telemetry_generator import PLGTelemetryGenerator
+from plg_batch import MICROS_PER_MINUTE
+from plg_writers import output_suffix
+
+# Record counts of the scaling curves
+BENCHMARK_SIZES = [1000, 100000, 1000000, 10000000]
+
+# Fixed inputs so every run does the same work
+BENCHMARK_SEED = 42
+REFERENCE_TIME = datetime(2025, 1, 1)
+
+# Profiles cycled through by the create_telemetry_event case
+PROFILE_POOL = 1000
+
+# In-memory generate_dataset cases above this many records are skipped (the streaming writer cases cover them)
+MAX_IN_MEMORY_RECORDS = 1000000
+
+# Chunk size of the streaming writer cases
+WRITER_CHUNK_SIZE = 100000
+
+# events/sec drop reported as a regression by --compare
+REGRESSION_THRESHOLD = 0.10
+
+
+def _generator():
+    """Generator with the global random state reset to BENCHMARK_SEED"""
+    random.seed(BENCHMARK_SEED)
+    np.random.seed(BENCHMARK_SEED)
+    return PLGTelemetryGenerator()
+
+
+def bench_generate_user_profile(records):
+    """records calls of generate_user_profile"""
+    gen = _generator()
+    start = time.perf_counter()
+    for user_index in range(records):
+        gen.generate_user_profile(user_index)
+    return {'seconds': time.perf_counter() - start, 'events': records}
+
+
+def bench_create_telemetry_event(records):
+    """records calls of create_telemetry_event over a pool of profiles and every event type"""
+    gen = _generator()
+    profiles = [gen.generate_user_profile(user_index) for user_index in range(PROFILE_POOL)]
+    ids = gen.new_telemetry_ids(random)
+    session_start = int(np.datetime64(REFERENCE_TIME, 'us').astype(np.int64))
+    session_id = ids.session_id(0, 0)
+    event_id = ids.event_id(session_start, 0, 0)
+    event_types = gen.event_types
+    start = time.perf_counter()
+    for i in range(records):
+        gen.create_telemetry_event(profiles[i % PROFILE_POOL], event_types[i % len(event_types)],
+                                   session_start + (i % 60) * MICROS_PER_MINUTE, session_id, session_start,
+                                   'basic_usage', event_id)
+    return {'seconds': time.perf_counter() - start, 'events': records}
+
+
+def bench_generate_session_events(records):
+    """generate_session_events for consecutive users until records events exist (only those calls are timed)"""
+    gen = _generator()
+    tier_session_counts = gen.draw_tier_session_counts()
+    ids = gen.new_telemetry_ids(random)
+    seconds, events, user_index = 0.0, 0, 0
+    while events < records:
+        profile = gen.generate_user_profile(user_index)
+        session_count = gen.get_session_count(profile, tier_session_counts)
+        start = time.perf_counter()
+        events += len(gen.generate_session_events(profile, session_count, ids, REFERENCE_TIME))
+        seconds += time.perf_counter() - start
+        user_index += 1
+    return {'seconds': seconds, 'events': events}
+
+
+def bench_generate_dataset(records, engine):
+    """generate_dataset into an in-memory DataFrame"""
+    if records > MAX_IN_MEMORY_RECORDS:
+        return {'skipped': f'more than {MAX_IN_MEMORY_RECORDS} records in memory'}
+    gen = _generator()
+    start = time.perf_counter()
+    df = gen.generate_dataset(records, engine=engine, seed=BENCHMARK_SEED, reference_time=REFERENCE_TIME)
+    return {'seconds': time.perf_counter() - start, 'events': len(df)}
+
+
+def bench_write(records, output_format, compression=None):
+    """write_dataset with the batch engine, streamed in WRITER_CHUNK_SIZE chunks and merged into time order"""
+    gen = _generator()
+    tmp_dir = tempfile.mkdtemp(prefix='plg_benchmark_')
+    try:
+        path = os.path.join(tmp_dir, f'events{output_suffix(output_format, compression)}')
+        start = time.perf_counter()
+        gen.write_dataset(path, records, min(records, WRITER_CHUNK_SIZE), output_format, engine='batch',
+                          seed=BENCHMARK_SEED, reference_time=REFERENCE_TIME, tmp_dir=tmp_dir,
+                          compression=compression)
+        seconds = time.perf_counter() - start
+        return {'seconds': seconds, 'events': records, 'output_mb': round(os.path.getsize(path) / 1e6, 2)}
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+# Case name -> function of records
+CASES = {
+    'generate_user_profile': bench_generate_user_profile,
+    'create_telemetry_event': bench_create_telemetry_event,
+    'generate_session_events': bench_generate_session_events,
+    'generate_dataset_scalar': lambda records: bench_generate_dataset(records, 'scalar'),
+    'generate_dataset_batch': lambda records: bench_generate_dataset(records, 'batch'),
+    'write_csv': lambda records: bench_write(records, 'csv'),
+    'write_csv_gzip': lambda records: bench_write(records, 'csv', 'gzip'),
+    'write_csv_zstd': lambda records: bench_write(records, 'csv', 'zstd'),
+    'write_jsonl': lambda records: bench_write(records, 'jsonl'),
+    'write_jsonl_gzip': lambda records: bench_write(records, 'jsonl', 'gzip'),
+    'write_parquet': lambda records: bench_write(records, 'parquet'),
+    'write_arrow': lambda records: bench_write(records, 'arrow'),
+}
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process in MB (ru_maxrss is in KB on Linux)"""
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def run_case(case, records):
+    """Run one case in this process; generator output is suppressed"""
+    baseline_rss = _peak_rss_mb()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = CASES[case](records)
+    if 'seconds' in result:
+        result['events_per_sec'] = round(result['events'] / result['seconds'], 1) if result['seconds'] else None
+        result['seconds'] = round(result['seconds'], 4)
+    result.update({'case': case, 'records': records, 'peak_rss_mb': _peak_rss_mb(), 'baseline_rss_mb': baseline_rss})
+    return result
+
+
+def run_case_process(case, records, timeout=None):
+    """Run one case in a fresh interpreter and return its result (with 'error' if it failed)"""
+    command = [sys.executable, os.path.abspath(__file__), '--run-case', case, '--records', str(records)]
+    try:
+        proc = subprocess.run(command, capture_output=True, text=True, timeout=timeout,
+                              cwd=os.path.dirname(os.path.abspath(__file__)))
+    except subprocess.TimeoutExpired:
+        return {'case': case, 'records': records, 'error': f'timed out after {timeout}s'}
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines() or [f'exit code {proc.returncode}']
+        return {'case': case, 'records': records, 'error': lines[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def environment():
+    """Commit and machine details stored with the results"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    try:
+        import pyarrow
+        pyarrow_version = pyarrow.__version__
+    except ImportError:
+        pyarrow_version = None
+    try:
+        import zstandard
+        zstandard_version = zstandard.__version__
+    except ImportError:
+        zstandard_version = None
+    return {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'pyarrow': pyarrow_version,
+        'zstandard': zstandard_version,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'seed': BENCHMARK_SEED,
+        'reference_time': REFERENCE_TIME.isoformat()
+    }
+
+
+def print_results(results):
+    """Scaling curve per case: events/sec, seconds and peak RSS by record count"""
+    print(f"\n{'case':<26}{'records':>10}{'events/sec':>14}{'seconds':>11}{'peak MB':>10}")
+    for result in results:
+        if 'events_per_sec' in result:
+            print(f"{result['case']:<26}{result['records']:>10}{result['events_per_sec']:>14,.0f}"
+                  f"{result['seconds']:>11.3f}{result['peak_rss_mb']:>10.1f}")
+        else:
+            print(f"{result['case']:<26}{result['records']:>10}  {result.get('skipped') or result.get('error')}")
+
+
+def compare_results(results, baseline_path):
+    """Print events/sec and peak RSS changes against a previous results file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {(result['case'], result['records']): result for result in baseline['results']}
+    print(f"\n📊 Compared with {baseline_path} (commit {baseline['environment'].get('git_commit')}):")
+    print(f"{'case':<26}{'records':>10}{'events/sec':>14}{'change':>9}{'peak MB':>10}{'change':>9}")
+    regressions = 0
+    for result in results:
+        before = previous.get((result['case'], result['records']))
+        if not before or 'events_per_sec' not in before or 'events_per_sec' not in result:
+            continue
+        speed = result['events_per_sec'] / before['events_per_sec'] - 1
+        memory = result['peak_rss_mb'] / before['peak_rss_mb'] - 1
+        flag = ' ⚠️' if speed < -REGRESSION_THRESHOLD else ''
+        regressions += bool(flag)
+        print(f"{result['case']:<26}{result['records']:>10}{result['events_per_sec']:>14,.0f}{speed:>+9.1%}"
+              f"{result['peak_rss_mb']:>10.1f}{memory:>+9.1%}{flag}")
+    if regressions:
+        print(f"\n⚠️  {regressions} case(s) slower by more than {REGRESSION_THRESHOLD:.0%}")
+
+
+def main(sizes=None, cases=None, output=None, compare=None, timeout=None):
+    """Run every case at every size, print the scaling curves and write the JSON results"""
+    sizes = sizes or BENCHMARK_SIZES
+    cases = cases or list(CASES)
+    output = output or f'plg_benchmark_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
+    print("⏱️  PLG Telemetry Benchmark Suite")
+    print("=" * 60)
+
+    results = []
+    for case in cases:
+        for records in sizes:
+            print(f"  {case} @ {records} records...", flush=True)
+            results.append(run_case_process(case, records, timeout))
+
+    report = {'environment': environment(), 'results': results}
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print_results(results)
+    if compare:
+        compare_results(results, compare)
+    print(f"\n💾 Results saved as: {output}")
+    return report
+
+
+def parse_args(argv=None):
+    """Command-line options for main() (and the internal --run-case mode)"""
+    parser = argparse.ArgumentParser(description='Benchmark the PLG telemetry generator hot paths')
+    parser.add_argument('--sizes', type=int, nargs='+', default=None,
+                        help=f"record counts to run (default: {' '.join(map(str, BENCHMARK_SIZES))})")
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=None, help='cases to run (default: all)')
+    parser.add_argument('--output', default=None, help='results JSON path (default: plg_benchmark_<timestamp>.json)')
+    parser.add_argument('--compare', default=None, metavar='JSON', help='earlier results file to compare against')
+    parser.add_argument('--timeout', type=float, default=None, help='seconds before a single case is abandoned')
+    parser.add_argument('--run-case', choices=list(CASES), default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--records', type=int, default=None, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.run_case:
+        print(json.dumps(run_case(args.run_case, args.records)))
+    else:
+        main(sizes=args.sizes, cases=args.cases, output=args.output, compare=args.compare, timeout=args.timeout)
@@ -0,0 +1,118 @@
+"""
+Contact Loader for PLG Telemetry
+Reads only the needed fields of a Salesforce Contact export (All_Contacts.csv,
+~170 columns) and keeps a local Parquet snapshot of them, reused while the
+export's contents are unchanged.
+
+The CSV is parsed with pyarrow's multi-threaded reader (quoted multi-line
+Background__c values included) when pyarrow is installed, and with the pandas
+C parser otherwise; only CONTACT_COLUMNS are converted either way. Snapshots
+live in .plg_cache next to the export, named by the export's SHA-256. An index
+of (size, mtime) per export avoids re-hashing files that have not been touched.
+
+Used by plg_background.load_background_profiles and contact-driven generation
+"""
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+# Fields read from the export; every other column is skipped while parsing
+CONTACT_COLUMNS = ['Id', 'External_ID__c', 'FirstName', 'LastName', 'Email', 'Title', 'Department', 'Tier__c',
+                   'Background__c']
+REQUIRED_CONTACT_COLUMNS = ['Id']
+
+# Bumped whenever snapshots change shape, so stale ones are ignored
+SNAPSHOT_VERSION = 1
+
+DIGEST_INDEX_NAME = 'digests.json'
+
+
+def file_digest(path, block_size=1 << 20):
+    """SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def default_cache_dir(path):
+    """Cache directory for an export: .plg_cache next to it"""
+    return os.path.join(os.path.dirname(os.path.abspath(path)), '.plg_cache')
+
+
+def source_digest(path, cache_dir):
+    """SHA-256 of an export, reusing the recorded digest while its size and mtime are unchanged"""
+    index_path = os.path.join(cache_dir, DIGEST_INDEX_NAME)
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    entry = index.get(key)
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return entry['sha256']
+
+    digest = file_digest(path)
+    index[key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f'{index_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, index_path)
+    return digest
+
+
+def read_contacts_csv(path, columns=CONTACT_COLUMNS):
+    """The given columns of a Contact export as strings ('' for empty or absent fields)"""
+    try:
+        from pyarrow import csv as pa_csv
+    except ImportError:
+        pa_csv = None
+
+    if pa_csv is not None:
+        header = pd.read_csv(path, nrows=0).columns
+        present = [column for column in columns if column in header]
+        table = pa_csv.read_csv(
+            path,
+            parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+            convert_options=pa_csv.ConvertOptions(include_columns=present,
+                                                  column_types={column: 'string' for column in present},
+                                                  strings_can_be_null=False))
+        contacts = table.to_pandas()
+    else:
+        contacts = pd.read_csv(path, usecols=lambda column: column in columns, dtype=str, keep_default_na=False)
+
+    missing = [column for column in REQUIRED_CONTACT_COLUMNS if column not in contacts]
+    if missing:
+        raise ValueError(f"{path} is missing required contact columns: {', '.join(missing)}")
+    for column in columns:
+        if column not in contacts:
+            contacts[column] = ''
+    return contacts[columns]
+
+
+def load_contacts(path, cache_dir=None, use_cache=True):
+    """CONTACT_COLUMNS of a Contact export, from the Parquet snapshot when the export is unchanged"""
+    try:
+        import pyarrow  # noqa: F401 - snapshots are Parquet files
+    except ImportError:
+        use_cache = False
+    if not use_cache:
+        return read_contacts_csv(path)
+
+    cache_dir = cache_dir or default_cache_dir(path)
+    snapshot_path = os.path.join(cache_dir, f'contacts_v{SNAPSHOT_VERSION}_{source_digest(path, cache_dir)[:32]}.parquet')
+    if os.path.exists(snapshot_path):
+        return pd.read_parquet(snapshot_path)
+
+    contacts = read_contacts_csv(path)
+    tmp_path = f'{snapshot_path}.{os.getpid()}.tmp'
+    contacts.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, snapshot_path)
+    return contacts
@@ -0,0 +1,222 @@
+"""
+Contact-Driven Session History for PLG Telemetry
+Generates the whole session history of each contact in a Contact export,
+from its Background__c persona's [SIGNUP] through [LAST_LOGIN] (see
+plg_background), instead of a few sessions in the last 30 days for
+synthetic users.
+
+Session counts follow [AVERAGE_SESSION_FREQUENCY] (Poisson over the
+contact's tenure), session patterns are weighted toward the persona's
+[PRIMARY_FEATURES], and [ERROR_RATE] percent of events become error_event.
+Session counts for every contact are drawn up front in one NumPy call; start
+days, times and patterns are drawn per block of contacts as whole arrays and
+expanded into events by BatchTelemetryEngine.session_block, so memory is
+bounded by the block size rather than by the length of the history.
+
+Used by PLGTelemetryGenerator.generate_history and write_history
+"""
+
+import numpy as np
+import pandas as pd
+
+from plg_batch import MICROS_PER_DAY, MICROS_PER_HOUR, MICROS_PER_MINUTE
+from plg_background import (FEATURE_NAMES, FREQUENCY_COLUMNS, LEGACY_SESSION_FREQUENCIES, load_background_profiles,
+                            report_parse_errors)
+from plg_contacts import load_contacts
+from plg_ids import TelemetryIds, SEQUENCE_BITS
+
+# Expected events per generated block of contacts; block boundaries depend only on it and the drawn
+# session counts, so it is part of the output definition (changing it changes the data for a seed)
+BLOCK_EVENTS = 100000
+
+# Average days per month, for X/month session rates
+DAYS_PER_MONTH = 30.4375
+
+# Session frequency for personas without one, by segment (keys of LEGACY_SESSION_FREQUENCIES)
+SEGMENT_SESSION_FREQUENCIES = {
+    'champion': 'daily',
+    'engaged': 'weekly',
+    'conversion_ready': 'weekly',
+    'casual': 'monthly',
+    'at_risk': 'declining'
+}
+
+# Tier for contacts whose Tier__c is empty or unknown, by persona [CURRENT_PLAN]
+PLAN_TIERS = {'free': 'Free', 'starter': 'Basic', 'professional': 'Premium', 'enterprise': 'Premium'}
+DEFAULT_TIER = 'Free'
+
+# Event types that count as use of each [PRIMARY_FEATURES] feature
+FEATURE_EVENTS = {
+    'basic_dashboard': ['dashboard_view', 'dashboard_check', 'dashboard_analytics'],
+    'core_analytics': ['core_feature_usage', 'basic_analytics', 'standard_analytics', 'data_analysis', 'report_generate',
+                       'simple_report', 'basic_feature', 'basic_feature_try', 'basic_feature_only'],
+    'advanced_analytics': ['advanced_analytics', 'premium_analytics', 'advanced_reporting', 'insight_discovery',
+                           'cross_team_analytics', 'enterprise_reporting', 'advanced_feature_usage', 'advanced_features'],
+    'custom_dashboards': ['custom_dashboard_create', 'premium_dashboard'],
+    'api_integration': ['api_integration', 'api_exploration'],
+    'team_collaboration': ['team_collaborate', 'team_sharing', 'team_workspace', 'team_management',
+                           'team_management_view', 'advanced_sharing', 'share_result'],
+    'data_export': ['data_export', 'data_export_final'],
+    'help_center': ['help_view', 'help_search', 'support_ticket_create', 'welcome_tour'],
+    'premium_preview': ['premium_feature_explore', 'pricing_page_view', 'paywall_encounter', 'enterprise_trial',
+                        'enterprise_feature_trial'],
+    'admin_settings': ['account_settings', 'admin_settings_explore', 'team_admin', 'custom_configuration'],
+    'automation_setup': ['automation_setup', 'workflow_start', 'workflow_optimization', 'performance_tuning'],
+    'login': ['login']
+}
+
+# A session pattern's weight is 1 + FEATURE_AFFINITY * sum over features of
+# (share of the pattern's events using the feature) * (persona percentage / 100)
+FEATURE_AFFINITY = 4.0
+
+# Sessions start at a whole minute between these hours, as in generate_session_events
+SESSION_HOURS = (7, 20)
+
+
+def _slug(values):
+    """Lowercase ASCII letters and digits only, for user_id / email parts"""
+    return values.str.lower().str.replace(r'[^a-z0-9]+', '', regex=True)
+
+
+class ContactHistory:
+    """Contacts with a persona, as per-contact arrays for history generation
+
+    Contacts are kept in export order and only when their Background__c parsed; a
+    contact's user_index is its position among the kept contacts.
+    """
+
+    def __init__(self, engine, contacts, profiles, reference_time=None):
+        self.engine = engine
+        contacts = contacts.drop_duplicates('Id')
+        contacts = contacts[contacts['Id'].isin(profiles.index)].reset_index(drop=True)
+        profiles = profiles[~profiles.index.duplicated()].loc[contacts['Id']]
+        self.num_contacts = len(contacts)
+
+        # Tier from Tier__c, else from the persona's plan; segment from the persona
+        plan_tier = profiles['current_plan'].astype(object).map(PLAN_TIERS).fillna(DEFAULT_TIER).to_numpy()
+        tier = contacts['Tier__c'].where(contacts['Tier__c'].isin(engine.tiers), plan_tier)
+        self.tier = tier.map(engine.tier_index).to_numpy(dtype=np.int8)
+        self.segment = profiles['segment'].astype(object).map(engine.segment_index).to_numpy(dtype=np.int8)
+
+        # Persona dates as epoch days, optionally shifted so the latest LAST_LOGIN is on reference_time's day
+        signup = profiles['signup'].to_numpy(dtype='datetime64[D]').astype(np.int64)
+        last_login = profiles['last_login'].to_numpy(dtype='datetime64[D]').astype(np.int64)
+        if reference_time is not None and self.num_contacts:
+            shift = np.datetime64(reference_time, 'D').astype(np.int64) - last_login.max()
+            signup, last_login = signup + shift, last_login + shift
+        self.signup_day = signup * MICROS_PER_DAY
+        self.window_days = np.maximum(last_login - signup, 0)
+
+        # Sessions per day: the monthly rate, else weekly, else daily; segment defaults when absent
+        frequency = profiles[FREQUENCY_COLUMNS].astype('float64').to_numpy()
+        defaults = np.array([LEGACY_SESSION_FREQUENCIES[SEGMENT_SESSION_FREQUENCIES.get(segment, 'monthly')]
+                             for segment in engine.segments], dtype=float)
+        missing = np.isnan(frequency).any(axis=1)
+        frequency[missing] = defaults[self.segment[missing]]
+        per_day, per_week, per_month = frequency.T
+        self.session_rate = np.where(per_month > 0, per_month / DAYS_PER_MONTH,
+                                     np.where(per_week > 0, per_week / 7, per_day))
+        self.error_rate = profiles['error_rate'].fillna(0).to_numpy(dtype=float)
+
+        # Pattern weights over each contact's candidate patterns (zero past the (tier, segment) count)
+        feature_index = {event_type: f for f, name in enumerate(FEATURE_NAMES) for event_type in FEATURE_EVENTS[name]}
+        event_feature = np.array([feature_index.get(event_type, -1) for event_type in engine.event_types])
+        pattern_feature = np.zeros((len(engine.pattern_names), len(FEATURE_NAMES)))
+        pattern_of_event = np.repeat(np.arange(len(engine.pattern_names)), engine.pattern_length)
+        used = event_feature[engine.pattern_events] >= 0
+        np.add.at(pattern_feature, (pattern_of_event[used], event_feature[engine.pattern_events][used]), 1)
+        pattern_feature /= engine.pattern_length[:, None]
+        features = profiles[[f'feature_{name}' for name in FEATURE_NAMES]].to_numpy(dtype=float) / 100
+
+        start = engine.pattern_start[self.tier, self.segment]
+        count = engine.pattern_count[self.tier, self.segment]
+        slots = np.arange(engine.pattern_count.max())
+        valid = slots < count[:, None]
+        candidates = np.where(valid, start[:, None] + slots, 0)
+        affinity = np.einsum('cpf,cf->cp', pattern_feature[candidates], features)
+        self.pattern_weights = np.where(valid, 1 + FEATURE_AFFINITY * affinity, 0)
+        self.mean_pattern_length = ((engine.mean_session_length[candidates] * self.pattern_weights).sum(axis=1)
+                                    / self.pattern_weights.sum(axis=1))
+
+        # Identity columns for BatchTelemetryEngine.to_frame, indexed by user_index
+        first, last = _slug(contacts['FirstName']), _slug(contacts['LastName'])
+        index_text = pd.Series(np.arange(self.num_contacts).astype(str))
+        email = contacts['Email'].where(contacts['Email'] != '', first + '.' + last + '@example.com')
+        external_id = contacts['External_ID__c'].where(contacts['External_ID__c'] != '', 'EXT_' + index_text.str.zfill(6))
+        identities = {
+            'user_id': 'user_' + first + '_' + last + '_' + index_text.str.zfill(4),
+            'user_email': email,
+            'contact_external_id': external_id,
+            'user_first_name': contacts['FirstName'],
+            'user_last_name': contacts['LastName'],
+            'user_title': contacts['Title'],
+            'user_department': contacts['Department']
+        }
+        self.identities = {column: values.to_numpy(dtype=object) for column, values in identities.items()}
+
+    def draw_session_counts(self, rng):
+        """Sessions per contact: one on the LAST_LOGIN day plus Poisson(rate * days since SIGNUP)"""
+        return 1 + rng.poisson(self.session_rate * self.window_days)
+
+    def iter_blocks(self, rng):
+        """Yield (users, cols) blocks of whole contact histories, about BLOCK_EVENTS events each"""
+        engine, gen = self.engine, self.engine.generator
+        sessions = self.draw_session_counts(rng)
+
+        # Per-contact ID sequences must hold the longest possible history
+        max_events = int(sessions.max()) * engine.max_session_events if self.num_contacts else 1
+        ids = TelemetryIds.from_rng(rng, event_chars=gen.event_id_chars, session_chars=gen.session_id_chars,
+                                    sequence_bits=max(SEQUENCE_BITS, (max_events - 1).bit_length()))
+        ids.check_capacity(self.num_contacts, max_events)
+
+        expected = np.cumsum(sessions * self.mean_pattern_length)
+        start = 0
+        while start < self.num_contacts:
+            done = expected[start - 1] if start else 0
+            stop = max(start + 1, int(np.searchsorted(expected, done + BLOCK_EVENTS, side='right')))
+            yield self.generate_block(rng, start, stop, sessions[start:stop], ids)
+            start = stop
+
+    def generate_block(self, rng, start, stop, sessions, ids):
+        """Raw event columns for the full histories of contacts start..stop-1"""
+        engine = self.engine
+        num_users = stop - start
+        user_index = np.arange(start, stop, dtype=np.int64)
+        tier, segment = self.tier[start:stop], self.segment[start:stop]
+        # Identity codes are placeholders: to_frame takes names, title and department from self.identities
+        placeholder = np.zeros(num_users, dtype=np.int8)
+        users = {'tier': tier, 'segment': segment, 'first_name': placeholder, 'last_name': placeholder,
+                 'title': engine.title_start[tier, segment].astype(np.int8), 'department': placeholder}
+
+        # Patterns: inverse-CDF draw over each contact's weighted candidates
+        session_user = np.repeat(np.arange(num_users), sessions)
+        num_sessions = len(session_user)
+        cdf = np.cumsum(self.pattern_weights[start:stop], axis=1)
+        cdf /= cdf[:, -1:]
+        choice = (rng.random(num_sessions)[:, None] >= cdf[session_user]).sum(axis=1)
+        pattern = engine.pattern_start[tier, segment][session_user] + choice
+
+        # Start days uniform over SIGNUP..LAST_LOGIN with the last session on the LAST_LOGIN day
+        window = self.window_days[start:stop][session_user]
+        day = (rng.random(num_sessions) * (window + 1)).astype(np.int64)
+        day[np.cumsum(sessions) - 1] = self.window_days[start:stop]
+        session_start = (self.signup_day[start:stop][session_user]
+                         + day * MICROS_PER_DAY
+                         + rng.integers(*SESSION_HOURS, num_sessions) * MICROS_PER_HOUR
+                         + rng.integers(0, 60, num_sessions) * MICROS_PER_MINUTE)
+        session_start = session_start[np.lexsort((session_start, session_user))]
+
+        return engine.session_block(rng, user_index, users, sessions, pattern, session_start, ids,
+                                    error_rate=self.error_rate[start:stop])
+
+
+def load_contact_history(engine, path, reference_time=None, cache_dir=None, use_cache=True):
+    """ContactHistory for a Contact export, reporting Background__c values that could not be parsed"""
+    contacts = load_contacts(path, cache_dir, use_cache)
+    profiles, errors = load_background_profiles(path, cache_dir, use_cache=use_cache)
+    report_parse_errors(errors, len(profiles) + len(errors))
+    history = ContactHistory(engine, contacts, profiles, reference_time)
+    skipped = len(contacts) - history.num_contacts
+    if skipped:
+        print(f"ℹ️  {skipped} of {len(contacts)} contacts have no usable Background__c persona and were skipped")
+    return history
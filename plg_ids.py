@@ -0,0 +1,148 @@
+"""
+Event and Session ID Generation for PLG Telemetry
+Collision-free IDs built from (user index, sequence number within the user)
+instead of per-row uuid4 calls, for single events or whole NumPy columns.
+
+Each ID suffix is a keyed permutation (a balanced Feistel network) of the
+packed (user, sequence) value over suffix_chars * 4 bits, so distinct inputs
+never share a suffix while suffixes still look random. The key is drawn once
+per dataset, so IDs are reproducible from the dataset seed and do not depend
+on chunking or worker count. Uniqueness for a whole run follows from
+check_capacity() alone; duplicate_count() re-checks a materialized column.
+
+Used by PLGTelemetryGenerator (scalar engine) and BatchTelemetryEngine
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from plg_batch import MICROS_PER_DAY
+
+# Default suffix widths in hex characters: evt_YYYYMMDD_<event chars>, sess_<session chars>
+DEFAULT_EVENT_ID_CHARS = 10
+DEFAULT_SESSION_ID_CHARS = 12
+MIN_ID_CHARS = 4
+MAX_ID_CHARS = 16
+
+# Low bits of the packed value hold the per-user event/session number (default; longer
+# per-user histories use more bits and leave fewer for the user index)
+SEQUENCE_BITS = 8
+
+FEISTEL_ROUNDS = 4
+MASK64 = 2 ** 64 - 1
+
+EPOCH_DATE = date(1970, 1, 1)
+
+
+def _mix(x):
+    """SplitMix64 finalizer; works on Python ints and uint64 arrays alike"""
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+
+class FeistelPermutation:
+    """Keyed bijection on the integers [0, 2**bits) for even bits"""
+
+    def __init__(self, key, bits):
+        self.bits = bits
+        self.half_bits = bits // 2
+        self.half_mask = (1 << self.half_bits) - 1
+        self.round_keys = [_mix((key + (i + 1) * 0x9E3779B97F4A7C15) & MASK64) for i in range(FEISTEL_ROUNDS)]
+
+    def encode(self, values):
+        """Permute a Python int or a uint64 array"""
+        left, right = values >> self.half_bits, values & self.half_mask
+        for round_key in self.round_keys:
+            left, right = right, left ^ (_mix(right ^ round_key) & self.half_mask)
+        return (left << self.half_bits) | right
+
+    def decode(self, values):
+        """Inverse of encode"""
+        left, right = values >> self.half_bits, values & self.half_mask
+        for round_key in reversed(self.round_keys):
+            left, right = right ^ (_mix(left ^ round_key) & self.half_mask), left
+        return (left << self.half_bits) | right
+
+
+class TelemetryIds:
+    """Event and session ID scheme for one dataset"""
+
+    def __init__(self, key, event_chars=DEFAULT_EVENT_ID_CHARS, session_chars=DEFAULT_SESSION_ID_CHARS,
+                 sequence_bits=SEQUENCE_BITS):
+        for name, chars in (('event_chars', event_chars), ('session_chars', session_chars)):
+            if not MIN_ID_CHARS <= chars <= MAX_ID_CHARS:
+                raise ValueError(f"{name} must be between {MIN_ID_CHARS} and {MAX_ID_CHARS} (got {chars})")
+        self.key = key
+        self.event_chars = event_chars
+        self.session_chars = session_chars
+        self.sequence_bits = sequence_bits
+        self.events = FeistelPermutation(key, event_chars * 4)
+        self.sessions = FeistelPermutation(_mix(key ^ 0x5E55), session_chars * 4)
+        self.day_prefixes = {}
+
+    @classmethod
+    def from_rng(cls, rng, **options):
+        """Scheme with a key drawn from a NumPy Generator or the random module"""
+        if hasattr(rng, 'getrandbits'):
+            return cls(rng.getrandbits(64), **options)
+        return cls(int(rng.integers(0, 2 ** 63)), **options)
+
+    def max_users(self):
+        """Users that fit before event or session suffixes would repeat"""
+        return 1 << max(0, min(self.event_chars, self.session_chars) * 4 - self.sequence_bits)
+
+    def check_capacity(self, num_users, max_events_per_user):
+        """Raise ValueError unless every ID for num_users users is guaranteed unique"""
+        if max_events_per_user > 1 << self.sequence_bits:
+            raise ValueError(f"Up to {max_events_per_user} events per user exceeds the "
+                             f"{1 << self.sequence_bits} per-user ID sequence")
+        if num_users > self.max_users():
+            raise ValueError(f"{num_users} users exceeds the {self.max_users()} that "
+                             f"{self.event_chars}/{self.session_chars}-char ID suffixes can hold; use longer IDs")
+
+    # ------------------------------------------------------------------
+    # Suffix codes
+    # ------------------------------------------------------------------
+
+    def _pack(self, user_index, seq):
+        if isinstance(user_index, np.ndarray) or isinstance(seq, np.ndarray):
+            return ((np.asarray(user_index, dtype=np.uint64) << np.uint64(self.sequence_bits))
+                    | np.asarray(seq, dtype=np.uint64))
+        return (user_index << self.sequence_bits) | seq
+
+    def event_codes(self, user_index, seq):
+        """Event suffix codes for (user index, event number within the user); ints or arrays"""
+        return self.events.encode(self._pack(user_index, seq))
+
+    def session_codes(self, user_index, seq):
+        """Session suffix codes for (user index, session number within the user); ints or arrays"""
+        return self.sessions.encode(self._pack(user_index, seq))
+
+    def decode_event_codes(self, codes):
+        """(user index, event number) behind event suffix codes"""
+        packed = self.events.decode(codes)
+        return packed >> self.sequence_bits, packed & ((1 << self.sequence_bits) - 1)
+
+    # ------------------------------------------------------------------
+    # Single IDs (scalar engine)
+    # ------------------------------------------------------------------
+
+    def event_id(self, timestamp, user_index, seq):
+        """evt_YYYYMMDD_<suffix> for one event; timestamp is int epoch microseconds"""
+        day = timestamp // MICROS_PER_DAY
+        prefix = self.day_prefixes.get(day)
+        if prefix is None:
+            prefix = self.day_prefixes[day] = f'evt_{EPOCH_DATE + timedelta(days=day):%Y%m%d}_'
+        return f'{prefix}{self.event_codes(user_index, seq):0{self.event_chars}x}'
+
+    def session_id(self, user_index, seq):
+        """sess_<suffix> for one session"""
+        return f'sess_{self.session_codes(user_index, seq):0{self.session_chars}x}'
+
+
+def duplicate_count(ids):
+    """Number of repeated values in an ID column (0 when every ID is unique)"""
+    return int(pd.Series(ids, copy=False).duplicated().sum())
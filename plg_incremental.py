@@ -0,0 +1,229 @@
+"""
+Incremental Append Mode for PLG Telemetry
+Keeps a dataset up to date by generating only the events since the previous
+run and appending them to date partitions, instead of regenerating the whole
+30-day window relative to now on every run.
+
+A dataset directory holds hive-style partitions (event_date=YYYY-MM-DD/,
+one part-NNNNN file per run that touched the day) and a _state directory:
+state.json (watermark, RNG state, ID key and settings) and users.npz
+(per-user tier, segment, identity codes, session rate, last session start
+and the session / event numbers issued so far, so IDs stay unique across
+runs). The first run creates the users and backfills BACKFILL_DAYS; each
+later run draws every user's sessions between the watermark and now as a
+Poisson process at that user's rate, so its cost is proportional to the
+new events only. State is replaced atomically after the partitions are
+written; a failed run is simply repeated and overwrites its own part files.
+
+Used by PLGTelemetryGenerator.write_incremental
+"""
+
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+
+from plg_batch import BatchTelemetryEngine, BLOCK_USERS, MICROS_PER_DAY, MICROS_PER_HOUR, MICROS_PER_MINUTE
+from plg_ids import TelemetryIds, SEQUENCE_BITS
+from plg_summary import DatasetSummary
+from plg_writers import open_chunk_writer, output_suffix
+
+# Bumped whenever the state layout changes; older state directories are rejected
+STATE_VERSION = 1
+STATE_DIR_NAME = '_state'
+
+# Days generated by the first run, like the 30-day window of generate_dataset
+BACKFILL_DAYS = 30
+
+# Sessions start at a whole minute between these hours, as in generate_session_events
+SESSION_HOURS = (7, 20)
+
+# Per-user arrays in users.npz
+USER_CODE_FIELDS = ['tier', 'segment', 'first_name', 'last_name', 'title', 'department']
+USER_STATE_FIELDS = USER_CODE_FIELDS + ['session_rate', 'session_count', 'event_count', 'last_session_start']
+
+# Generator settings that must match the ones the dataset was created with
+SETTING_FIELDS = ['output_format', 'properties_format', 'event_id_chars', 'session_id_chars']
+
+
+def _micros(moment):
+    """Int epoch microseconds of a datetime"""
+    return int(np.datetime64(moment, 'us').astype(np.int64))
+
+
+def _replace_file(path, write):
+    """Write path through a temporary file and an atomic rename"""
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+class IncrementalDataset:
+    """Partitioned output directory plus the persisted generation state behind it"""
+
+    def __init__(self, generator, path, output_format='parquet', compression=None, row_group_size=None):
+        self.generator = generator
+        self.engine = BatchTelemetryEngine(generator)
+        self.path = path
+        self.state_dir = os.path.join(path, STATE_DIR_NAME)
+        self.settings = {'output_format': output_format, 'properties_format': generator.properties_format,
+                         'event_id_chars': generator.event_id_chars, 'session_id_chars': generator.session_id_chars}
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self.state = None
+        self.users = None
+
+    def exists(self):
+        """Whether a previous run left state in the dataset directory"""
+        return os.path.exists(os.path.join(self.state_dir, 'state.json'))
+
+    # ------------------------------------------------------------------
+    # State store
+    # ------------------------------------------------------------------
+
+    def load(self):
+        """Read state.json and users.npz, checking they match this generator's settings"""
+        with open(os.path.join(self.state_dir, 'state.json')) as f:
+            state = json.load(f)
+        if state['version'] != STATE_VERSION:
+            raise ValueError(f"{self.path} was created by state version {state['version']} (expected {STATE_VERSION})")
+        for field in SETTING_FIELDS:
+            if state[field] != self.settings[field]:
+                raise ValueError(f"{self.path} was created with {field}={state[field]!r}, not {self.settings[field]!r}")
+        with np.load(os.path.join(self.state_dir, 'users.npz')) as users:
+            self.users = {field: users[field] for field in USER_STATE_FIELDS}
+        self.state = state
+
+    def save(self):
+        """Replace users.npz, then state.json (the commit point of a run)"""
+        os.makedirs(self.state_dir, exist_ok=True)
+
+        def write_users(tmp_path):
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, **self.users)
+
+        def write_state(tmp_path):
+            with open(tmp_path, 'w') as f:
+                json.dump(self.state, f, indent=2)
+        _replace_file(os.path.join(self.state_dir, 'users.npz'), write_users)
+        _replace_file(os.path.join(self.state_dir, 'state.json'), write_state)
+
+    def create(self, num_users, seed, now):
+        """Fresh users and ID scheme with the watermark BACKFILL_DAYS before now's day"""
+        rng = np.random.default_rng(seed)
+        engine = self.engine
+        users = engine.draw_users(rng, num_users)
+        # generate_block spreads these sessions over 31 calendar days
+        sessions = engine.draw_user_session_counts(rng, users, engine.draw_tier_session_counts(rng))
+        users.update({'session_rate': sessions / 31, 'session_count': np.zeros(num_users, dtype=np.int64),
+                      'event_count': np.zeros(num_users, dtype=np.int64),
+                      'last_session_start': np.full(num_users, -1, dtype=np.int64)})
+
+        # Every bit the user index does not need goes to the per-user sequence, for long-running datasets
+        id_bits = min(self.settings['event_id_chars'], self.settings['session_id_chars']) * 4
+        sequence_bits = max(SEQUENCE_BITS, id_bits - max(1, (num_users - 1).bit_length()))
+        ids = TelemetryIds.from_rng(rng, event_chars=self.settings['event_id_chars'],
+                                    session_chars=self.settings['session_id_chars'], sequence_bits=sequence_bits)
+        ids.check_capacity(num_users, 1 << SEQUENCE_BITS)
+
+        now_day = _micros(now) // MICROS_PER_DAY * MICROS_PER_DAY
+        self.users = users
+        self.state = dict(self.settings, version=STATE_VERSION, num_users=num_users, runs=0,
+                          watermark=now_day - BACKFILL_DAYS * MICROS_PER_DAY, id_key=ids.key,
+                          sequence_bits=sequence_bits, rng_state=rng.bit_generator.state)
+
+    # ------------------------------------------------------------------
+    # Appending
+    # ------------------------------------------------------------------
+
+    def generate_block(self, rng, start, stop, ids, window_start, window_end):
+        """Raw event columns for users start..stop-1 with sessions starting in [window_start, window_end)
+
+        Sessions per calendar day are Poisson at each user's rate, at SESSION_HOURS times; those
+        outside the window are dropped, which keeps the process consistent across any run cadence.
+        Events at or after window_end have not happened yet and are dropped too, so a session still
+        running at the watermark ends there (its event numbers stay issued, keeping IDs unique).
+        """
+        engine, users = self.engine, self.users
+        num_users = stop - start
+        block = {field: users[field][start:stop] for field in USER_CODE_FIELDS}
+        first_day = window_start // MICROS_PER_DAY
+        num_days = (window_end - 1) // MICROS_PER_DAY - first_day + 1
+
+        session_user = np.repeat(np.arange(num_users), rng.poisson(users['session_rate'][start:stop] * num_days))
+        num_sessions = len(session_user)
+        session_start = ((first_day + rng.integers(0, num_days, num_sessions)) * MICROS_PER_DAY
+                         + rng.integers(*SESSION_HOURS, num_sessions) * MICROS_PER_HOUR
+                         + rng.integers(0, 60, num_sessions) * MICROS_PER_MINUTE)
+        inside = (session_start >= window_start) & (session_start < window_end)
+        session_user, session_start = session_user[inside], session_start[inside]
+        order = np.lexsort((session_start, session_user))
+        session_user, session_start = session_user[order], session_start[order]
+        sessions = np.bincount(session_user, minlength=num_users)
+        pattern = engine.draw_patterns(rng, block, session_user)
+
+        summary, cols = engine.session_block(
+            rng, np.arange(start, stop, dtype=np.int64), block, sessions, pattern, session_start, ids,
+            session_base=users['session_count'][start:stop], event_base=users['event_count'][start:stop])
+
+        users['session_count'][start:stop] += sessions
+        users['event_count'][start:stop] += summary['event_count']
+        due = cols['timestamp'] < window_end
+        if not due.all():
+            cols = engine.take(cols, due)
+        active = sessions > 0
+        users['last_session_start'][start:stop][active] = session_start[np.cumsum(sessions)[active] - 1]
+        summary = {key: values[summary['event_count'] > 0] for key, values in summary.items()}
+        return summary, cols
+
+    def append(self, now):
+        """Generate events from the watermark to now into the partitions; returns (rows, DatasetSummary)"""
+        engine, state = self.engine, self.state
+        window_start, window_end = state['watermark'], _micros(now)
+        summary = DatasetSummary()
+        if window_end <= window_start:
+            return 0, summary
+
+        rng = np.random.default_rng()
+        rng.bit_generator.state = state['rng_state']
+        ids = TelemetryIds(state['id_key'], state['event_id_chars'], state['session_id_chars'], state['sequence_bits'])
+        num_users = state['num_users']
+        writers = {}
+        rows = 0
+        try:
+            for start in range(0, num_users, BLOCK_USERS):
+                stop = min(num_users, start + BLOCK_USERS)
+                users, cols = self.generate_block(rng, start, stop, ids, window_start, window_end)
+                ids.check_capacity(num_users, int(self.users['event_count'][start:stop].max(initial=0)))
+                summary.add_block(engine, users, cols)
+                rows += self.write_partitions(engine.sort_by_time(cols), writers)
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+        state['watermark'] = window_end
+        state['runs'] += 1
+        state['rng_state'] = rng.bit_generator.state
+        state['updated_at'] = datetime.now().isoformat(timespec='seconds')
+        self.save()
+        return rows, summary
+
+    def write_partitions(self, cols, writers):
+        """Write time-sorted raw columns to their event_date partitions, opening this run's part files as needed"""
+        days = cols['timestamp'] // MICROS_PER_DAY
+        bounds = np.flatnonzero(np.diff(days)) + 1
+        for lo, hi in zip(np.concatenate([[0], bounds]), np.concatenate([bounds, [len(days)]])):
+            if lo == hi:
+                continue
+            day = str(np.datetime64(int(days[lo]), 'D'))
+            writer = writers.get(day)
+            if writer is None:
+                partition = os.path.join(self.path, f'event_date={day}')
+                os.makedirs(partition, exist_ok=True)
+                part = os.path.join(partition, f"part-{self.state['runs']:05d}"
+                                               f"{output_suffix(self.settings['output_format'], self.compression)}")
+                writer = writers[day] = open_chunk_writer(part, self.settings['output_format'], self.compression,
+                                                          self.row_group_size)
+            writer.write(self.engine.to_frame(self.engine.take(cols, slice(lo, hi))))
+        return len(days)
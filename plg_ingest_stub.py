@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Local Ingestion API Stub for PLG Telemetry
+A threaded HTTP server answering the Data Cloud Ingestion API calls that
+plg_upload makes, so uploads can be exercised end to end without a Salesforce
+org: Streaming API POSTs of {"data": [...]} payloads and the Bulk API job
+lifecycle (open a job, PUT CSV batches, PATCH it to UploadComplete or
+Aborted). Bodies may be gzip'd; each one is decoded and checked (JSON shape,
+CSV header matching the job's first batch, the API's payload limits) and its
+records are counted per object, bulk records once their job is complete.
+
+For retry testing, fail_rate answers that share of requests with 503 and a
+Retry-After, and latency delays every answer.
+
+    python plg_ingest_stub.py --port 8765 --fail-rate 0.1
+
+Used by main(--upload stub) and for testing plg_upload
+"""
+
+import argparse
+import csv
+import gzip
+import io
+import json
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+# Decoded payload limits of the Streaming API (per request) and the Bulk API (per CSV file)
+STREAMING_MAX_BYTES = 200000
+BULK_MAX_BYTES = 150000000
+
+DEFAULT_STUB_PORT = 8765
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Hands each request to the server's IngestionStub over keep-alive HTTP/1.1"""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; without TCP_NODELAY each answer waits for a delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        status, payload, headers = self.server.stub.handle(self.command, self.path, self.headers, body)
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up on this request (an upload that failed elsewhere closing its connections)
+            self.close_connection = True
+
+    do_GET = do_POST = do_PUT = do_PATCH = _handle
+
+
+class IngestionStub:
+    """In-process Ingestion API endpoint on host:port (port 0 picks a free one) that counts what it receives"""
+
+    def __init__(self, host='127.0.0.1', port=0, fail_rate=0.0, latency=0.0, retry_after=1, token=None, seed=None):
+        self.host = host
+        self.port = port
+        self.fail_rate = fail_rate
+        self.latency = latency
+        self.retry_after = retry_after
+        self.token = token
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.records = Counter()       # records accepted per object
+        self.requests = 0
+        self.injected_failures = 0
+        self.rejected = 0
+        self.bytes_received = 0
+        self.jobs = {}
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}'
+
+    def start(self):
+        """Serve on a background thread; returns self"""
+        self.server = ThreadingHTTPServer((self.host, self.port), _StubHandler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, name='plg_ingest_stub', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the listening socket"""
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.thread.join()
+            self.server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+
+    def _reject(self, status, message):
+        with self.lock:
+            self.rejected += 1
+        return status, {'error': message}, {}
+
+    def handle(self, method, path, headers, body):
+        """(status, JSON answer, extra headers) for one request"""
+        with self.lock:
+            self.requests += 1
+            self.bytes_received += len(body)
+            fail = self.random.random() < self.fail_rate
+            if fail:
+                self.injected_failures += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.token and headers.get('Authorization') != f'Bearer {self.token}':
+            return self._reject(401, 'missing or wrong bearer token')
+        if fail:
+            return 503, {'error': 'injected failure'}, {'Retry-After': str(self.retry_after)}
+        if headers.get('Content-Encoding') == 'gzip':
+            try:
+                body = gzip.decompress(body)
+            except (OSError, EOFError, zlib.error):
+                return self._reject(400, 'body is not valid gzip')
+
+        parts = urlsplit(path).path.strip('/').split('/')
+        if parts[:3] != ['api', 'v1', 'ingest']:
+            return self._reject(404, f'unknown path {path}')
+        route = parts[3:]
+        if method == 'POST' and len(route) == 3 and route[0] == 'sources':
+            return self.stream(route[2], body)
+        if method == 'POST' and route == ['jobs']:
+            return self.open_job(body)
+        if len(route) >= 2 and route[0] == 'jobs' and route[1] in self.jobs:
+            job = self.jobs[route[1]]
+            if method == 'PUT' and route[2:] == ['batches']:
+                return self.add_batch(job, body)
+            if method == 'PATCH' and len(route) == 2:
+                return self.close_job(job, body)
+            if method == 'GET' and len(route) == 2:
+                return 200, job, {}
+        return self._reject(404, f'no {method} {path}')
+
+    def stream(self, object_name, body):
+        """Streaming API: count the records of one {"data": [...]} payload"""
+        if len(body) > STREAMING_MAX_BYTES:
+            return self._reject(413, f'payload of {len(body)} bytes exceeds {STREAMING_MAX_BYTES}')
+        try:
+            data = json.loads(body)['data']
+        except (ValueError, KeyError, TypeError):
+            return self._reject(400, 'expected a JSON object with a "data" array')
+        if not isinstance(data, list) or not all(isinstance(record, dict) for record in data):
+            return self._reject(400, '"data" must be an array of objects')
+        with self.lock:
+            self.records[object_name] += len(data)
+        return 202, {'accepted': True}, {}
+
+    def open_job(self, body):
+        """Bulk API: open an upsert job for an object"""
+        try:
+            request = json.loads(body)
+            object_name = request['object']
+        except (ValueError, KeyError, TypeError):
+            return self._reject(400, 'expected a JSON job with an "object"')
+        with self.lock:
+            job_id = f'job{len(self.jobs) + 1:06d}'
+            job = self.jobs[job_id] = {'id': job_id, 'object': object_name, 'sourceName': request.get('sourceName'),
+                                       'operation': request.get('operation', 'upsert'), 'state': 'Open',
+                                       'batches': 0, 'records': 0, 'header': None}
+        return 201, job, {}
+
+    def add_batch(self, job, body):
+        """Bulk API: count the rows of one CSV file under its header"""
+        if job['state'] != 'Open':
+            return self._reject(409, f"job {job['id']} is {job['state']}")
+        if len(body) > BULK_MAX_BYTES:
+            return self._reject(413, f'CSV of {len(body)} bytes exceeds {BULK_MAX_BYTES}')
+        try:
+            rows = csv.reader(io.StringIO(body.decode()))
+            header = next(rows)
+            count = sum(1 for row in rows)
+        except (UnicodeDecodeError, csv.Error, StopIteration):
+            return self._reject(400, 'expected UTF-8 CSV with a header row')
+        with self.lock:
+            if job['header'] is None:
+                job['header'] = header
+            elif header != job['header']:
+                return self._reject(400, "CSV header differs from the job's first batch")
+            job['batches'] += 1
+            job['records'] += count
+        return 202, {'accepted': True}, {}
+
+    def close_job(self, job, body):
+        """Bulk API: move a job to UploadComplete (its records count) or Aborted"""
+        try:
+            state = json.loads(body)['state']
+        except (ValueError, KeyError, TypeError):
+            return self._reject(400, 'expected a JSON body with a "state"')
+        if state not in ('UploadComplete', 'Aborted') or job['state'] != 'Open':
+            return self._reject(409, f"cannot move job {job['id']} from {job['state']} to {state}")
+        with self.lock:
+            job['state'] = state
+            if state == 'UploadComplete':
+                self.records[job['object']] += job['records']
+        return 200, job, {}
+
+    def print_report(self):
+        """Print what the stub received"""
+        print(f"\n🧪 Ingestion stub at {self.url}: {self.requests} requests, {self.bytes_received / 1e6:.1f} MB received, "
+              f"{self.injected_failures} injected failures, {self.rejected} rejected")
+        for object_name, count in self.records.items():
+            print(f"  {object_name}: {count} records")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Local stand-in for the Data Cloud Ingestion API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_STUB_PORT)
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='share of requests answered with 503')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds to delay every answer')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with injected 503s')
+    parser.add_argument('--token', default=None, help='require this bearer token')
+    args = parser.parse_args()
+    stub = IngestionStub(args.host, args.port, args.fail_rate, args.latency, args.retry_after, args.token).start()
+    print(f"🧪 Ingestion stub listening on {stub.url} (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        stub.stop()
+        stub.print_report()
@@ -0,0 +1,164 @@
+"""
+Markov Session Model for PLG Telemetry
+Variable-length sessions walked through per-(tier, segment) transition
+matrices over event types, instead of replaying the fixed
+tier_session_patterns sequences verbatim. Each (tier, segment)'s chain is
+derived from its own patterns: from an event, a session takes the patterns'
+next step (MARKOV_FOLLOW), repeats the event (MARKOV_REPEAT), wanders to
+another of the pair's in-session events in proportion to how often the
+patterns use it (MARKOV_WANDER) or leaves through the patterns' last event,
+i.e. logout (MARKOV_EXIT). Every session opens like the pattern drawn for it
+(its session_type) - the pattern's first two events - and then follows the
+chain until it ends or reaches MAX_SESSION_EVENTS events.
+
+Sessions are sampled in bulk: each step draws one uniform per session still
+running and looks up its next event in the flattened cumulative transition
+rows of all pairs with a single searchsorted, so the Python loop runs over
+steps (at most MAX_SESSION_EVENTS), not sessions, and memory stays
+proportional to the number of sessions.
+
+Used by BatchTelemetryEngine (PLGTelemetryGenerator(session_model='markov'))
+"""
+
+import numpy as np
+import pandas as pd
+
+SESSION_MODELS = ['patterns', 'markov']
+
+# Transition weights from an in-session event (renormalized where a pair has nothing to repeat or wander to)
+MARKOV_FOLLOW = 0.65
+MARKOV_REPEAT = 0.1
+MARKOV_WANDER = 0.15
+MARKOV_EXIT = 0.1
+
+# Longest sampled session; a session reaching it ends with its pair's usual last event. The busiest
+# users' 10 sessions must fit the 256-event per-user ID sequence (plg_ids SEQUENCE_BITS)
+MAX_SESSION_EVENTS = 25
+
+
+def _chain(sequences):
+    """(event codes, transition matrix with a final END column, exit event) for one pair's patterns"""
+    states = list(dict.fromkeys(event for sequence in sequences for event in sequence))
+    index = {event: i for i, event in enumerate(states)}
+    num_states = len(states)
+    follow = np.zeros((num_states, num_states + 1))
+    body = np.zeros(num_states)
+    exits = np.zeros(num_states)
+    for sequence in sequences:
+        codes = [index[event] for event in sequence]
+        for current, following in zip(codes, codes[1:] + [num_states]):
+            follow[current, following] += 1
+        for code in codes[1:-1]:
+            body[code] += 1
+        exits[codes[-1]] += 1
+
+    matrix = np.zeros((num_states, num_states + 1))
+    for state in range(num_states):
+        if follow[state, :num_states].sum() == 0:
+            # Only ever the last event of a pattern
+            matrix[state, num_states] = 1
+            continue
+        matrix[state] += MARKOV_FOLLOW * follow[state] / follow[state].sum()
+        if body[state]:
+            matrix[state, state] += MARKOV_REPEAT
+        if body.sum():
+            matrix[state, :num_states] += MARKOV_WANDER * body / body.sum()
+        matrix[state, :num_states] += MARKOV_EXIT * exits / exits.sum()
+        matrix[state] /= matrix[state].sum()
+    return states, matrix, int(exits.argmax())
+
+
+class MarkovSessionModel:
+    """Per-(tier, segment) event-type chains compiled from a BatchTelemetryEngine's session patterns"""
+
+    def __init__(self, engine, max_events=MAX_SESSION_EVENTS):
+        self.event_types = engine.event_types
+        self.tiers, self.segments = engine.tiers, engine.segments
+        self.max_events = max_events
+        num_segments = len(self.segments)
+        num_patterns = len(engine.pattern_names)
+        sequences = [engine.pattern_events[offset:offset + length]
+                     for offset, length in zip(engine.pattern_offset, engine.pattern_length)]
+
+        # One chain per (tier, segment) pair, padded to the largest pair's state count
+        chains = []
+        for t in range(len(self.tiers)):
+            for s in range(num_segments):
+                start, count = engine.pattern_start[t, s], engine.pattern_count[t, s]
+                chains.append(_chain([list(sequence) for sequence in sequences[start:start + count]]))
+        self.num_states = max(len(states) for states, matrix, exit_state in chains)
+        num_pairs = len(chains)
+        self.state_event = np.zeros((num_pairs, self.num_states), dtype=engine.pattern_events.dtype)
+        self.matrices = np.zeros((num_pairs, self.num_states, self.num_states + 1))
+        self.matrices[:, :, self.num_states] = 1     # padding states end at once
+        self.exit_state = np.zeros(num_pairs, dtype=np.int64)
+        self.state_count = np.array([len(states) for states, matrix, exit_state in chains])
+        for p, (states, matrix, exit_state) in enumerate(chains):
+            n = len(states)
+            self.state_event[p, :n] = states
+            self.matrices[p, :n, :n] = matrix[:, :n]
+            self.matrices[p, :n, self.num_states] = matrix[:, n]
+            self.exit_state[p] = exit_state
+
+        # Cumulative rows offset by their row number, so one sorted array serves every (pair, state) row
+        cdf = np.cumsum(self.matrices, axis=2)
+        cdf[:, :, -1] = 1.0
+        rows = np.arange(num_pairs * self.num_states, dtype=np.float64)
+        self.row_cdf = (cdf.reshape(-1, self.num_states + 1) + rows[:, None]).ravel()
+
+        # Openings: each pattern's first event and the chain state of its second (-1 for one-event patterns)
+        self.pattern_pair = engine.pattern_tier.astype(np.int64) * num_segments + engine.pattern_segment
+        self.first_event = engine.pattern_events[engine.pattern_offset]
+        self.opening = np.full(num_patterns, -1, dtype=np.int64)
+        for pattern, sequence in enumerate(sequences):
+            if len(sequence) > 1:
+                self.opening[pattern] = list(self.state_event[self.pattern_pair[pattern]]).index(sequence[1])
+        self.mean_length = self._mean_lengths()
+
+    def _mean_lengths(self):
+        """Expected events per session of each pattern: its opening plus the chain's expected visits"""
+        visits = np.zeros((len(self.matrices), self.num_states))
+        identity = np.eye(self.num_states)
+        for p, matrix in enumerate(self.matrices):
+            visits[p] = np.linalg.solve(identity - matrix[:, :self.num_states], np.ones(self.num_states))
+        opened = self.opening >= 0
+        lengths = np.ones(len(self.opening))
+        lengths[opened] += visits[self.pattern_pair[opened], self.opening[opened]]
+        return np.minimum(lengths, self.max_events)
+
+    def transitions(self, tier, segment):
+        """Transition matrix of one (tier, segment) pair as a DataFrame (rows: from, columns: to and END)"""
+        p = self.tiers.index(tier) * len(self.segments) + self.segments.index(segment)
+        n = self.state_count[p]
+        events = [self.event_types[code] for code in self.state_event[p, :n]]
+        matrix = np.concatenate([self.matrices[p, :n, :n], self.matrices[p, :n, -1:]], axis=1)
+        return pd.DataFrame(matrix, index=events, columns=events + ['END'])
+
+    def sample(self, rng, pattern):
+        """(events per session, event codes grouped by session) for sessions opening like the given patterns"""
+        num_sessions = len(pattern)
+        pair = self.pattern_pair[pattern]
+        steps = [(np.arange(num_sessions), self.first_event[pattern])]
+        alive = np.flatnonzero(self.opening[pattern] >= 0)
+        state = self.opening[pattern[alive]]
+        while len(alive):
+            steps.append((alive, self.state_event[pair[alive], state]))
+            if len(steps) == self.max_events:
+                break
+            row = pair[alive] * self.num_states + state
+            position = np.searchsorted(self.row_cdf, row + rng.random(len(alive)), side='right')
+            state = position - row * (self.num_states + 1)
+            running = state < self.num_states
+            alive, state = alive[running], state[running]
+            if len(steps) == self.max_events - 1:
+                # The last event allowed is the pair's usual exit
+                state = self.exit_state[pair[alive]]
+
+        length = np.zeros(num_sessions, dtype=np.int64)
+        for sessions, codes in steps:
+            length[sessions] += 1
+        first = np.cumsum(length) - length
+        events = np.empty(int(length.sum()), dtype=self.state_event.dtype)
+        for position, (sessions, codes) in enumerate(steps):
+            events[first[sessions] + position] = codes
+        return length, events
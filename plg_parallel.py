@@ -0,0 +1,229 @@
+"""
+Sharded Multi-Process Generation for PLG Telemetry
+Splits the user index range into fixed-size shards and generates each shard
+with the batch engine in a process pool, from its own RNG stream derived from
+the dataset seed. Shards are reassembled in user order.
+
+Shard boundaries and seeds depend only on the seed and shard_users, never on
+the number of workers, so a given seed and reference_time produce identical
+output for any worker count. With the default shard_users the shards are the
+blocks of BatchTelemetryEngine.iter_blocks, generated from the same streams,
+so the output also matches an in-process or streamed batch run of the seed.
+
+Used by PLGTelemetryGenerator.generate_dataset(engine='batch', workers=N)
+"""
+
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from plg_batch import BLOCK_USERS, BatchTelemetryEngine, block_rng, dataset_rng
+from plg_schema import empty_frame
+from plg_summary import DatasetSummary
+from plg_writers import (open_chunk_writer, open_run_writer, run_file_name, merge_sorted_runs, copy_runs,
+                         DEFAULT_MERGE_ROWS)
+
+# Users per shard: one block of the batch engine (part of the output definition)
+SHARD_USERS = BLOCK_USERS
+
+# Shards queued per worker, so workers never wait on the parent between shards
+SHARDS_IN_FLIGHT_PER_WORKER = 2
+
+# Engine compiled once per worker process by _init_worker
+_worker_engine = None
+
+
+def iter_shard_plan(num_users, shard_users=SHARD_USERS):
+    """Yield (shard_index, user_start, num_users) covering range(num_users)"""
+    for shard_index, user_start in enumerate(range(0, num_users, shard_users)):
+        yield shard_index, user_start, min(shard_users, num_users - user_start)
+
+
+def _init_worker(generator):
+    """Process pool initializer: compile the batch lookup tables once per worker"""
+    global _worker_engine
+    _worker_engine = BatchTelemetryEngine(generator)
+
+
+def _generate_shard(seed, shard, tier_session_counts, ids, reference_time, max_events=None):
+    """Raw (users, cols) for one shard, trimmed to max_events; returns (event_count, (users, cols))"""
+    shard_index, user_start, num_users = shard
+    users, cols = _worker_engine.generate_block(block_rng(seed, shard_index), user_start, num_users,
+                                                tier_session_counts, ids, reference_time)
+    if max_events is not None:
+        users, cols = _worker_engine.trim_block(users, cols, max_events)
+    return len(cols['timestamp']), (users, cols)
+
+
+def _write_shard(seed, shard, tier_session_counts, ids, reference_time, max_events, run_dir, output_format):
+    """Generate one shard and write it as a time-sorted run file; returns (event_count, (run path, DatasetSummary))"""
+    events, (users, cols) = _generate_shard(seed, shard, tier_session_counts, ids, reference_time, max_events)
+    engine = _worker_engine
+    run_path = os.path.join(run_dir, run_file_name(shard[0], output_format))
+    with open_run_writer(run_path, output_format) as writer:
+        writer.write(engine.to_frame(engine.sort_by_time(cols)))
+    summary = DatasetSummary()
+    summary.add_block(engine, users, cols)
+    return events, (run_path, summary)
+
+
+def _frame_slice(cols, compact=False):
+    """Materialize a slice of raw columns in a worker"""
+    return _worker_engine.to_frame(cols, compact)
+
+
+class _InlineResult:
+    """Deferred call with the small Future interface used by ShardedTelemetryRunner"""
+
+    def __init__(self, fn, args):
+        self.fn = fn
+        self.args = args
+
+    def result(self):
+        return self.fn(*self.args)
+
+    def cancel(self):
+        return True
+
+
+class _InlineExecutor:
+    """Runs shard tasks in the calling process (workers=1), lazily and in submission order"""
+
+    def __init__(self, generator):
+        _init_worker(generator)
+
+    def submit(self, fn, *args):
+        return _InlineResult(fn, args)
+
+    def map(self, fn, iterable):
+        return map(fn, iterable)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+
+class ShardedTelemetryRunner:
+    """Generates a batch-engine dataset shard by shard across a process pool"""
+
+    def __init__(self, generator, workers, seed=None, reference_time=None, shard_users=SHARD_USERS):
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1 (got {workers})")
+        self.generator = generator
+        self.workers = workers
+        self.seed = np.random.randint(0, 2**31 - 1) if seed is None else seed
+        # Resolved once so every shard shares the same clock
+        self.reference_time = reference_time or datetime.now()
+        self.shard_users = shard_users
+        self.engine = BatchTelemetryEngine(generator)
+        rng = dataset_rng(self.seed)
+        self.tier_session_counts = self.engine.draw_tier_session_counts(rng)
+        self.ids = generator.new_telemetry_ids(rng)
+        self.events_per_user = self.engine.expected_events_per_user(self.tier_session_counts)
+
+    def _executor(self):
+        if self.workers == 1:
+            return _InlineExecutor(self.generator)
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(self.generator,))
+
+    def _iter_shard_results(self, executor, total_records, num_users, task, *task_args):
+        """Yield task payloads in shard order until total_records events are covered
+
+        Shards are submitted ahead only while their expected events are still needed; the shard
+        that crosses total_records is re-run trimmed, so the result never depends on timing.
+        """
+        self.ids.check_capacity(num_users, self.generator.max_events_per_user())
+        plan = iter_shard_plan(num_users, self.shard_users)
+        max_in_flight = self.workers * SHARDS_IN_FLIGHT_PER_WORKER
+        pending = deque()
+        produced = 0
+        try:
+            while produced < total_records:
+                expected = produced + sum(shard[2] for shard, _ in pending) * self.events_per_user
+                while len(pending) < max_in_flight and (not pending or expected < total_records * 1.02):
+                    shard = next(plan, None)
+                    if shard is None:
+                        break
+                    pending.append((shard, executor.submit(task, self.seed, shard, self.tier_session_counts, self.ids,
+                                                           self.reference_time, None, *task_args)))
+                    expected += shard[2] * self.events_per_user
+                if not pending:
+                    break
+
+                shard, future = pending.popleft()
+                events, payload = future.result()
+                remaining = total_records - produced
+                if events > remaining:
+                    events, payload = executor.submit(task, self.seed, shard, self.tier_session_counts, self.ids,
+                                                      self.reference_time, remaining, *task_args).result()
+                produced += events
+                yield payload
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+    def user_block(self, user_index, num_users):
+        """Raw time-sorted cols of one user, regenerating only the shard that holds it"""
+        shard_index = user_index // self.shard_users
+        user_start = shard_index * self.shard_users
+        users, cols = self.engine.generate_block(block_rng(self.seed, shard_index), user_start,
+                                                 min(self.shard_users, num_users - user_start),
+                                                 self.tier_session_counts, self.ids, self.reference_time)
+        return self.engine.sort_by_time(self.engine.take(cols, cols['user_index'] == user_index))
+
+    def generate(self, total_records, num_users, compact=False):
+        """Return (users, cols, DataFrame) for the whole dataset, sorted by timestamp"""
+        engine = self.engine
+        with self._executor() as executor:
+            blocks = list(self._iter_shard_results(executor, total_records, num_users, _generate_shard))
+            users = engine.concat([users for users, cols in blocks])
+            cols = engine.concat([cols for users, cols in blocks])
+            if not cols:
+                return users, cols, empty_frame(self.generator.properties_format)
+            cols = engine.sort_by_time(cols)
+
+            # Materialize contiguous slices of the sorted columns in parallel
+            num_events = len(cols['timestamp'])
+            bounds = np.linspace(0, num_events, min(self.workers, num_events) + 1).astype(int)
+            slices = [{key: values[start:end] for key, values in cols.items()}
+                      for start, end in zip(bounds[:-1], bounds[1:])]
+            frames = list(executor.map(partial(_frame_slice, compact=compact), slices))
+        return users, cols, pd.concat(frames, ignore_index=True)
+
+    def write(self, path, total_records, num_users, output_format='csv', time_ordered=True, tmp_dir=None,
+              compression=None, row_group_size=None, merge_rows=DEFAULT_MERGE_ROWS):
+        """Write each shard as a sorted run in a worker, then merge (or copy) the runs into path
+
+        Shards are sorted in parallel by the workers; merge_rows bounds the rows the merge reads ahead.
+        Returns (rows written, DatasetSummary merged from the shards' summaries).
+        """
+        summary = DatasetSummary()
+        run_dir = tempfile.mkdtemp(prefix='plg_shards_', dir=tmp_dir)
+        try:
+            run_paths = []
+            with self._executor() as executor:
+                for run_path, shard_summary in self._iter_shard_results(executor, total_records, num_users,
+                                                                        _write_shard, run_dir, output_format):
+                    run_paths.append(run_path)
+                    summary.merge(shard_summary)
+            with open_chunk_writer(path, output_format, compression, row_group_size) as writer:
+                if time_ordered:
+                    merge_sorted_runs(run_paths, writer, output_format, merge_rows)
+                else:
+                    copy_runs(run_paths, writer, output_format)
+                rows = writer.rows_written
+        finally:
+            shutil.rmtree(run_dir, ignore_errors=True)
+        return rows, summary
@@ -0,0 +1,243 @@
+"""
+Per-Stage Profiling for PLG Telemetry
+Stage timers and counters for a generation run, plus opt-in cProfile and
+tracemalloc hooks, reported together as one structured dict (or JSON file)
+at the end of the run.
+
+Coarse stages (DataFrame construction, sorting, writing) are timed with
+`with profiler.stage(name)` blocks; a disabled profiler (NULL_PROFILER)
+hands out one shared no-op context, so they cost nothing measurable. Per-user
+stages of the scalar engine are timed by wrapping the generator's methods on
+the instance (instrument), and per-session / per-event stages only during a
+sample of users (instrument_sampled), with times scaled up accordingly. Both
+happen only when profiling is enabled; the hot loops themselves carry no
+checks. Stage times are inclusive, so nested stages (business_metrics inside
+events) overlap their parent.
+
+Used by PLGTelemetryGenerator.enable_profiling and main(--profile)
+"""
+
+import contextlib
+import cProfile
+import io
+import json
+import pstats
+import time
+import tracemalloc
+
+# Rows of the cProfile and tracemalloc tables in reports
+DEFAULT_TOP = 15
+
+
+class _StageTimer:
+    """Context manager adding its wall time to one stage"""
+
+    __slots__ = ('totals', 'start')
+
+    def __init__(self, totals):
+        self.totals = totals
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.totals[0] += time.perf_counter() - self.start
+        self.totals[1] += 1
+
+
+class NullProfiler:
+    """Profiler stand-in used while profiling is off: every hook is a no-op"""
+
+    enabled = False
+    _null_stage = contextlib.nullcontext()
+
+    def stage(self, name):
+        return self._null_stage
+
+    def count(self, name, n=1):
+        pass
+
+    def instrument(self, obj, methods):
+        pass
+
+    def instrument_sampled(self, obj, attribute, methods, sample_every):
+        pass
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class StageProfiler:
+    """Stage timers and counters for one run, with optional cProfile / tracemalloc"""
+
+    enabled = True
+
+    def __init__(self, profile_calls=False, trace_memory=False, top=DEFAULT_TOP):
+        self.profile_calls = profile_calls
+        self.trace_memory = trace_memory
+        self.top = top
+        self.stages = {}
+        self.scales = {}
+        self.counters = {}
+        self.calls_profile = None
+        self.memory = None
+        self.started = None
+        self.elapsed = 0.0
+
+    def _totals(self, name):
+        totals = self.stages.get(name)
+        if totals is None:
+            totals = self.stages[name] = [0.0, 0]
+        return totals
+
+    def stage(self, name):
+        """Context manager timing one occurrence of a stage"""
+        return _StageTimer(self._totals(name))
+
+    def count(self, name, n=1):
+        """Add n to a counter"""
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def timed(self, name, function):
+        """function wrapped to add its wall time and one call to a stage"""
+        totals = self._totals(name)
+        clock = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                totals[0] += clock() - start
+                totals[1] += 1
+        return wrapper
+
+    def instrument(self, obj, methods):
+        """Replace obj's methods (attribute name -> stage name) with timed wrappers on the instance"""
+        for attribute, name in methods.items():
+            setattr(obj, attribute, self.timed(name, getattr(obj, attribute)))
+
+    def instrument_sampled(self, obj, attribute, methods, sample_every):
+        """Time obj's inner methods (attribute name -> stage name) only during every sample_every-th call of attribute
+
+        The timed wrappers are installed on the instance for the sampled call and removed again,
+        so other calls run the plain methods; the stages' times and calls are scaled by sample_every.
+        """
+        wrappers = {}
+        for inner, name in methods.items():
+            wrappers[inner] = self.timed(name, getattr(obj, inner))
+            self.scales[name] = sample_every
+        outer = getattr(obj, attribute)
+        calls = [0]
+
+        def sampled(*args, **kwargs):
+            calls[0] += 1
+            if calls[0] % sample_every:
+                return outer(*args, **kwargs)
+            obj.__dict__.update(wrappers)
+            try:
+                return outer(*args, **kwargs)
+            finally:
+                for inner in wrappers:
+                    del obj.__dict__[inner]
+        setattr(obj, attribute, sampled)
+
+    # ------------------------------------------------------------------
+    # Run hooks
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start the run clock and the optional cProfile / tracemalloc hooks"""
+        if self.started is not None:
+            return
+        if self.trace_memory:
+            tracemalloc.start()
+        if self.profile_calls:
+            self.calls_profile = cProfile.Profile()
+            self.calls_profile.enable()
+        self.started = time.perf_counter()
+
+    def stop(self):
+        """Stop the clock and hooks, keeping what they measured"""
+        if self.started is None:
+            return
+        self.elapsed += time.perf_counter() - self.started
+        self.started = None
+        if self.calls_profile is not None:
+            self.calls_profile.disable()
+        if self.trace_memory and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.memory = {
+                'current_mb': round(current / 1e6, 2),
+                'peak_mb': round(peak / 1e6, 2),
+                'top_allocations': [{'location': str(stat.traceback), 'size_mb': round(stat.size / 1e6, 3),
+                                     'blocks': stat.count}
+                                    for stat in snapshot.statistics('lineno')[:self.top]]
+            }
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def _top_functions(self):
+        """Top functions of the cProfile run by cumulative time"""
+        stats = pstats.Stats(self.calls_profile, stream=io.StringIO())
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:self.top]
+        return [{'function': f'{filename}:{line}({name})', 'calls': calls, 'tottime': round(tottime, 4),
+                 'cumtime': round(cumtime, 4)}
+                for (filename, line, name), (primitive, calls, tottime, cumtime, callers) in rows]
+
+    def report(self):
+        """Structured report of the run; stops the run first if it is still going"""
+        self.stop()
+        total = self.elapsed
+        stages = []
+        for name, (seconds, calls) in self.stages.items():
+            if not calls:
+                continue
+            scale = self.scales.get(name, 1)
+            stage = {'stage': name, 'seconds': round(seconds * scale, 4), 'calls': calls * scale,
+                     'share': round(seconds * scale / total, 4) if total else None}
+            if scale > 1:
+                stage['sampled_every'] = scale
+            stages.append(stage)
+        report = {'total_seconds': round(total, 4), 'stages': stages, 'counters': dict(self.counters)}
+        if self.calls_profile is not None:
+            report['top_functions'] = self._top_functions()
+        if self.memory is not None:
+            report['memory'] = self.memory
+        return report
+
+    def print_report(self, report=None):
+        """Print the stage table, counters and any cProfile / tracemalloc results"""
+        report = report or self.report()
+        print(f"\n⏱️  Stage Profile ({report['total_seconds']:.3f}s total, nested stages are inclusive):")
+        for stage in report['stages']:
+            share = f"{stage['share']:.1%}" if stage['share'] is not None else 'n/a'
+            estimate = f" (estimated from 1 in {stage['sampled_every']})" if 'sampled_every' in stage else ''
+            print(f"  {stage['stage']:<20} {stage['seconds']:>10.3f}s {share:>7} {stage['calls']:>10} calls{estimate}")
+        for name, value in report['counters'].items():
+            print(f"  {name}: {value}")
+        if 'top_functions' in report:
+            print("\n🔬 Top functions by cumulative time:")
+            for row in report['top_functions']:
+                print(f"  {row['cumtime']:>9.3f}s {row['calls']:>10}  {row['function']}")
+        if 'memory' in report:
+            print(f"\n🧠 Traced memory: peak {report['memory']['peak_mb']} MB")
+            for row in report['memory']['top_allocations']:
+                print(f"  {row['size_mb']:>9.3f} MB  {row['location']}")
+        return report
+
+    def save(self, path, report=None):
+        """Write the report as JSON"""
+        with open(path, 'w') as f:
+            json.dump(report or self.report(), f, indent=2)
@@ -0,0 +1,277 @@
+"""
+Compact Event Records for PLG Telemetry
+Columnar buffer for the scalar engine's events instead of one ~70-key dict
+per event. create_telemetry_event returns a plain tuple of the event's own
+fields (record_columns order) plus a dict of the tier-specific context fields
+it set; EventRecords stages those rows and every RECORD_BLOCK_ROWS rows seals
+them into one NumPy array per column, typed by the column's declared kind
+(plg_schema) rather than by inspecting its values: integers in the narrowest
+dtype that holds the block, labels as small codes into the block's distinct
+values, high-cardinality IDs as fixed-width ASCII bytes. Fields copied from
+the user profile (PROFILE_COLUMNS) are stored once per user, and each sparse
+context column only as (row, value) pairs for the events that have it.
+
+to_frame concatenates each column once into the declared output schema:
+every event and context column in output order and in its frame dtype,
+NaN where an event lacks a sparse column, the same for every sample.
+
+Used by PLGTelemetryGenerator (scalar engine)
+"""
+
+import numpy as np
+import pandas as pd
+
+from plg_schema import CONTEXT_COLUMNS, EVENT_FIELDS
+
+# Events staged as tuples before they are sealed into column arrays
+RECORD_BLOCK_ROWS = 4096
+
+# Event columns copied from the user profile (event column -> profile key), stored once per user
+PROFILE_COLUMNS = {
+    'user_id': 'user_id', 'contact_external_id': 'external_id', 'user_email': 'email',
+    'user_first_name': 'first_name', 'user_last_name': 'last_name', 'user_title': 'title',
+    'user_department': 'department', 'subscription_tier': 'tier', 'user_segment': 'segment',
+    'plg_scenario': 'plg_scenario'
+}
+
+# A string column is sealed as fixed-width bytes rather than label codes when more than this
+# share of a block's values are distinct (event and session IDs)
+TEXT_DISTINCT_SHARE = 0.5
+
+INT_DTYPES = [np.int8, np.int16, np.int32, np.int64]
+
+
+def record_columns(columns):
+    """Columns of a create_telemetry_event record: the event columns not copied from the profile"""
+    return [column for column in columns if column not in PROFILE_COLUMNS]
+
+
+def _object_array(values):
+    """1-d object array of a sequence's items (lists stay elements)"""
+    return np.fromiter(values, dtype=object, count=len(values))
+
+
+def _narrow_ints(values):
+    """Integer array in the narrowest dtype that holds its range"""
+    if not len(values):
+        return values
+    low, high = values.min(), values.max()
+    for dtype in INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return values.astype(dtype, copy=False)
+
+
+def _seal_column(values, field):
+    """(kind, data, labels) holding one column of staged values of a declared EventField
+
+    kind is the field's kind for numbers, booleans and timestamps, 'label' (data are codes into
+    labels) or 'text' (fixed-width ASCII bytes) for strings, and 'object' for lists and nullable fields.
+    """
+    kind = field.kind
+    if field.nullable or kind == 'list':
+        return 'object', _object_array(values), None
+    if kind == 'bool':
+        return 'bool', np.array(values, dtype=bool), None
+    if kind in ('int', 'timestamp'):
+        return kind, _narrow_ints(np.array(values, dtype=np.int64)), None
+    if kind == 'float':
+        return 'float', np.array(values, dtype=np.float64), None
+    codes, labels = pd.factorize(_object_array(values))
+    if len(labels) > len(values) * TEXT_DISTINCT_SHARE:
+        try:
+            return 'text', np.array(values, dtype=np.bytes_), None
+        except UnicodeEncodeError:
+            pass
+    return 'label', codes.astype(np.min_scalar_type(len(labels))), labels
+
+
+def _column_objects(kind, data, labels):
+    """Object array of a sealed column's values"""
+    if kind == 'label':
+        return labels[data]
+    if kind == 'text':
+        return data.astype(np.str_).astype(object)
+    return data.astype(object)
+
+
+def _concat_column(parts, field):
+    """One array of a column's sealed parts in the field's frame dtype"""
+    dtype = np.dtype(field.frame_dtype)
+    if dtype == object:
+        return np.concatenate([_column_objects(*part) for part in parts] or [field.missing(0)])
+    arrays = [data for kind, data, labels in parts]
+    if field.kind == 'timestamp':
+        return np.concatenate(arrays or [np.empty(0, dtype=np.int64)], dtype=np.int64).view(dtype)
+    return np.concatenate(arrays or [np.empty(0, dtype=dtype)], dtype=dtype)
+
+
+def _sparse_column(rows, values, size, field):
+    """size values of a sparse field with values at rows and NaN elsewhere"""
+    column = field.missing(size)
+    column[rows] = values
+    return column
+
+
+class _Block:
+    """Sealed rows: one (kind, data, labels) per column, plus user rows and context for events"""
+
+    def __init__(self, size, columns, user_rows=None, context=None):
+        self.size = size
+        self.columns = columns
+        self.user_rows = user_rows
+        self.context = context or {}    # context column -> (block rows, object values)
+
+    def slice(self, start, stop):
+        """Copy of rows start..stop-1"""
+        columns = [(kind, data[start:stop].copy(), labels) for kind, data, labels in self.columns]
+        user_rows = None if self.user_rows is None else self.user_rows[start:stop].copy()
+        context = {}
+        for column, (rows, values) in self.context.items():
+            keep = (rows >= start) & (rows < stop)
+            if keep.any():
+                context[column] = (rows[keep] - start, values[keep])
+        return _Block(stop - start, columns, user_rows, context)
+
+
+def _slice_blocks(blocks, start, stop):
+    """Blocks covering rows start..stop-1 of a block list"""
+    sliced = []
+    offset = 0
+    for block in blocks:
+        low, high = max(start - offset, 0), min(stop - offset, block.size)
+        if low < high:
+            sliced.append(block if (low, high) == (0, block.size) else block.slice(low, high))
+        offset += block.size
+    return sliced
+
+
+class EventRecords:
+    """Columnar buffer of scalar-engine events with the given event columns"""
+
+    def __init__(self, columns, block_rows=RECORD_BLOCK_ROWS):
+        self.columns = list(columns)
+        self.record_columns = record_columns(self.columns)
+        self.profile_columns = [column for column in self.columns if column in PROFILE_COLUMNS]
+        self.profile_keys = [PROFILE_COLUMNS[column] for column in self.profile_columns]
+        self.record_fields = [EVENT_FIELDS[column] for column in self.record_columns]
+        self.profile_fields = [EVENT_FIELDS[column] for column in self.profile_columns]
+        self.block_rows = block_rows
+        self.blocks = []
+        self.user_blocks = []
+        self.sealed_events = 0
+        self.sealed_users = 0
+        self._rows = []
+        self._user_rows = []
+        self._contexts = []       # (staged row, context dict) for events with context fields
+        self._users = []
+        self._profile = None
+
+    def __len__(self):
+        return self.sealed_events + len(self._rows)
+
+    def append(self, profile, record, context=None):
+        """Add one event: its user profile, its create_telemetry_event record and context fields"""
+        if profile is not self._profile:
+            self._profile = profile
+            self._users.append(tuple([profile[key] for key in self.profile_keys]))
+        self._user_rows.append(self.sealed_users + len(self._users) - 1)
+        if context:
+            self._contexts.append((len(self._rows), context))
+        self._rows.append(record)
+        if len(self._rows) >= self.block_rows:
+            self.seal()
+
+    def seal(self):
+        """Convert the staged events and users into blocks of column arrays"""
+        if self._users:
+            self.user_blocks.append(_Block(len(self._users), [_seal_column(values, field) for values, field
+                                                              in zip(zip(*self._users), self.profile_fields)]))
+            self.sealed_users += len(self._users)
+            self._users = []
+        if not self._rows:
+            return
+        gathered = {}
+        for row, fields in self._contexts:
+            for column, value in fields.items():
+                rows, values = gathered.setdefault(column, ([], []))
+                rows.append(row)
+                values.append(value)
+        context = {column: (np.array(rows, dtype=np.int32), _object_array(values))
+                   for column, (rows, values) in gathered.items()}
+        user_rows = _narrow_ints(np.array(self._user_rows, dtype=np.int64))
+        columns = [_seal_column(values, field) for values, field in zip(zip(*self._rows), self.record_fields)]
+        self.blocks.append(_Block(len(self._rows), columns, user_rows, context))
+        self.sealed_events += len(self._rows)
+        self._rows, self._user_rows, self._contexts = [], [], []
+
+    def split(self, count):
+        """Remove the first count events and return them as a new EventRecords"""
+        self.seal()
+        head = self._part(0, min(count, len(self)))
+        tail = self._part(head.sealed_events, len(self))
+        self.blocks, self.user_blocks = tail.blocks, tail.user_blocks
+        self.sealed_events, self.sealed_users = tail.sealed_events, tail.sealed_users
+        if not self.sealed_events:
+            self._profile = None
+        return head
+
+    def _part(self, start, stop):
+        """EventRecords of the sealed events start..stop-1 and only their users"""
+        part = EventRecords(self.columns, self.block_rows)
+        part.blocks = _slice_blocks(self.blocks, start, stop)
+        part.sealed_events = stop - start
+        if part.blocks:
+            first_user = int(part.blocks[0].user_rows[0])
+            end_user = int(part.blocks[-1].user_rows[-1]) + 1
+            part.user_blocks = _slice_blocks(self.user_blocks, first_user, end_user)
+            part.sealed_users = end_user - first_user
+            if first_user:
+                part.blocks = [_Block(block.size, block.columns,
+                                      _narrow_ints(block.user_rows.astype(np.int64) - first_user), block.context)
+                               for block in part.blocks]
+            if stop == len(self):
+                # Appending more events for the last user continues its row
+                part._profile = self._profile
+        return part
+
+    def to_frame(self, columns=None):
+        """DataFrame of the events in the declared output schema
+
+        Columns default to the event columns followed by every context column (plg_schema
+        output_columns); context columns no event has are all NaN.
+        """
+        self.seal()
+        size = len(self)
+        columns = self.columns + CONTEXT_COLUMNS if columns is None else columns
+        user_rows = np.concatenate([block.user_rows for block in self.blocks] or [np.empty(0, dtype=np.intp)],
+                                   dtype=np.intp)
+        context = self._context_rows()
+        data = {}
+        for column in columns:
+            field = EVENT_FIELDS[column]
+            if column in PROFILE_COLUMNS:
+                index = self.profile_columns.index(column)
+                values = _concat_column([block.columns[index] for block in self.user_blocks], field)[user_rows]
+            elif column in self.record_columns:
+                index = self.record_columns.index(column)
+                values = _concat_column([block.columns[index] for block in self.blocks], field)
+            elif column in context:
+                values = _sparse_column(*context[column], size, field)
+            else:
+                values = field.missing(size)
+            # Object columns are passed through as-is rather than re-inferred element by element
+            data[column] = pd.Series(values, dtype=object, copy=False) if values.dtype == object else values
+        return pd.DataFrame(data, copy=False)
+
+    def _context_rows(self):
+        """(event rows, values) of every sparse context column some event has"""
+        gathered = {}
+        offset = 0
+        for block in self.blocks:
+            for column, (rows, values) in block.context.items():
+                parts = gathered.setdefault(column, ([], []))
+                parts[0].append(rows + offset)
+                parts[1].append(values)
+            offset += block.size
+        return {column: (np.concatenate(rows), np.concatenate(values)) for column, (rows, values) in gathered.items()}
@@ -0,0 +1,255 @@
+"""
+Rate-Controlled Event Replay for PLG Telemetry
+Streams generated events as JSON lines, in timestamp order, to stdout, a file,
+a local TCP or Unix socket or a local HTTP endpoint, for load-testing an
+ingestion pipeline. Events go out as fast as the sink accepts them, at a fixed
+events/sec rate, or on the generated timeline replayed in real time or
+accelerated by a speedup factor.
+
+The dataset's raw batch-engine columns are generated and sorted up front
+(about 300 bytes per event); a producer task formats and encodes them a batch
+at a time (no DataFrame is built) onto a bounded queue, and a consumer task sends each batch's
+events as they fall due. Every send awaits the sink (socket drain, HTTP
+response), so a slow receiver stalls the consumer, the full queue stalls the
+producer, and memory stays bounded by the queue rather than growing.
+
+Targets:
+    -                      stdout
+    PATH                   a file (truncated first)
+    tcp://HOST:PORT        newline-delimited JSON over a TCP connection
+    unix:///PATH           the same over a Unix domain socket
+    http://HOST:PORT/PATH  one POST per send, application/x-ndjson, on a keep-alive connection
+
+Used by PLGTelemetryGenerator.replay and main(--replay)
+"""
+
+import asyncio
+import sys
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from plg_batch import BatchTelemetryEngine
+from plg_writers import encode_json_lines
+
+# Events encoded per producer batch
+DEFAULT_REPLAY_BATCH = 5000
+
+# Encoded batches the producer may run ahead of the consumer
+DEFAULT_QUEUE_BATCHES = 4
+
+# Shortest wait between paced sends (seconds); events falling due meanwhile go out together
+MIN_SEND_INTERVAL = 0.005
+
+# Seconds to wait for an HTTP endpoint's response to one POST
+HTTP_TIMEOUT = 30
+
+
+class FileSink:
+    """Writes to a binary file object (stdout's buffer or an opened file)"""
+
+    def __init__(self, stream, close_stream=False):
+        self.stream = stream
+        self.close_stream = close_stream
+
+    async def send(self, data):
+        self.stream.write(data)
+
+    async def close(self):
+        self.stream.flush()
+        if self.close_stream:
+            self.stream.close()
+
+
+class StreamSink:
+    """Writes to an asyncio TCP or Unix socket connection, waiting for the socket buffer to drain"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def send(self, data):
+        self.writer.write(data)
+        await self.writer.drain()
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+class HttpSink:
+    """POSTs each send as one application/x-ndjson request over a keep-alive HTTP/1.1 connection"""
+
+    def __init__(self, host, port, path):
+        self.host = host
+        self.port = port
+        self.path = path
+        self.reader = None
+        self.writer = None
+
+    async def _connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def _read_response(self):
+        """Status code of one response, with its body read off the connection"""
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError(f"http://{self.host}:{self.port}{self.path} closed the connection")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                await self.reader.readexactly(size + 2)
+                if not size:
+                    break
+        else:
+            await self.reader.readexactly(int(headers.get('content-length', 0)))
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status
+
+    async def send(self, data):
+        if self.writer is None:
+            await self._connect()
+        self.writer.write(f'POST {self.path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n'
+                          f'Content-Type: application/x-ndjson\r\nContent-Length: {len(data)}\r\n\r\n'.encode('ascii'))
+        self.writer.write(data)
+        await self.writer.drain()
+        status = await asyncio.wait_for(self._read_response(), HTTP_TIMEOUT)
+        if status >= 300:
+            raise ConnectionError(f"http://{self.host}:{self.port}{self.path} answered HTTP {status}")
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            await self.writer.wait_closed()
+            self.reader = self.writer = None
+
+
+def encode_lines(lines):
+    """UTF-8 bytes of JSON lines, newline-terminated"""
+    return ('\n'.join(lines) + '\n').encode()
+
+
+async def open_sink(target):
+    """Sink for a replay target ('-', a file path, tcp://, unix:// or http:// URL)"""
+    if target == '-':
+        # The process's stdout, even while messages are redirected to stderr around the replay
+        return FileSink(sys.__stdout__.buffer)
+    if '://' not in target:
+        return FileSink(open(target, 'wb'), close_stream=True)
+    url = urlsplit(target)
+    if url.scheme == 'tcp':
+        if not url.hostname or not url.port:
+            raise ValueError(f"tcp target needs a host and port: {target}")
+        return StreamSink(*await asyncio.open_connection(url.hostname, url.port))
+    if url.scheme == 'unix':
+        return StreamSink(*await asyncio.open_unix_connection(url.path))
+    if url.scheme == 'http':
+        return HttpSink(url.hostname or 'localhost', url.port or 80, url.path or '/')
+    raise ValueError(f"Unknown replay target '{target}' (expected -, a file path, tcp://, unix:// or http://)")
+
+
+class EventReplay:
+    """Paced, back-pressured JSON-lines stream of one generated dataset's time-sorted events
+
+    rate sends a fixed number of events per second; speedup replays the event timeline at that
+    multiple of real time (1 is real time); with neither, events go out as fast as the sink takes
+    them. Late sends never skip events: a consumer behind schedule catches up at full speed.
+    """
+
+    def __init__(self, generator, rate=None, speedup=None, batch_size=DEFAULT_REPLAY_BATCH,
+                 queue_batches=DEFAULT_QUEUE_BATCHES):
+        if rate is not None and speedup is not None:
+            raise ValueError("rate and speedup are mutually exclusive")
+        if (rate is not None and rate <= 0) or (speedup is not None and speedup <= 0):
+            raise ValueError("rate and speedup must be positive")
+        self.generator = generator
+        self.engine = BatchTelemetryEngine(generator)
+        self.rate = rate
+        self.speedup = speedup
+        self.batch_size = batch_size
+        self.queue_batches = queue_batches
+        self.cols = None
+
+    def load(self, total_records, num_users, seed, reference_time=None, summary=None):
+        """Generate the seeded dataset's raw columns and sort them by time; returns the event count"""
+        blocks = list(self.engine.iter_blocks(total_records, num_users, seed, reference_time))
+        if summary is not None:
+            for users, cols in blocks:
+                summary.add_block(self.engine, users, cols)
+        self.cols = self.engine.sort_by_time(self.engine.concat([cols for users, cols in blocks]))
+        return len(self.cols.get('timestamp', ()))
+
+    def schedule(self, timestamps, first_index, origin):
+        """Loop times (seconds) at which events are due, or None to send as fast as possible"""
+        if self.rate:
+            return origin + (first_index + np.arange(len(timestamps))) / self.rate
+        if self.speedup:
+            return origin + (timestamps - self.cols['timestamp'][0]) / (1e6 * self.speedup)
+        return None
+
+    async def produce(self, queue):
+        """Encode batches of the sorted events onto the queue, then a closing None"""
+        cols = self.cols
+        for start in range(0, len(cols['timestamp']), self.batch_size):
+            batch = {key: values[start:start + self.batch_size] for key, values in cols.items()}
+            lines = encode_json_lines(self.engine.frame_columns(batch))
+            await queue.put((start, batch['timestamp'], lines))
+        await queue.put(None)
+
+    async def consume(self, queue, sink, stats):
+        """Send queued batches as their events fall due"""
+        loop = asyncio.get_running_loop()
+        origin = None
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            start, timestamps, lines = item
+            if origin is None:
+                origin = stats['origin'] = loop.time()
+            due = self.schedule(timestamps, start, origin)
+            if due is None:
+                await sink.send(encode_lines(lines))
+                stats['events'] += len(lines)
+                continue
+            sent = 0
+            while sent < len(lines):
+                now = loop.time()
+                ready = int(np.searchsorted(due, now, side='right'))
+                if ready <= sent:
+                    await asyncio.sleep(max(due[sent] - now, MIN_SEND_INTERVAL))
+                    continue
+                stats['max_lag'] = max(stats['max_lag'], now - due[sent])
+                await sink.send(encode_lines(lines[sent:ready]))
+                stats['events'] += ready - sent
+                sent = ready
+
+    async def run(self, target):
+        """Stream every loaded event to target; returns events sent, seconds, events/sec and max lag
+
+        Seconds run from the first batch being ready to the last send, so events/sec is the sustained rate.
+        """
+        loop = asyncio.get_running_loop()
+        sink = await open_sink(target)
+        queue = asyncio.Queue(maxsize=self.queue_batches)
+        stats = {'events': 0, 'max_lag': 0.0, 'origin': loop.time()}
+        producer = asyncio.create_task(self.produce(queue))
+        try:
+            await self.consume(queue, sink, stats)
+            await producer
+        finally:
+            producer.cancel()
+            await sink.close()
+        seconds = loop.time() - stats.pop('origin')
+        stats.update({'seconds': round(seconds, 3), 'max_lag': round(stats['max_lag'], 3),
+                      'events_per_sec': round(stats['events'] / seconds, 1) if seconds else None})
+        return stats
@@ -0,0 +1,95 @@
+"""
+Categorical Samplers for PLG Telemetry
+Weight tables (tiers, segments per tier, engagement depth, payment status)
+compiled once into cumulative tables, with single draws for the per-event
+path and vectorized draws for the batch engine.
+
+A single draw consumes one uniform from the global NumPy state and maps it
+exactly as np.random.choice(labels, p=weights) does, so swapping a choice
+call for a sampler leaves seeded output unchanged.
+"""
+
+from bisect import bisect_right
+
+import numpy as np
+
+
+def cumulative_table(weights):
+    """Normalized cumulative weights, computed the way np.random.choice computes them"""
+    cdf = np.cumsum(np.asarray(weights, dtype=float))
+    cdf /= cdf[-1]
+    return cdf
+
+
+class CategoricalSampler:
+    """Draws labels from one fixed {label: weight} table"""
+
+    def __init__(self, weights):
+        self.labels = list(weights.keys())
+        self.weights = np.asarray(list(weights.values()), dtype=float)
+        self.cdf = cumulative_table(self.weights)
+        self.cdf_list = self.cdf.tolist()
+
+    def draw_index(self, random_state=None):
+        """Index of one label; random_state is a NumPy Generator/RandomState (default: global state)"""
+        u = (random_state or np.random).random()
+        return bisect_right(self.cdf_list, u)
+
+    def draw(self, random_state=None):
+        """One label"""
+        return self.labels[self.draw_index(random_state)]
+
+    def draw_codes(self, size, rng):
+        """size label indexes drawn with a NumPy Generator"""
+        return np.searchsorted(self.cdf, rng.random(size), side='right')
+
+    def draw_many(self, size, rng):
+        """size labels drawn with a NumPy Generator"""
+        return np.asarray(self.labels, dtype=object)[self.draw_codes(size, rng)]
+
+    def aligned_cdf(self, labels):
+        """Cumulative table over another label order (labels missing from this table get weight 0)"""
+        aligned = np.zeros(len(labels))
+        for label, weight in zip(self.labels, self.weights):
+            aligned[labels.index(label)] = weight
+        return cumulative_table(aligned)
+
+
+class ConditionalSampler:
+    """One CategoricalSampler per condition key (e.g. tier), plus vectorized draws over mixed keys
+
+    Single draws use each table's own label order; vectorized draws return codes into the
+    shared labels list, with keys given as positions in self.keys.
+    """
+
+    def __init__(self, tables, labels=None, default=None):
+        self.keys = list(tables.keys())
+        self.key_index = {key: i for i, key in enumerate(self.keys)}
+        self.samplers = {key: CategoricalSampler(weights) for key, weights in tables.items()}
+        self.default = CategoricalSampler(default) if default else None
+        if labels is None:
+            labels = []
+            for sampler in self.samplers.values():
+                labels.extend(label for label in sampler.labels if label not in labels)
+        self.labels = list(labels)
+        self.cdf_rows = np.array([self.samplers[key].aligned_cdf(self.labels) for key in self.keys])
+
+    def sampler_for(self, key):
+        """Sampler for a key; unknown keys use the default table"""
+        sampler = self.samplers.get(key, self.default)
+        if sampler is None:
+            raise KeyError(f"No weight table for {key!r}")
+        return sampler
+
+    def draw(self, key, random_state=None):
+        """One label for a condition key"""
+        return self.sampler_for(key).draw(random_state)
+
+    def draw_codes(self, key_codes, rng):
+        """One label index (into self.labels) per entry of key_codes, drawn with a NumPy Generator"""
+        u = rng.random(len(key_codes))
+        return (self.cdf_rows[key_codes] <= u[:, None]).sum(axis=1)
+
+    def probabilities(self):
+        """[key, label] probability matrix in shared label order"""
+        return np.diff(self.cdf_rows, axis=1, prepend=0.0)
@@ -0,0 +1,241 @@
+"""
+Declared Event Schema for PLG Telemetry
+Every output column with its value kind, nullability and, for the sparse
+tier-specific columns, the tiers and event types that populate it, so the
+column set, order and dtypes of generated frames never depend on which
+events a sample happens to contain.
+
+Both engines build frames in output_columns order with the FRAME_DTYPES of
+each column's kind (strings as object arrays, NaN where a sparse column has
+no value), and the writers take their CSV header, JSON key order and
+Parquet / Arrow schema from here instead of from the first chunk. Sparse
+columns are only stored for the events that have them (see plg_records).
+
+Used by plg_batch, plg_records, plg_writers, plg_parallel and PLGTelemetryGenerator
+"""
+
+import numpy as np
+import pandas as pd
+
+# Event columns in the order create_telemetry_event builds them
+EVENT_COLUMNS = [
+    'event_id', 'user_id', 'session_id', 'event_type', 'timestamp', 'session_start_time', 'session_duration_minutes',
+    'product_name', 'feature_name', 'page_url', 'device_type', 'browser_name', 'operating_system', 'response_time_ms',
+    'geography_country', 'geography_region', 'geography_city', 'ip_address',
+    'contact_external_id', 'user_email', 'user_first_name', 'user_last_name', 'user_title', 'user_department', 'subscription_tier',
+    'user_segment', 'plg_scenario', 'session_type', 'engagement_depth', 'feature_sophistication',
+    'business_hours_indicator', 'mobile_usage_indicator', 'weekend_usage_indicator',
+    'premium_feature_exposure', 'usage_limit_proximity', 'value_realization_event', 'viral_behavior', 'expansion_signal', 'conversion_signal',
+    'friction_encountered', 'help_seeking_behavior', 'churn_risk_indicator', 'feature_adoption_success',
+    'current_plan_tier', 'mrr_contribution', 'arr_contribution', 'customer_lifetime_value', 'payment_status',
+    'account_health_score', 'engagement_score', 'seat_utilization', 'storage_utilization', 'integration_count', 'support_ticket_count',
+    'churn_risk_score', 'conversion_propensity', 'upsell_propensity', 'retention_probability',
+    'next_best_action', 'intervention_priority',
+    'is_demo_data', 'source_system', 'custom_properties'
+]
+
+# Keys of the custom_properties JSON; properties_format='columns' emits them as property_<key> columns instead
+CUSTOM_PROPERTY_KEYS = ['session_pattern', 'plg_scenario', 'tier_transition_candidate', 'cohort', 'experiment_variant']
+PROPERTY_COLUMNS = [f'property_{key}' for key in CUSTOM_PROPERTY_KEYS]
+PROPERTIES_FORMATS = ['json', 'columns']
+
+# datetime64[us] columns in generated frames; writers format them as ISO 'Z' strings
+TIMESTAMP_COLUMNS = ['timestamp', 'session_start_time']
+
+# Non-string event columns by value kind (every other event and property column is a string)
+INT_COLUMNS = [
+    'response_time_ms', 'mrr_contribution', 'arr_contribution', 'customer_lifetime_value', 'account_health_score',
+    'engagement_score', 'integration_count', 'support_ticket_count', 'churn_risk_score', 'conversion_propensity',
+    'upsell_propensity', 'retention_probability'
+]
+FLOAT_COLUMNS = ['session_duration_minutes', 'seat_utilization', 'storage_utilization']
+BOOL_COLUMNS = [
+    'business_hours_indicator', 'mobile_usage_indicator', 'weekend_usage_indicator', 'premium_feature_exposure',
+    'value_realization_event', 'viral_behavior', 'expansion_signal', 'conversion_signal', 'friction_encountered',
+    'help_seeking_behavior', 'churn_risk_indicator', 'feature_adoption_success', 'is_demo_data'
+]
+
+# Low-cardinality string columns written dictionary-encoded in Parquet and Arrow IPC
+DICTIONARY_COLUMNS = [
+    'event_type', 'product_name', 'feature_name', 'page_url', 'device_type', 'browser_name', 'operating_system',
+    'geography_country', 'geography_region', 'geography_city', 'user_title', 'user_department', 'subscription_tier',
+    'user_segment', 'plg_scenario', 'session_type', 'engagement_depth', 'feature_sophistication',
+    'usage_limit_proximity', 'current_plan_tier', 'payment_status', 'next_best_action', 'intervention_priority',
+    'source_system', 'limit_type', 'trial_feature', 'automation_type', 'complexity_level', 'integration_type',
+    'cancellation_reason', 'export_type', 'error_code', 'error_message'
+] + PROPERTY_COLUMNS
+
+# (column, tier, event_type, kind, spec) - kind is 'choice', 'int' or 'const'
+TIER_CONTEXT_FIELDS = [
+    ('limit_type', 'Free', 'usage_limit_hit', 'choice', ['reports', 'data_export', 'api_calls', 'storage']),
+    ('usage_percentage', 'Free', 'usage_limit_hit', 'int', (95, 120)),
+    ('free_tier_limit', 'Free', 'usage_limit_hit', 'const', True),
+    ('upgrade_prompt_shown', 'Free', 'usage_limit_hit', 'const', True),
+    ('plans_viewed', 'Free', 'pricing_page_view', 'choice', [['Basic'], ['Premium'], ['Basic', 'Premium']]),
+    ('time_on_page_seconds', 'Free', 'pricing_page_view', 'int', (30, 300)),
+    ('conversion_intent_score', 'Free', 'pricing_page_view', 'int', (60, 95)),
+    ('trial_feature', 'Basic', 'enterprise_trial', 'choice', ['advanced_analytics', 'api_access', 'team_management', 'custom_branding']),
+    ('trial_days_remaining', 'Basic', 'enterprise_trial', 'int', (1, 14)),
+    ('premium_upgrade_eligible', 'Basic', 'enterprise_trial', 'const', True),
+    ('current_team_size', 'Basic', 'team_management_view', 'int', (3, 15)),
+    ('team_limit_approached', 'Basic', 'team_management_view', 'choice', [True, False]),
+    ('premium_team_features_explored', 'Basic', 'team_management_view', 'const', True),
+    ('automation_type', 'Premium', 'automation_setup', 'choice', ['data_sync', 'report_scheduling', 'alert_system', 'workflow_trigger']),
+    ('complexity_level', 'Premium', 'automation_setup', 'const', 'advanced'),
+    ('premium_feature_utilized', 'Premium', 'automation_setup', 'const', True),
+    ('api_calls_this_month', 'Premium', 'api_integration', 'int', (1000, 5000)),
+    ('integration_type', 'Premium', 'api_integration', 'choice', ['crm', 'marketing_automation', 'data_warehouse', 'bi_tool']),
+    ('enterprise_grade', 'Premium', 'api_integration', 'const', True),
+    ('days_since_cancellation', 'Cancelled', 'account_reactivation_view', 'int', (1, 90)),
+    ('cancellation_reason', 'Cancelled', 'account_reactivation_view', 'choice', ['cost', 'feature_gap', 'competitor', 'internal_change']),
+    ('winback_offer_eligible', 'Cancelled', 'account_reactivation_view', 'const', True),
+    ('export_type', 'Cancelled', 'data_export_final', 'const', 'account_closure'),
+    ('data_retention_days', 'Cancelled', 'data_export_final', 'int', (7, 30)),
+    ('reactivation_window', 'Cancelled', 'data_export_final', 'const', True)
+]
+
+# Events carrying a conversion value / an export file size, for every tier
+VALUE_EVENTS = ['insight_discovery', 'workflow_success', 'report_generate']
+FILE_EVENTS = ['data_export', 'data_export_final']
+
+# Labels of the error_event context columns
+ERROR_CODES = ['ERR_404', 'ERR_500', 'ERR_TIMEOUT', 'ERR_AUTH', 'ERR_LIMIT']
+ERROR_MESSAGES = [
+    'Resource not found', 'Internal server error', 'Request timeout',
+    'Authentication failed', 'Usage limit exceeded'
+]
+
+# (column, kind, event types) - sparse columns populated by event type for every tier
+EVENT_CONTEXT_FIELDS = [
+    ('conversion_value', 'float', VALUE_EVENTS),
+    ('error_code', 'string', ['error_event']),
+    ('error_message', 'string', ['error_event']),
+    ('tier_related_error', 'bool', ['error_event']),
+    ('file_size_bytes', 'float', FILE_EVENTS)
+]
+
+# Tier-specific context columns, only populated for matching (tier, event_type)
+CONTEXT_COLUMNS = [
+    'limit_type', 'usage_percentage', 'free_tier_limit', 'upgrade_prompt_shown',
+    'plans_viewed', 'time_on_page_seconds', 'conversion_intent_score',
+    'trial_feature', 'trial_days_remaining', 'premium_upgrade_eligible',
+    'current_team_size', 'team_limit_approached', 'premium_team_features_explored',
+    'automation_type', 'complexity_level', 'premium_feature_utilized',
+    'api_calls_this_month', 'integration_type', 'enterprise_grade',
+    'days_since_cancellation', 'cancellation_reason', 'winback_offer_eligible',
+    'export_type', 'data_retention_days', 'reactivation_window',
+    'conversion_value', 'error_code', 'error_message', 'tier_related_error', 'file_size_bytes'
+]
+
+# DataFrame dtype of each value kind; sparse ints are NaN-padded and so declared 'float'
+FRAME_DTYPES = {'string': object, 'timestamp': 'datetime64[us]', 'int': np.int64, 'float': np.float64,
+                'bool': bool, 'list': object}
+
+
+class EventField:
+    """One declared output column: value kind, nullability and, if sparse, what populates it and with which labels"""
+
+    def __init__(self, name, kind, nullable=False, dictionary=False, tiers=None, event_types=None, labels=None):
+        self.name = name
+        self.kind = kind                  # 'string', 'timestamp', 'int', 'float', 'bool' or 'list'
+        self.nullable = nullable
+        self.dictionary = dictionary
+        self.tiers = tiers                # sparse columns: populating tiers (None for every tier) ...
+        self.event_types = event_types    # ... and event types
+        self.labels = labels              # sparse string columns: every value they take
+
+    @property
+    def sparse(self):
+        return self.event_types is not None
+
+    @property
+    def frame_dtype(self):
+        """dtype of the column in generated frames (object for nullable non-float kinds)"""
+        if self.nullable and self.kind != 'float':
+            return object
+        return FRAME_DTYPES[self.kind]
+
+    def populated(self, tier, event_type):
+        """Whether events of this tier and type have a value in the column"""
+        if not self.sparse:
+            return True
+        return event_type in self.event_types and (self.tiers is None or tier in self.tiers)
+
+    def missing(self, size):
+        """A column of size values none of which are present"""
+        if self.nullable:
+            return np.full(size, np.nan, dtype=np.float64 if self.frame_dtype == np.float64 else object)
+        return np.empty(size, dtype=self.frame_dtype)
+
+
+def _context_column_kind(kind, spec):
+    """Value kind of a tier-context column: 'float' (NaN-padded ints), 'bool', 'list' or 'string'"""
+    if kind == 'int':
+        return 'float'
+    sample = spec[0] if kind == 'choice' else spec
+    if isinstance(sample, bool):
+        return 'bool'
+    return 'list' if isinstance(sample, list) else 'string'
+
+
+def _context_column_labels(kind, spec):
+    """Values of a tier-context string column (None for other kinds)"""
+    if _context_column_kind(kind, spec) != 'string':
+        return None
+    return list(spec) if kind == 'choice' else [spec]
+
+
+def _declare_fields():
+    """EventField of every event, property and context column by name"""
+    kinds = dict.fromkeys(EVENT_COLUMNS + PROPERTY_COLUMNS, 'string')
+    kinds.update(dict.fromkeys(TIMESTAMP_COLUMNS, 'timestamp'))
+    kinds.update(dict.fromkeys(INT_COLUMNS, 'int'))
+    kinds.update(dict.fromkeys(FLOAT_COLUMNS, 'float'))
+    kinds.update(dict.fromkeys(BOOL_COLUMNS, 'bool'))
+    fields = {name: EventField(name, kind, dictionary=name in DICTIONARY_COLUMNS) for name, kind in kinds.items()}
+    context = [(column, _context_column_kind(kind, spec), [tier], [trigger], _context_column_labels(kind, spec))
+               for column, tier, trigger, kind, spec in TIER_CONTEXT_FIELDS]
+    event_labels = {'error_code': ERROR_CODES, 'error_message': ERROR_MESSAGES}
+    context += [(column, kind, None, event_types, event_labels.get(column))
+                for column, kind, event_types in EVENT_CONTEXT_FIELDS]
+    for column, kind, tiers, event_types, labels in context:
+        fields[column] = EventField(column, kind, nullable=True, dictionary=column in DICTIONARY_COLUMNS,
+                                    tiers=tiers, event_types=event_types, labels=labels)
+    return {name: fields[name] for name in EVENT_COLUMNS + PROPERTY_COLUMNS + CONTEXT_COLUMNS}
+
+
+# The declared field of every column
+EVENT_FIELDS = _declare_fields()
+
+# Value kind of every sparse context column, so writers can type columns that are empty in a chunk
+CONTEXT_COLUMN_KINDS = {column: EVENT_FIELDS[column].kind for column in CONTEXT_COLUMNS}
+
+
+def event_columns(properties_format='json'):
+    """EVENT_COLUMNS, with custom_properties replaced by PROPERTY_COLUMNS for properties_format='columns'"""
+    if properties_format == 'columns':
+        return EVENT_COLUMNS[:-1] + PROPERTY_COLUMNS
+    return EVENT_COLUMNS
+
+
+def output_columns(properties_format='json'):
+    """Every column of a generated frame, in order: the event columns, then the sparse context columns"""
+    return event_columns(properties_format) + CONTEXT_COLUMNS
+
+
+def output_schema(properties_format='json'):
+    """EventFields of output_columns(properties_format)"""
+    return [EVENT_FIELDS[name] for name in output_columns(properties_format)]
+
+
+def ordered_columns(columns):
+    """Declared columns in output order (for the properties format the columns have), then any others as given"""
+    properties_format = 'columns' if set(PROPERTY_COLUMNS).issubset(columns) else 'json'
+    names = output_columns(properties_format)
+    return names + [name for name in columns if name not in names]
+
+
+def empty_frame(properties_format='json'):
+    """Zero-row frame with every output column in its declared dtype"""
+    return pd.DataFrame({field.name: pd.Series(field.missing(0), dtype=field.frame_dtype)
+                         for field in output_schema(properties_format)})
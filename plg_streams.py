@@ -0,0 +1,44 @@
+"""
+Per-User Random Streams for PLG Telemetry
+Independent random.Random streams for the scalar engine, derived from a root
+seed and a counter (user index, session number) instead of one global state,
+so a user's draws never depend on the users generated before it and any
+user's events can be regenerated on their own (events_for_user).
+
+Each stream is seeded with 128 bits of np.random.SeedSequence(seed,
+spawn_key=(SCALAR_STREAMS, user_index[, session_number])), the derivation
+plg_batch uses for batch-engine blocks, under spawn keys that never
+collide with a block's. The profile and session count come from the user's
+stream and everything within a session from that session's stream, so a
+change to one session's draws leaves every other session unchanged.
+
+Used by PLGTelemetryGenerator (scalar engine with a seed)
+"""
+
+import random
+
+import numpy as np
+
+# First spawn-key element of every scalar stream (block streams are keyed by the bare block index)
+SCALAR_STREAMS = 0x5CA1A2
+
+
+def _stream(seed, *counter):
+    """random.Random seeded from SeedSequence(seed) at one spawn-key counter"""
+    entropy = np.random.SeedSequence(seed, spawn_key=(SCALAR_STREAMS,) + counter).generate_state(4)
+    return random.Random(int.from_bytes(entropy.tobytes(), 'little'))
+
+
+def dataset_random(seed):
+    """Stream for the per-dataset draws (tier session counts, ID key)"""
+    return _stream(seed)
+
+
+def user_random(seed, user_index):
+    """Stream for one user's profile and session count"""
+    return _stream(seed, user_index)
+
+
+def session_random(seed, user_index, session_number):
+    """Stream for one session's pattern, timing and event fields"""
+    return _stream(seed, user_index, session_number)
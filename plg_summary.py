@@ -0,0 +1,222 @@
+"""
+Online Summary Statistics for PLG Telemetry
+Mergeable accumulators for the generation report: tier / scenario / segment
+distributions, the tier analytics and scenario breakdown tables, conversion,
+upsell and churn signal rates and MRR totals, updated block by block while
+events are generated instead of from groupbys over the finished DataFrame.
+
+Everything is kept as counts and sums (Counters keyed by label), so the
+summaries of parallel shards, streaming chunks or incremental runs combine
+with merge() and the report never needs the events themselves. Users are
+added once each (add_user for the scalar engine, with their raw batch block
+in add_block); events can be added in any split, since every per-event
+statistic is a sum, a count or a min / max. A session is counted at its first
+event, whose timestamp equals session_start_time (later events are strictly
+after it), so sessions split across chunks are counted once.
+
+Used by PLGTelemetryGenerator and main()
+"""
+
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# Event columns summed per subscription tier (tier analytics means and the tier insights)
+TIER_SUM_COLUMNS = ['mrr_contribution', 'engagement_score', 'churn_risk_score', 'conversion_propensity',
+                    'conversion_signal', 'expansion_signal', 'churn_risk_indicator']
+
+# Columns whose per-tier means make up the tier analytics table
+TIER_MEAN_COLUMNS = ['mrr_contribution', 'engagement_score', 'churn_risk_score', 'conversion_propensity']
+
+# Signal columns summed per PLG scenario for the scenario breakdown
+SCENARIO_SUM_COLUMNS = ['conversion_signal', 'expansion_signal', 'churn_risk_indicator', 'value_realization_event']
+
+PAID_TIERS = ['Basic', 'Premium']
+
+
+def _first_seen_counts(codes, labels):
+    """Counter of labels[code] in order of first appearance"""
+    counts = np.bincount(codes, minlength=len(labels))
+    unique, first_seen = np.unique(codes, return_index=True)
+    return Counter({labels[i]: int(counts[i]) for i in unique[np.argsort(first_seen)]})
+
+
+def _grouped_sums(codes, labels, values):
+    """Counter of values summed per labels[code] (codes that do not occur are left out)"""
+    sums = np.bincount(codes, weights=values, minlength=len(labels))
+    present = np.bincount(codes, minlength=len(labels)) > 0
+    return Counter({labels[i]: int(round(sums[i])) for i in np.flatnonzero(present)})
+
+
+def _percent(part, whole):
+    """part as a percentage of whole (0 when whole is empty)"""
+    return part / whole * 100 if whole else 0.0
+
+
+class DatasetSummary:
+    """Counts and sums behind the generation report, accumulated per user and per block of events"""
+
+    def __init__(self):
+        self.tiers = Counter()        # users per tier, in order of first appearance
+        self.scenarios = Counter()    # users per PLG scenario
+        self.segments = Counter()     # events per user segment
+        self.mrr = 0                  # MRR summed over users
+        self.events = 0
+        self.sessions = 0
+        self.first_timestamp = None   # int epoch microseconds
+        self.last_timestamp = None
+        self.tier_events = Counter()
+        self.tier_sums = {column: Counter() for column in TIER_SUM_COLUMNS}
+        self.scenario_sums = {column: Counter() for column in SCENARIO_SUM_COLUMNS}
+
+    @property
+    def users(self):
+        return sum(self.tiers.values())
+
+    # ------------------------------------------------------------------
+    # Accumulating
+    # ------------------------------------------------------------------
+
+    def add_user(self, tier, scenario, mrr):
+        """Count one user (scalar engine)"""
+        self.tiers[tier] += 1
+        self.scenarios[scenario] += 1
+        self.mrr += mrr
+
+    def _add_timestamps(self, timestamps, session_starts):
+        """Event count, session count and time range of one block of int64 microsecond timestamps"""
+        if not len(timestamps):
+            return
+        self.events += len(timestamps)
+        self.sessions += int(np.count_nonzero(timestamps == session_starts))
+        first, last = int(timestamps.min()), int(timestamps.max())
+        self.first_timestamp = first if self.first_timestamp is None else min(self.first_timestamp, first)
+        self.last_timestamp = last if self.last_timestamp is None else max(self.last_timestamp, last)
+
+    def add_frame(self, df):
+        """Add the events of a DataFrame in the generator's event layout (scalar engine)"""
+        if not len(df):
+            return
+        self._add_timestamps(df['timestamp'].to_numpy(dtype='datetime64[us]').astype(np.int64),
+                             df['session_start_time'].to_numpy(dtype='datetime64[us]').astype(np.int64))
+        self.segments.update(df['user_segment'].value_counts().to_dict())
+        tiers = df.groupby('subscription_tier', sort=False, observed=True)
+        self.tier_events.update({tier: int(count) for tier, count in tiers.size().items()})
+        for column, sums in tiers[TIER_SUM_COLUMNS].sum().items():
+            self.tier_sums[column].update({tier: int(total) for tier, total in sums.items()})
+        scenarios = df.groupby('plg_scenario', sort=False, observed=True)[SCENARIO_SUM_COLUMNS].sum()
+        for column, sums in scenarios.items():
+            self.scenario_sums[column].update({scenario: int(total) for scenario, total in sums.items()})
+
+    def add_block(self, engine, users, cols):
+        """Add a batch-engine block: its users (tier / plg_scenario codes) and raw event columns
+
+        users must hold exactly the users of the block's events, as trimmed blocks do.
+        """
+        self.tiers.update(_first_seen_counts(users['tier'], engine.tiers))
+        self.scenarios.update(_first_seen_counts(users['plg_scenario'], engine.plg_scenarios))
+        self.mrr += int(engine.mrr[users['tier']].sum())
+        if not len(cols.get('timestamp', ())):
+            return
+
+        self._add_timestamps(cols['timestamp'], cols['session_start_time'])
+        segment_counts = np.bincount(cols['user_segment'], minlength=len(engine.segments))
+        self.segments.update({engine.segments[i]: int(segment_counts[i]) for i in np.flatnonzero(segment_counts)})
+        e_tier = cols['subscription_tier']
+        self.tier_events.update(_first_seen_counts(e_tier, engine.tiers))
+        for column in TIER_SUM_COLUMNS:
+            values = engine.mrr[e_tier] if column == 'mrr_contribution' else cols[column]
+            self.tier_sums[column].update(_grouped_sums(e_tier, engine.tiers, values))
+        scenario = engine.scenario_code[e_tier, cols['user_segment']]
+        for column in SCENARIO_SUM_COLUMNS:
+            self.scenario_sums[column].update(_grouped_sums(scenario, engine.plg_scenarios, cols[column]))
+
+    def merge(self, other):
+        """Add another summary (a shard, chunk or run) into this one; returns self"""
+        self.tiers.update(other.tiers)
+        self.scenarios.update(other.scenarios)
+        self.segments.update(other.segments)
+        self.mrr += other.mrr
+        self.events += other.events
+        self.sessions += other.sessions
+        for attribute, pick in (('first_timestamp', min), ('last_timestamp', max)):
+            mine, theirs = getattr(self, attribute), getattr(other, attribute)
+            setattr(self, attribute, theirs if mine is None else mine if theirs is None else pick(mine, theirs))
+        self.tier_events.update(other.tier_events)
+        for column in TIER_SUM_COLUMNS:
+            self.tier_sums[column].update(other.tier_sums[column])
+        for column in SCENARIO_SUM_COLUMNS:
+            self.scenario_sums[column].update(other.scenario_sums[column])
+        return self
+
+    __iadd__ = merge
+
+    # ------------------------------------------------------------------
+    # Report
+    # ------------------------------------------------------------------
+
+    def segments_by_frequency(self):
+        """Event segment counts, most common first"""
+        return Counter(dict(self.segments.most_common()))
+
+    def tier_table(self):
+        """Users and mean event metrics per subscription tier, as df.groupby('subscription_tier').agg would give"""
+        tiers = sorted(self.tier_events)
+        table = pd.DataFrame({'user_id': [self.tiers[tier] for tier in tiers]},
+                             index=pd.Index(tiers, name='subscription_tier'))
+        for column in TIER_MEAN_COLUMNS:
+            table[column] = [self.tier_sums[column][tier] / self.tier_events[tier] for tier in tiers]
+        return table.round(2)
+
+    def scenario_table(self):
+        """Users and signal counts per PLG scenario, as df.groupby('plg_scenario').agg would give"""
+        scenarios = sorted(self.scenario_sums[SCENARIO_SUM_COLUMNS[0]])
+        table = pd.DataFrame({'user_id': [self.scenarios[scenario] for scenario in scenarios]},
+                             index=pd.Index(scenarios, name='plg_scenario'))
+        for column in SCENARIO_SUM_COLUMNS:
+            table[column] = [self.scenario_sums[column][scenario] for scenario in scenarios]
+        return table
+
+    def date_range(self):
+        """(first, last) event timestamps as pandas Timestamps, or (None, None) without events"""
+        if self.first_timestamp is None:
+            return None, None
+        return pd.Timestamp(self.first_timestamp, unit='us'), pd.Timestamp(self.last_timestamp, unit='us')
+
+    def print_overview(self):
+        """Print record, user and session counts and the date range"""
+        first, last = self.date_range()
+        print(f"\n📊 Dataset Summary:")
+        print(f"Total records: {self.events}")
+        print(f"Unique users: {self.users}")
+        print(f"Unique sessions: {self.sessions}")
+        print(f"Date range: {first} to {last}")
+
+    def print_analytics(self):
+        """Print the tier analytics and PLG scenario breakdown tables"""
+        print(f"\n🎯 Tier-Based Analytics:")
+        print(self.tier_table())
+        print(f"\n📈 PLG Scenario Breakdown:")
+        print(self.scenario_table())
+
+    def print_insights(self):
+        """Print conversion / upsell / churn signal rates and MRR totals"""
+        print(f"\n🎯 Tier-Specific PLG Insights:")
+
+        free_events = self.tier_events['Free']
+        conversion_signals = self.tier_sums['conversion_signal']['Free']
+        print(f"Free tier conversion signals: {conversion_signals} "
+              f"({_percent(conversion_signals, free_events):.1f}% of Free events)")
+
+        basic_events = self.tier_events['Basic']
+        upsell_signals = self.tier_sums['expansion_signal']['Basic']
+        print(f"Basic tier upsell signals: {upsell_signals} ({_percent(upsell_signals, basic_events):.1f}% of Basic events)")
+
+        paid_events = sum(self.tier_events[tier] for tier in PAID_TIERS)
+        churn_indicators = sum(self.tier_sums['churn_risk_indicator'][tier] for tier in PAID_TIERS)
+        print(f"Paid tier churn indicators: {churn_indicators} "
+              f"({_percent(churn_indicators, paid_events):.1f}% of paid events)")
+
+        print(f"Total MRR represented: ${self.mrr:,.2f}")
+        print(f"Average MRR per user: ${self.mrr / self.users if self.users else 0:.2f}")
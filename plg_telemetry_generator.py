@@ -1,162 +1,4 @@
-    def get_response_time_by_tier(self, tier, event_type):
-        """Calculate response time based on tier (Premium users get better performance)"""
-        base_times = {
-            'login': (500, 2000),
-            'dashboard_view': (300, 1500),
-            'advanced_analytics': (1000, 5000),
-            'api_integration': (200, 1000),
-            'error_event': (50, 500)
-        }
-        
-        base_range = base_times.get(event_type, (300, 1800))
-        
-        # Performance multipliers by tier
-        tier_multipliers = {
-            'Premium': 0.7,    # 30% faster (better infrastructure)
-            'Basic': 0.9,      # 10% faster than free
-            'Free': 1.0,       # Baseline performance
-            'Cancelled': 1.3   # Slower (degraded access)
-        }
-        
-        multiplier = tier_multipliers.get(tier, 1.0)
-        base_time = random.randint(*base_range)
-        return int(base_time * multiplier)
-    
-    def get_payment_status(self, tier):
-        """Get payment status based on tier"""
-        if tier in ['Basic', 'Premium']:
-            return random.choice(['current', 'past_due', 'failed'], p=[0.92, 0.06, 0.02])
-        elif tier == 'Free':
-            return 'n/a'
-        else:  # Cancelled
-            return 'cancelled'
-    
-    def calculate_churn_risk_score(self, tier, segment):
-        """Calculate churn risk based on tier and segment"""
-        base_scores = {
-            'Premium': {'champion': 5, 'engaged': 10, 'casual': 25, 'at_risk': 60},
-            'Basic': {'champion': 15, 'engaged': 25, 'casual': 45, 'at_risk': 75},
-            'Free': {'conversion_ready': 20, 'engaged': 35, 'casual': 55, 'at_risk': 85},
-            'Cancelled': {'at_risk': 95}
-        }
-        
-        base_score = base_scores.get(tier, {}).get(segment, 50)
-        return base_score + random.randint(-10, 15)
-    
-    def calculate_conversion_propensity(self, tier, segment, event_type):
-        """Calculate conversion propensity (Free→Paid or Basic→Premium)"""
-        if tier == 'Free':
-            base_scores = {'conversion_ready': 75, 'engaged': 35, 'casual': 10, 'at_risk': 5}
-            boost = 20 if event_type in ['usage_limit_hit', 'premium_feature_explore', 'pricing_page_view'] else 0
-        elif tier == 'Basic':
-            base_scores = {'champion': 60, 'engaged': 25, 'casual': 5, 'at_risk': 2}
-            boost = 15 if event_type in ['enterprise_trial', 'team_management_view', 'api_exploration'] else 0
-        else:
-            return 0  # Premium and Cancelled users don't convert up
-        
-        base_score = base_scores.get(segment, 10)
-        return min(95, base_score + boost + random.randint(-10, 10))
-    
-    def calculate_upsell_propensity(self, tier, segment, event_type):
-        """Calculate upsell propensity (Basic→Premium)"""
-        if tier != 'Basic':
-            return 0  # Only Basic users can upsell to Premium
-        
-        base_scores = {'champion': 70, 'engaged': 40, 'casual': 15, 'at_risk': 5}
-        boost = 20 if event_type in ['advanced_feature_usage', 'enterprise_trial', 'team_management_view'] else 0
-        
-        base_score = base_scores.get(segment, 20)
-        return min(95, base_score + boost + random.randint(-5, 10))
-    
-    def calculate_retention_probability(self, tier, segment):
-        """Calculate retention probability"""
-        retention_scores = {
-            'Premium': {'champion': 95, 'engaged': 90, 'casual': 80, 'at_risk': 60},
-            'Basic': {'champion': 85, 'engaged': 75, 'casual': 60, 'at_risk': 40},
-            'Free': {'conversion_ready': 70, 'engaged': 50, 'casual': 30, 'at_risk': 15},
-            'Cancelled': {'at_risk': 5}
-        }
-        
-        base_score = retention_scores.get(tier, {}).get(segment, 50)
-        return base_score + random.randint(-10, 10)
-    
-    def get_next_best_action_by_scenario(self, plg_scenario, event_type):
-        """Get next best action based on PLG scenario"""
-        scenario_actions = {
-            'CAC/Conversion': ['upgrade_trial_offer', 'usage_limit_education', 'value_demonstration', 'pricing_consultation'],
-            'PLG/Upsell': ['premium_feature_demo', 'team_expansion_consultation', 'api_integration_support', 'enterprise_trial'],
-            'Failed Conversion': ['retention_outreach', 'onboarding_restart', 'success_coaching', 'feature_education'],
-            'Churn': ['immediate_intervention', 'value_recovery_program', 'win_back_offer', 'exit_interview'],
-            'Winback': ['reactivation_offer', 'competitive_analysis', 'success_story_sharing', 'special_pricing'],
-            'Retention': ['engagement_optimization', 'feature_recommendation', 'success_measurement', 'community_involvement']
-        }
-        
-        actions = scenario_actions.get(plg_scenario, ['standard_engagement'])
-        return random.choice(actions)
-    
-    def get_intervention_priority_by_tier(self, tier, segment, event_type):
-        """Calculate intervention priority based on tier, segment, and event"""
-        # High priority conditions
-        if segment == 'at_risk' and tier in ['Basic', 'Premium']:
-            return 'high'  # Paying customers at risk = high priority
-        if tier == 'Free' and segment == 'conversion_ready' and event_type in ['usage_limit_hit', 'pricing_page_view']:
-            return 'high'  # Hot conversion leads = high priority
-        if event_type in ['support_ticket_create', 'payment_issue_check', 'competitor_comparison']:
-            return 'high'  # Critical events = high priority
-        
-        # Medium priority conditions
-        if tier in ['Basic', 'Premium'] and segment in ['engaged', 'casual']:
-            return 'medium'  # Paying customers = medium priority
-        if tier == 'Free' and segment in ['conversion_ready', 'engaged']:
-            return 'medium'  # Potential converts = medium priority
-        
-        # Low priority (everything else)
-        return 'low'
-    
-    def is_tier_transition_candidate(self, user_profile, event_type):
-        """Determine if user is a candidate for tier transition"""
-        tier = user_profile['tier']
-        segment = user_profile['segment']
-        
-        if tier == 'Free' and segment == 'conversion_ready':
-            return 'free_to_paid_candidate'
-        elif tier == 'Basic' and segment == 'champion':
-            return 'basic_to_premium_candidate'
-        elif segment == 'at_risk' and tier in ['Basic', 'Premium']:
-            return 'churn_risk_candidate'
-        elif tier == 'Cancelled':
-            return 'winback_candidate'
-        else:
-            return 'stable'
-    
-    def add_tier_specific_context(self, event, event_type, user_profile):
-        """Add tier-specific context to events"""
-        tier = user_profile['tier']
-        
-        # Free tier specific fields
-        if tier == 'Free':
-            if event_type == 'usage_limit_hit':
-                event.update({
-                    'limit_type': random.choice(['reports', 'data_export', 'api_calls', 'storage']),
-                    'usage_percentage': random.randint(95    def generate_session_events(self, user_profile, session_count=1):
-        """Generate events for a user session following tier-based PLG patterns"""
-        events = []
-        tier = user_profile['tier']
-        segment = user_profile['segment']
-        
-        for session_num in range(session_count):
-            # Get tier-specific session patterns
-            tier_patterns = self.tier_session_patterns.get(tier, self.tier_session_patterns['Free'])
-            segment_patterns = tier_patterns.get(segment, {'basic_usage': ['login', 'dashboard_view', 'logout']})
-            
-            # Select pattern randomly from available patterns for this tier/segment
-            if segment_patterns:
-                pattern_name = random.choice(list(segment_patterns.keys()))
-                event_sequence = segment_patterns[pattern_name]
-            else:
-                pattern_name = 'basic_usage'
-                event_sequence = ['login', 'dashboard_view', 'logout']
-            #!/usr/bin/env python3
+#!/usr/bin/env python3
 """
 PLG Product Telemetry Data Generator
 Generates 1000 realistic telemetry records for Salesforce Data Cloud demo
@@ -165,19 +7,59 @@ Based on Product Led Growth behavioral patterns and user segmentation
 Run in Google Colab: https://colab.research.google.com/
 """
 
-import pandas as pd
 import numpy as np
 import random
-import uuid
-from datetime import datetime, timedelta
+from datetime import datetime
 import json
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+
+from plg_batch import BatchTelemetryEngine, compact_frame, MICROS_PER_MINUTE, MICROS_PER_HOUR, MICROS_PER_DAY
+from plg_schema import (CUSTOM_PROPERTY_KEYS, PROPERTIES_FORMATS, VALUE_EVENTS, FILE_EVENTS, ERROR_CODES,
+                        ERROR_MESSAGES, empty_frame, event_columns)
+from plg_writers import (OUTPUT_FORMATS, TEXT_FORMATS, TEXT_COMPRESSIONS, DEFAULT_MERGE_ROWS, open_chunk_writer,
+                         output_suffix, write_chunks, sort_events_by_time)
+from plg_parallel import ShardedTelemetryRunner
+from plg_history import load_contact_history
+from plg_incremental import IncrementalDataset
+from plg_profiling import NULL_PROFILER, StageProfiler
+from plg_replay import EventReplay, DEFAULT_REPLAY_BATCH
+from plg_upload import BulkUploader, UPLOAD_FORMATS, DEFAULT_SOURCE, DEFAULT_OBJECT, DEFAULT_UPLOAD_WORKERS
+from plg_ingest_stub import IngestionStub
+from plg_sampling import CategoricalSampler, ConditionalSampler
+from plg_summary import DatasetSummary
+from plg_ids import TelemetryIds, DEFAULT_EVENT_ID_CHARS, DEFAULT_SESSION_ID_CHARS, duplicate_count
+from plg_streams import dataset_random, user_random, session_random
+from plg_records import EventRecords
+from plg_markov import SESSION_MODELS, MAX_SESSION_EVENTS
 
 # Set random seed for reproducibility
 random.seed(42)
 np.random.seed(42)
 
+# Users are sized assuming this many events each; generation stops early once enough exist
+AVG_EVENTS_PER_USER = 4
+
+# Scalar-engine methods timed on every call while profiling (method -> stage); see enable_profiling
+PROFILED_METHODS = {
+    'generate_user_profile': 'user_profiles',
+    'generate_session_events': 'sessions'
+}
+# Per-session / per-event methods, timed only within every PROFILE_SAMPLE_EVERY-th user's sessions
+PROFILED_SESSION_METHODS = {
+    'select_session_pattern': 'session_patterns',
+    'create_telemetry_event': 'events',
+    'calculate_business_metrics': 'business_metrics',
+    'add_tier_specific_context': 'tier_context'
+}
+PROFILE_SAMPLE_EVERY = 8
+
 class PLGTelemetryGenerator:
-    def __init__(self):
+    def __init__(self, event_id_chars=DEFAULT_EVENT_ID_CHARS, session_id_chars=DEFAULT_SESSION_ID_CHARS,
+                 properties_format='json', session_model='patterns'):
         # Tier Distribution (based on typical SaaS metrics)
         self.tier_weights = {
             'Free': 0.60,        # 60% - Freemium users (conversion targets)
@@ -386,125 +268,92 @@ class PLGTelemetryGenerator:
         self.first_names = ['Alex', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Quinn', 'Avery', 'Cameron', 'Drew',
                            'Blake', 'Sage', 'River', 'Phoenix', 'Skyler', 'Rowan', 'Finley', 'Harper', 'Emery', 'Parker']
         self.last_names = ['Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez', 'Hernandez']
+        self.departments = ['Sales', 'Marketing', 'IT', 'Operations', 'Finance', 'HR']
         
-    def generate_user_profile(self, user_index):
-        """Generate a user profile with tier and segment assignment"""
-        # Select tier based on realistic distribution
-        tier = np.random.choice(list(self.tier_weights.keys()), p=list(self.tier_weights.values()))
-        
-        # Select segment based on tier
-        segment_weights = self.segment_tier_mapping.get(tier, {'casual': 1.0})
-        segment = np.random.choice(list(segment_weights.keys()), p=list(segment_weights.values()))
+        # Titles by tier and segment ('default' covers the other segments; unknown tiers use Cancelled)
+        self.title_groups = {
+            'Premium': {
+                'champion': ['VP Sales', 'Director of Analytics', 'Head of Data', 'Chief Revenue Officer', 'VP Marketing'],
+                'default': ['Senior Manager', 'Director', 'Principal Analyst', 'Senior Director']
+            },
+            'Basic': {
+                'champion': ['Manager', 'Senior Manager', 'Team Lead', 'Analytics Manager'],
+                'default': ['Manager', 'Senior Analyst', 'Team Lead', 'Specialist']
+            },
+            'Free': {'default': ['Analyst', 'Associate', 'Coordinator', 'Specialist', 'Junior Manager']},
+            'Cancelled': {'default': ['Former Manager', 'Ex-Analyst', 'Previous User']}
+        }
         
-        first_name = random.choice(self.first_names)
-        last_name = random.choice(self.last_names)
+        # Base sessions per user by tier, drawn once per dataset
+        self.tier_session_ranges = {
+            'Premium': (4, 8),     # Heavy users
+            'Basic': (2, 5),       # Moderate users
+            'Free': (1, 3),        # Light users
+            'Cancelled': (1, 1)    # Minimal activity
+        }
         
-        return {
-            'user_id': f'user_{first_name.lower()}_{last_name.lower()}_{user_index:04d}',
-            'external_id': f'EXT_{user_index:06d}',
-            'first_name': first_name,
-            'last_name': last_name,
-            'email': f'{first_name.lower()}.{last_name.lower()}@example.com',
-            'tier': tier,
-            'segment': segment,
-            'title': self.get_title_for_tier_segment(tier, segment),
-            'department': random.choice(['Sales', 'Marketing', 'IT', 'Operations', 'Finance', 'HR']),
-            'phone': f'555-{random.randint(100, 999)}-{random.randint(1000, 9999)}',
-            'plg_scenario': self.determine_plg_scenario(tier, segment)
+        # Realistic time gaps between events in a session (minutes)
+        self.session_gap_minutes = {
+            'Premium': (0.5, 3.0),    # Fast, efficient users
+            'Basic': (1.0, 5.0),     # Moderate pacing
+            'Free': (2.0, 8.0),      # Slower, more exploratory
+            'Cancelled': (5.0, 15.0) # Hesitant, unfamiliar
         }
-    
-    def get_title_for_tier_segment(self, tier, segment):
-        """Assign realistic titles based on tier and segment"""
-        if tier == 'Premium':
-            if segment == 'champion':
-                return random.choice(['VP Sales', 'Director of Analytics', 'Head of Data', 'Chief Revenue Officer', 'VP Marketing'])
-            else:
-                return random.choice(['Senior Manager', 'Director', 'Principal Analyst', 'Senior Director'])
-        elif tier == 'Basic':
-            if segment == 'champion':
-                return random.choice(['Manager', 'Senior Manager', 'Team Lead', 'Analytics Manager'])
-            else:
-                return random.choice(['Manager', 'Senior Analyst', 'Team Lead', 'Specialist'])
-        elif tier == 'Free':
-            return random.choice(['Analyst', 'Associate', 'Coordinator', 'Specialist', 'Junior Manager'])
-        else:  # Cancelled
-            return random.choice(['Former Manager', 'Ex-Analyst', 'Previous User'])
-    
-    def determine_plg_scenario(self, tier, segment):
-        """Determine the PLG scenario this user represents"""
-        if tier == 'Free' and segment == 'conversion_ready':
-            return 'CAC/Conversion'
-        elif tier == 'Basic' and segment == 'champion':
-            return 'PLG/Upsell'
-        elif tier == 'Free' and segment == 'at_risk':
-            return 'Failed Conversion'
-        elif tier in ['Basic', 'Premium'] and segment == 'at_risk':
-            return 'Churn'
-        elif tier == 'Cancelled':
-            return 'Winback'
-        else:
-            return 'Retention'
-    
-    def get_feature_sophistication(self, event_type):
-        """Determine feature sophistication level"""
-        for level, events in self.feature_sophistication.items():
-            if event_type in events:
-                return level
-        return 'intermediate'
-    
-    def calculate_engagement_depth(self, event_type, user_segment):
-        """Calculate engagement depth based on event and user segment"""
-        depth_weights = {
-            'champion': {'surface': 0.1, 'moderate': 0.3, 'deep': 0.6},
-            'engaged': {'surface': 0.2, 'moderate': 0.6, 'deep': 0.2},
-            'casual': {'surface': 0.7, 'moderate': 0.3, 'deep': 0.0},
-            'at_risk': {'surface': 0.9, 'moderate': 0.1, 'deep': 0.0},
-            'conversion_ready': {'surface': 0.1, 'moderate': 0.4, 'deep': 0.5}
+        
+        # Engagement depth weights (surface, moderate, deep) by tier and segment
+        self.depth_levels = ['surface', 'moderate', 'deep']
+        self.depth_weights = {
+            'Premium': {
+                'champion': (0.05, 0.25, 0.70),
+                'engaged': (0.10, 0.50, 0.40),
+                'casual': (0.30, 0.60, 0.10),
+                'at_risk': (0.70, 0.30, 0.00)
+            },
+            'Basic': {
+                'champion': (0.10, 0.40, 0.50),
+                'engaged': (0.20, 0.60, 0.20),
+                'casual': (0.50, 0.40, 0.10),
+                'at_risk': (0.80, 0.20, 0.00)
+            },
+            'Free': {
+                'conversion_ready': (0.15, 0.45, 0.40),
+                'engaged': (0.30, 0.50, 0.20),
+                'casual': (0.70, 0.30, 0.00),
+                'at_risk': (0.90, 0.10, 0.00)
+            },
+            'Cancelled': {
+                'at_risk': (0.95, 0.05, 0.00)
+            }
         }
         
-        weights = depth_weights.get(user_segment, depth_weights['casual'])
-        return np.random.choice(list(weights.keys()), p=list(weights.values()))
-    
-    def get_current_plan_tier(self, tier):
-        """Map tier to plan for backwards compatibility"""
-        tier_mapping = {
+        # Plan, revenue and lifetime by tier
+        self.plan_tier_mapping = {
             'Free': 'free',
-            'Basic': 'basic', 
+            'Basic': 'basic',
             'Premium': 'premium',
             'Cancelled': 'cancelled'
         }
-        return tier_mapping.get(tier, 'free')
-    
-    def calculate_mrr_contribution(self, tier):
-        """Calculate MRR based on tier"""
-        mrr_values = {
+        self.tier_mrr = {
             'Free': 0,
             'Basic': 99,        # $99/month Basic plan
-            'Premium': 299,     # $299/month Premium plan  
+            'Premium': 299,     # $299/month Premium plan
             'Cancelled': 0
         }
-        return mrr_values.get(tier, 0)
-    
-    def calculate_business_metrics(self, user_profile, event_type, session_start):
-        """Calculate comprehensive SaaS business metrics based on tier"""
-        tier = user_profile['tier']
-        segment = user_profile['segment']
-        plan_tier = self.get_current_plan_tier(tier)
-        mrr = self.calculate_mrr_contribution(tier)
+        self.lifetime_months = {'Premium': 36, 'Basic': 24, 'Free': 0, 'Cancelled': 0}
+        
+        # Payment status of paying (Basic / Premium) users
+        self.payment_status_weights = {'current': 0.92, 'past_due': 0.06, 'failed': 0.02}
         
         # Account health metrics - adjusted by tier
-        health_score_ranges = {
+        self.health_score_ranges = {
             'Premium': {'champion': (80, 100), 'engaged': (70, 90), 'casual': (60, 80), 'at_risk': (30, 50)},
             'Basic': {'champion': (70, 90), 'engaged': (60, 80), 'casual': (40, 70), 'at_risk': (20, 40)},
             'Free': {'conversion_ready': (50, 80), 'engaged': (40, 70), 'casual': (20, 50), 'at_risk': (10, 30)},
             'Cancelled': {'at_risk': (5, 20)}
         }
         
-        score_range = health_score_ranges.get(tier, {}).get(segment, (30, 60))
-        health_score = random.randint(score_range[0], score_range[1])
-        
         # Usage metrics by tier
-        usage_patterns = {
+        self.usage_patterns = {
             'Premium': {
                 'seat_utilization': (0.7, 0.95),
                 'storage_utilization': (0.6, 0.9),
@@ -514,7 +363,7 @@ class PLGTelemetryGenerator:
             },
             'Basic': {
                 'seat_utilization': (0.5, 0.8),
-                'storage_utilization': (0.3, 0.7), 
+                'storage_utilization': (0.3, 0.7),
                 'api_usage': (50, 500),
                 'integrations': (1, 4),
                 'support_tickets': (0, 3)
@@ -535,201 +384,471 @@ class PLGTelemetryGenerator:
             }
         }
         
-        patterns = usage_patterns.get(tier, usage_patterns['Free'])
-        
-        # Calculate engagement scores by tier + segment
-        engagement_base = {
+        # Engagement score base by tier + segment
+        self.engagement_base = {
             'Premium': {'champion': 85, 'engaged': 75, 'casual': 60, 'at_risk': 40},
             'Basic': {'champion': 75, 'engaged': 65, 'casual': 45, 'at_risk': 25},
             'Free': {'conversion_ready': 70, 'engaged': 50, 'casual': 30, 'at_risk': 15},
             'Cancelled': {'at_risk': 10}
         }
         
-        base_engagement = engagement_base.get(tier, {}).get(segment, 30)
-        engagement_score = base_engagement + random.randint(-10, 15)
+        # Response time ranges (ms) by event and performance multipliers by tier
+        self.response_time_ranges = {
+            'login': (500, 2000),
+            'dashboard_view': (300, 1500),
+            'advanced_analytics': (1000, 5000),
+            'api_integration': (200, 1000),
+            'error_event': (50, 500)
+        }
+        self.response_time_multipliers = {
+            'Premium': 0.7,    # 30% faster (better infrastructure)
+            'Basic': 0.9,      # 10% faster than free
+            'Free': 1.0,       # Baseline performance
+            'Cancelled': 1.3   # Slower (degraded access)
+        }
+        
+        # Predictive score bases by tier and segment
+        self.churn_base_scores = {
+            'Premium': {'champion': 5, 'engaged': 10, 'casual': 25, 'at_risk': 60},
+            'Basic': {'champion': 15, 'engaged': 25, 'casual': 45, 'at_risk': 75},
+            'Free': {'conversion_ready': 20, 'engaged': 35, 'casual': 55, 'at_risk': 85},
+            'Cancelled': {'at_risk': 95}
+        }
+        self.retention_base_scores = {
+            'Premium': {'champion': 95, 'engaged': 90, 'casual': 80, 'at_risk': 60},
+            'Basic': {'champion': 85, 'engaged': 75, 'casual': 60, 'at_risk': 40},
+            'Free': {'conversion_ready': 70, 'engaged': 50, 'casual': 30, 'at_risk': 15},
+            'Cancelled': {'at_risk': 5}
+        }
+        
+        # Propensity rules by tier (tiers without a rule always score 0)
+        self.conversion_propensity_rules = {
+            'Free': {
+                'base_scores': {'conversion_ready': 75, 'engaged': 35, 'casual': 10, 'at_risk': 5},
+                'default': 10,
+                'boost_events': ['usage_limit_hit', 'premium_feature_explore', 'pricing_page_view'],
+                'boost': 20,
+                'noise': (-10, 10)
+            },
+            'Basic': {
+                'base_scores': {'champion': 60, 'engaged': 25, 'casual': 5, 'at_risk': 2},
+                'default': 10,
+                'boost_events': ['enterprise_trial', 'team_management_view', 'api_exploration'],
+                'boost': 15,
+                'noise': (-10, 10)
+            }
+        }
+        self.upsell_propensity_rules = {
+            'Basic': {
+                'base_scores': {'champion': 70, 'engaged': 40, 'casual': 15, 'at_risk': 5},
+                'default': 20,
+                'boost_events': ['advanced_feature_usage', 'enterprise_trial', 'team_management_view'],
+                'boost': 20,
+                'noise': (-5, 10)
+            }
+        }
         
+        # Next best actions by PLG scenario
+        self.scenario_actions = {
+            'CAC/Conversion': ['upgrade_trial_offer', 'usage_limit_education', 'value_demonstration', 'pricing_consultation'],
+            'PLG/Upsell': ['premium_feature_demo', 'team_expansion_consultation', 'api_integration_support', 'enterprise_trial'],
+            'Failed Conversion': ['retention_outreach', 'onboarding_restart', 'success_coaching', 'feature_education'],
+            'Churn': ['immediate_intervention', 'value_recovery_program', 'win_back_offer', 'exit_interview'],
+            'Winback': ['reactivation_offer', 'competitive_analysis', 'success_story_sharing', 'special_pricing'],
+            'Retention': ['engagement_optimization', 'feature_recommendation', 'success_measurement', 'community_involvement']
+        }
+        
+        # PLG signal events (signal is True when the event is listed)
+        self.plg_signal_events = {
+            'premium_feature_exposure': ['premium_feature_explore', 'enterprise_trial', 'advanced_analytics', 'api_integration', 'automation_setup'],
+            'value_realization_event': ['insight_discovery', 'workflow_success', 'share_result', 'success_showcase', 'report_generate'],
+            'viral_behavior': ['external_demo', 'advanced_sharing', 'thought_leadership', 'referral_program'],
+            'friction_encountered': ['error_event', 'feature_abandon', 'payment_issue_check', 'support_ticket_create'],
+            'help_seeking_behavior': ['help_search', 'support_ticket_create', 'account_reactivation_view'],
+            'churn_risk_indicator': ['cost_review', 'competitor_comparison', 'declining_usage', 'data_export_final']
+        }
+        # Signals that only fire for some tiers
+        self.tier_signal_events = {
+            'expansion_signal': {
+                'Free': ['premium_feature_explore', 'pricing_page_view', 'paywall_encounter'],
+                'Basic': ['enterprise_trial', 'team_management_view', 'api_exploration', 'advanced_feature_usage']
+            },
+            'conversion_signal': {
+                # Free users showing buying intent
+                'Free': ['usage_limit_hit', 'premium_feature_explore', 'pricing_page_view']
+            }
+        }
+        
+        # Conversion value and export size ranges by tier (see add_tier_specific_context)
+        self.value_events = VALUE_EVENTS
+        self.value_event_ranges = {
+            'Premium': (200, 1000),
+            'Basic': (50, 400),
+            'Free': (10, 100),
+            'Cancelled': (0, 20)
+        }
+        self.file_events = FILE_EVENTS
+        self.file_size_ranges = {
+            'Premium': (5000000, 50000000),  # 5-50MB
+            'Basic': (1000000, 10000000),    # 1-10MB
+            'Free': (100000, 1000000),       # 100KB-1MB
+            'Cancelled': (0, 100000)         # Up to 100KB
+        }
+        self.error_codes = ERROR_CODES
+        self.error_messages = ERROR_MESSAGES
+        
+        # Hex characters in event_id / session_id suffixes (see plg_ids)
+        self.event_id_chars = event_id_chars
+        self.session_id_chars = session_id_chars
+        
+        # custom_properties as one JSON string column ('json') or as typed property_* columns ('columns')
+        if properties_format not in PROPERTIES_FORMATS:
+            raise ValueError(f"Unknown properties_format '{properties_format}' (expected one of {PROPERTIES_FORMATS})")
+        self.properties_format = properties_format
+        self.event_columns = event_columns(properties_format)
+        self.properties_json_cache = {}
+        
+        # Sessions replay tier_session_patterns ('patterns') or walk chains derived from them ('markov', plg_markov)
+        if session_model not in SESSION_MODELS:
+            raise ValueError(f"Unknown session_model '{session_model}' (expected one of {SESSION_MODELS})")
+        self.session_model = session_model
+        
+        # Stage timers; NULL_PROFILER until enable_profiling()
+        self.profiler = NULL_PROFILER
+        
+        # Source of the scalar engine's draws: the global random / NumPy state, or in a seeded run the
+        # stream of the user or session being generated (see plg_streams)
+        self.random = random
+        self.sampler_random = None
+        
+        # Integer codes and (tier, segment) / event_type lookup tables for all of the above
+        self.compile_scenario_model()
+        
+    def compile_scenario_model(self):
+        """Compile the configuration tables into integer codes and keyed lookup tables
+        
+        Called once from __init__ (call it again after editing a table). The per-event methods
+        then do a single lookup instead of rebuilding their tables, and the batch engine builds
+        its NumPy arrays from the same codes and tables.
+        """
+        fallback_pattern = ['login', 'dashboard_view', 'logout']
+        
+        # Integer codes: tiers, segments in first-seen order, and event types in session-pattern order
+        # followed by any event only named by the other tables
+        self.tiers = list(self.tier_weights.keys())
+        self.segments = []
+        for weights in self.segment_tier_mapping.values():
+            for segment in weights:
+                if segment not in self.segments:
+                    self.segments.append(segment)
+        self.event_types = []
+        named_events = [fallback_pattern]
+        for tier in self.tiers:
+            tier_patterns = self.tier_session_patterns.get(tier, self.tier_session_patterns['Free'])
+            for segment in self.segments:
+                segment_patterns = tier_patterns.get(segment) or {'basic_usage': fallback_pattern}
+                named_events.extend(segment_patterns.values())
+        named_events.extend([self.feature_mapping, self.response_time_ranges, self.value_events, self.file_events])
+        named_events.extend(self.feature_sophistication.values())
+        named_events.extend(self.plg_signal_events.values())
+        for events_by_tier in self.tier_signal_events.values():
+            named_events.extend(events_by_tier.values())
+        for rules in (self.conversion_propensity_rules, self.upsell_propensity_rules):
+            named_events.extend(rule['boost_events'] for rule in rules.values())
+        for events in named_events:
+            for event_type in events:
+                if event_type not in self.event_types:
+                    self.event_types.append(event_type)
+        self.tier_index = {tier: i for i, tier in enumerate(self.tiers)}
+        self.segment_index = {segment: i for i, segment in enumerate(self.segments)}
+        self.event_index = {event_type: i for i, event_type in enumerate(self.event_types)}
+        
+        # (tier, segment) and tier parameters
+        self.scenario_params = {(tier, segment): self._compile_scenario_params(tier, segment)
+                                for tier in self.tiers for segment in self.segments}
+        self.tier_params = {tier: self._compile_tier_params(tier) for tier in self.tiers}
+        
+        # Categorical samplers for the weight tables
+        self.tier_sampler = CategoricalSampler(self.tier_weights)
+        self.segment_sampler = ConditionalSampler(
+            {tier: self.segment_tier_mapping.get(tier, {'casual': 1.0}) for tier in self.tiers},
+            labels=self.segments, default={'casual': 1.0})
+        self.depth_sampler = ConditionalSampler(
+            {key: dict(zip(self.depth_levels, params['depth_weights'])) for key, params in self.scenario_params.items()},
+            labels=self.depth_levels, default=dict(zip(self.depth_levels, (0.7, 0.3, 0.0))))
+        self.payment_status_sampler = CategoricalSampler(self.payment_status_weights)
+        
+        # Fixed categories of compact label columns, compiled on first use (see compact_category_dtypes)
+        self._category_dtypes = None
+        
+        # Inverted indexes by event type: sophistication level and PLG signal bitmask
+        self.event_sophistication = {}
+        for level, events in self.feature_sophistication.items():
+            for event_type in events:
+                self.event_sophistication.setdefault(event_type, level)
+        self.signal_names = list(self.plg_signal_events) + list(self.tier_signal_events)
+        self.event_signal_bits = {}
+        for bit, events in enumerate(self.plg_signal_events.values()):
+            for event_type in events:
+                self.event_signal_bits[event_type] = self.event_signal_bits.get(event_type, 0) | 1 << bit
+        self.tier_event_signal_bits = {(tier, event_type): self.event_signal_bits.get(event_type, 0)
+                                       for tier in self.tiers for event_type in self.event_types}
+        for bit, events_by_tier in enumerate(self.tier_signal_events.values(), len(self.plg_signal_events)):
+            for tier, events in events_by_tier.items():
+                for event_type in events:
+                    key = (tier, event_type)
+                    self.tier_event_signal_bits[key] = self.tier_event_signal_bits.get(key, 0) | 1 << bit
+        all_bits = set(self.tier_event_signal_bits.values()) | set(self.event_signal_bits.values()) | {0}
+        self.signal_flags = {bits: {name: bool(bits >> bit & 1) for bit, name in enumerate(self.signal_names)}
+                             for bits in all_bits}
+        
+        # Propensity boosts by (tier, event_type)
+        self.conversion_boosts = {(tier, event_type): rule['boost']
+                                  for tier, rule in self.conversion_propensity_rules.items() for event_type in rule['boost_events']}
+        self.upsell_boosts = {(tier, event_type): rule['boost']
+                              for tier, rule in self.upsell_propensity_rules.items() for event_type in rule['boost_events']}
+        
+        # Intervention priority is deterministic per (tier, segment, event_type)
+        self.intervention_priorities = {(tier, segment, event_type): self.intervention_priority_rule(tier, segment, event_type)
+                                        for tier in self.tiers for segment in self.segments for event_type in self.event_types}
+    
+    def _compile_scenario_params(self, tier, segment):
+        """Per-(tier, segment) parameters with the same defaults as the original per-event lookups"""
+        titles = self.title_groups.get(tier, self.title_groups['Cancelled'])
+        conversion = self.conversion_propensity_rules.get(tier)
+        upsell = self.upsell_propensity_rules.get(tier)
         return {
-            'current_plan_tier': plan_tier,
+            'titles': titles.get(segment, titles['default']),
+            'plg_scenario': self.determine_plg_scenario(tier, segment),
+            'transition_candidate': self.tier_transition_rule(tier, segment),
+            'health_score_range': self.health_score_ranges.get(tier, {}).get(segment, (30, 60)),
+            'engagement_base': self.engagement_base.get(tier, {}).get(segment, 30),
+            'depth_weights': list(self.depth_weights.get(tier, {}).get(segment, (0.7, 0.3, 0.0))),
+            'churn_base': self.churn_base_scores.get(tier, {}).get(segment, 50),
+            'retention_base': self.retention_base_scores.get(tier, {}).get(segment, 50),
+            # None where the tier has no propensity rule (score is always 0)
+            'conversion_base': conversion['base_scores'].get(segment, conversion['default']) if conversion else None,
+            'conversion_noise': conversion['noise'] if conversion else None,
+            'upsell_base': upsell['base_scores'].get(segment, upsell['default']) if upsell else None,
+            'upsell_noise': upsell['noise'] if upsell else None
+        }
+    
+    def _compile_tier_params(self, tier):
+        """Per-tier parameters with the same defaults as the original per-event lookups"""
+        mrr = self.tier_mrr.get(tier, 0)
+        return {
+            'plan_tier': self.plan_tier_mapping.get(tier, 'free'),
+            'mrr': mrr,
+            'arr': mrr * 12,
+            'lifetime_value': mrr * self.lifetime_months.get(tier, 12),
+            'usage': self.usage_patterns.get(tier, self.usage_patterns['Free']),
+            'response_multiplier': self.response_time_multipliers.get(tier, 1.0),
+            'session_gap': self.session_gap_minutes.get(tier, (1.0, 5.0)),
+            'value_range': self.value_event_ranges.get(tier, (10, 100)),
+            'file_size_range': self.file_size_ranges.get(tier, (100000, 1000000))
+        }
+    
+    def get_scenario_params(self, tier, segment):
+        """Compiled (tier, segment) parameters; pairs outside the model are compiled on first use"""
+        params = self.scenario_params.get((tier, segment))
+        if params is None:
+            params = self.scenario_params[(tier, segment)] = self._compile_scenario_params(tier, segment)
+        return params
+    
+    def get_tier_params(self, tier):
+        """Compiled tier parameters; tiers outside the model are compiled on first use"""
+        params = self.tier_params.get(tier)
+        if params is None:
+            params = self.tier_params[tier] = self._compile_tier_params(tier)
+        return params
+    
+    def generate_user_profile(self, user_index):
+        """Generate a user profile with tier and segment assignment"""
+        # Select tier based on realistic distribution
+        tier = self.tier_sampler.draw(self.sampler_random)
+        
+        # Select segment based on tier
+        segment = self.segment_sampler.draw(tier, self.sampler_random)
+        
+        first_name = self.random.choice(self.first_names)
+        last_name = self.random.choice(self.last_names)
+        
+        return {
+            'user_index': user_index,
+            'user_id': f'user_{first_name.lower()}_{last_name.lower()}_{user_index:04d}',
+            'external_id': f'EXT_{user_index:06d}',
+            'first_name': first_name,
+            'last_name': last_name,
+            'email': f'{first_name.lower()}.{last_name.lower()}@example.com',
+            'tier': tier,
+            'segment': segment,
+            'title': self.get_title_for_tier_segment(tier, segment),
+            'department': self.random.choice(self.departments),
+            'phone': f'555-{self.random.randint(100, 999)}-{self.random.randint(1000, 9999)}',
+            'plg_scenario': self.get_scenario_params(tier, segment)['plg_scenario']
+        }
+    
+    def get_title_for_tier_segment(self, tier, segment):
+        """Assign realistic titles based on tier and segment"""
+        return self.random.choice(self.get_scenario_params(tier, segment)['titles'])
+    
+    def determine_plg_scenario(self, tier, segment):
+        """Determine the PLG scenario this user represents"""
+        if tier == 'Free' and segment == 'conversion_ready':
+            return 'CAC/Conversion'
+        elif tier == 'Basic' and segment == 'champion':
+            return 'PLG/Upsell'
+        elif tier == 'Free' and segment == 'at_risk':
+            return 'Failed Conversion'
+        elif tier in ['Basic', 'Premium'] and segment == 'at_risk':
+            return 'Churn'
+        elif tier == 'Cancelled':
+            return 'Winback'
+        else:
+            return 'Retention'
+    
+    def get_feature_sophistication(self, event_type):
+        """Determine feature sophistication level"""
+        return self.event_sophistication.get(event_type, 'intermediate')
+    
+    def get_current_plan_tier(self, tier):
+        """Map tier to plan for backwards compatibility"""
+        return self.plan_tier_mapping.get(tier, 'free')
+    
+    def calculate_mrr_contribution(self, tier):
+        """Calculate MRR based on tier"""
+        return self.tier_mrr.get(tier, 0)
+    
+    def calculate_business_metrics(self, user_profile, event_type, session_start):
+        """Calculate comprehensive SaaS business metrics based on tier"""
+        tier = user_profile['tier']
+        params = self.get_scenario_params(tier, user_profile['segment'])
+        tier_params = self.get_tier_params(tier)
+        
+        # Account health metrics - adjusted by tier
+        health_score = self.random.randint(*params['health_score_range'])
+        
+        # Usage metrics by tier
+        patterns = tier_params['usage']
+        
+        # Calculate engagement scores by tier + segment
+        engagement_score = params['engagement_base'] + self.random.randint(-10, 15)
+        
+        return {
+            'current_plan_tier': tier_params['plan_tier'],
             'subscription_tier': tier,  # New field for tier tracking
-            'mrr_contribution': mrr,
-            'arr_contribution': mrr * 12,
-            'customer_lifetime_value': mrr * {'Premium': 36, 'Basic': 24, 'Free': 0, 'Cancelled': 0}.get(tier, 12),
+            'mrr_contribution': tier_params['mrr'],
+            'arr_contribution': tier_params['arr'],
+            'customer_lifetime_value': tier_params['lifetime_value'],
             'account_health_score': health_score,
             'engagement_score': max(0, min(100, engagement_score)),
-            'seat_utilization': round(random.uniform(*patterns['seat_utilization']), 2),
-            'storage_utilization': round(random.uniform(*patterns['storage_utilization']), 2),
-            'api_usage_monthly': random.randint(*patterns['api_usage']) if event_type in ['api_integration', 'api_exploration'] else 0,
-            'integration_count': random.randint(*patterns['integrations']),
-            'support_ticket_count': random.randint(*patterns['support_tickets'])
+            'seat_utilization': round(self.random.uniform(*patterns['seat_utilization']), 2),
+            'storage_utilization': round(self.random.uniform(*patterns['storage_utilization']), 2),
+            'api_usage_monthly': self.random.randint(*patterns['api_usage']) if event_type in ['api_integration', 'api_exploration'] else 0,
+            'integration_count': self.random.randint(*patterns['integrations']),
+            'support_ticket_count': self.random.randint(*patterns['support_tickets'])
         }
     
-    def generate_session_events(self, user_profile, session_count=1):
-        """Generate events for a user session following PLG patterns"""
-        events = []
-        segment = user_profile['segment']
-        
-        for session_num in range(session_count):
-            # Choose session pattern based on user segment
-            pattern_weights = {
-                'champion': {'champion_power_session': 0.4, 'champion_collaboration': 0.35, 'viral_behavior': 0.25},
-                'engaged': {'value_realization': 0.45, 'steady_usage': 0.35, 'premium_exploration': 0.20},
-                'casual': {'basic_usage': 0.5, 'onboarding_exploration': 0.3, 'value_discovery': 0.2},
-                'at_risk': {'declining_session': 0.4, 'frustrated_session': 0.2, 'minimal_engagement': 0.4},
-                'conversion_ready': {'conversion_signal': 0.6, 'value_realization': 0.4}
-            }
-            
-            available_patterns = self.session_patterns.get(segment, self.session_patterns['casual'])
-            weights = pattern_weights.get(segment, {'basic_usage': 1.0})
-            
-            # Select pattern
-            pattern_name = np.random.choice(list(weights.keys()), p=list(weights.values()))
-            event_sequence = available_patterns.get(pattern_name, ['login', 'dashboard_view', 'logout'])
-            
-    def generate_session_events(self, user_profile, session_count=1):
-        """Generate events for a user session following tier-based PLG patterns"""
-        events = []
+    def generate_session_events(self, user_profile, session_count=1, ids=None, reference_time=None, seed=None,
+                                records=None):
+        """Generate events for a user session following tier-based PLG patterns
+        
+        Events are appended to records (a new plg_records.EventRecords by default), which is returned.
+        ids is the dataset's TelemetryIds; a fresh scheme is drawn when omitted. Sessions fall in the
+        30 days before reference_time (default now). Event timestamps are int64 epoch microseconds.
+        With seed, each session draws from its own stream (plg_streams.session_random).
+        """
+        if ids is None:
+            ids = self.new_telemetry_ids()
+        if records is None:
+            records = EventRecords(self.event_columns)
+        reference = np.datetime64(reference_time or datetime.now(), 'us').astype(np.int64).item()
+        reference_day = reference - reference % MICROS_PER_DAY
+        user_index = user_profile['user_index']
+        first_event = len(records)
         tier = user_profile['tier']
-        segment = user_profile['segment']
-        
-        for session_num in range(session_count):
-            # Get tier-specific session patterns
-            tier_patterns = self.tier_session_patterns.get(tier, self.tier_session_patterns['Free'])
-            segment_patterns = tier_patterns.get(segment, {'basic_usage': ['login', 'dashboard_view', 'logout']})
-            
-            # Select pattern randomly from available patterns for this tier/segment
-            if segment_patterns:
-                pattern_name = random.choice(list(segment_patterns.keys()))
-                event_sequence = segment_patterns[pattern_name]
-            else:
-                pattern_name = 'basic_usage'
-                event_sequence = ['login', 'dashboard_view', 'logout']
-            
-            # Generate session timing
-            session_start = datetime.now() - timedelta(days=random.randint(0, 30))
-            session_start = session_start.replace(
-                hour=random.randint(7, 19),  # Business hours + some evening
-                minute=random.randint(0, 59),
-                second=0,
-                microsecond=0
-            )
-            
-            session_id = f'sess_{uuid.uuid4().hex[:12]}'
-            current_time = session_start
+        gap_range = self.get_tier_params(tier)['session_gap']
+        previous = self.random, self.sampler_random
+        try:
+            for session_num in range(session_count):
+                if seed is not None:
+                    self.random = self.sampler_random = session_random(seed, user_index, session_num)
+                self._session_events(user_profile, session_num, ids, reference_day, gap_range, records, first_event)
+        finally:
+            self.random, self.sampler_random = previous
+        return records
+    
+    def _session_events(self, user_profile, session_num, ids, reference_day, gap_range, records, first_event):
+        """Append one session's events to records (the user's events start at row first_event)"""
+        user_index = user_profile['user_index']
+        pattern_name, event_sequence = self.select_session_pattern(user_profile['tier'], user_profile['segment'])
+        
+        # Generate session timing
+        session_start = reference_day - self.random.randint(0, 30) * MICROS_PER_DAY
+        session_start += self.random.randint(7, 19) * MICROS_PER_HOUR  # Business hours + some evening
+        session_start += self.random.randint(0, 59) * MICROS_PER_MINUTE
+        
+        session_id = ids.session_id(user_index, session_num)
+        current_time = session_start
+        
+        # Generate events in sequence
+        for i, event_type in enumerate(event_sequence):
+            if i > 0:
+                # Add realistic time gaps between events based on tier
+                gap_minutes = self.random.uniform(*gap_range)
+                current_time += round(gap_minutes * MICROS_PER_MINUTE)
             
-            # Generate events in sequence
-            for i, event_type in enumerate(event_sequence):
-                if i > 0:
-                    # Add realistic time gaps between events based on tier
-                    gap_ranges = {
-                        'Premium': (0.5, 3.0),    # Fast, efficient users
-                        'Basic': (1.0, 5.0),     # Moderate pacing
-                        'Free': (2.0, 8.0),      # Slower, more exploratory
-                        'Cancelled': (5.0, 15.0) # Hesitant, unfamiliar
-                    }
-                    gap_range = gap_ranges.get(tier, (1.0, 5.0))
-                    gap_minutes = random.uniform(*gap_range)
-                    current_time += timedelta(minutes=gap_minutes)
-                
-                event = self.create_telemetry_event(user_profile, event_type, current_time, session_id, session_start, pattern_name)
-                events.append(event)
-        
-        return events
+            event_id = ids.event_id(current_time, user_index, len(records) - first_event)
+            record, context = self.create_telemetry_event(user_profile, event_type, current_time, session_id,
+                                                          session_start, pattern_name, event_id)
+            records.append(user_profile, record, context)
+    
+    def select_session_pattern(self, tier, segment):
+        """(pattern name, event sequence) drawn from the tier/segment session patterns"""
+        # Get tier-specific session patterns
+        tier_patterns = self.tier_session_patterns.get(tier, self.tier_session_patterns['Free'])
+        segment_patterns = tier_patterns.get(segment, {'basic_usage': ['login', 'dashboard_view', 'logout']})
+        
+        # Select pattern randomly from available patterns for this tier/segment
+        if segment_patterns:
+            pattern_name = self.random.choice(list(segment_patterns.keys()))
+            return pattern_name, segment_patterns[pattern_name]
+        return 'basic_usage', ['login', 'dashboard_view', 'logout']
     
     def calculate_engagement_depth(self, event_type, tier, segment):
         """Calculate engagement depth based on event, tier, and segment"""
-        depth_weights = {
-            'Premium': {
-                'champion': {'surface': 0.05, 'moderate': 0.25, 'deep': 0.70},
-                'engaged': {'surface': 0.10, 'moderate': 0.50, 'deep': 0.40},
-                'casual': {'surface': 0.30, 'moderate': 0.60, 'deep': 0.10},
-                'at_risk': {'surface': 0.70, 'moderate': 0.30, 'deep': 0.00}
-            },
-            'Basic': {
-                'champion': {'surface': 0.10, 'moderate': 0.40, 'deep': 0.50},
-                'engaged': {'surface': 0.20, 'moderate': 0.60, 'deep': 0.20},
-                'casual': {'surface': 0.50, 'moderate': 0.40, 'deep': 0.10},
-                'at_risk': {'surface': 0.80, 'moderate': 0.20, 'deep': 0.00}
-            },
-            'Free': {
-                'conversion_ready': {'surface': 0.15, 'moderate': 0.45, 'deep': 0.40},
-                'engaged': {'surface': 0.30, 'moderate': 0.50, 'deep': 0.20},
-                'casual': {'surface': 0.70, 'moderate': 0.30, 'deep': 0.00},
-                'at_risk': {'surface': 0.90, 'moderate': 0.10, 'deep': 0.00}
-            },
-            'Cancelled': {
-                'at_risk': {'surface': 0.95, 'moderate': 0.05, 'deep': 0.00}
-            }
-        }
-        
-        weights = depth_weights.get(tier, {}).get(segment, {'surface': 0.7, 'moderate': 0.3, 'deep': 0.0})
-        return np.random.choice(list(weights.keys()), p=list(weights.values()))
+        return self.depth_sampler.draw((tier, segment), self.sampler_random)
     
     def get_plg_signals(self, event_type, tier, segment, plg_scenario):
         """Generate PLG behavioral signals based on tier and scenario"""
-        signals = {
-            'premium_feature_exposure': False,
-            'usage_limit_proximity': 'low',
-            'value_realization_event': False,
-            'viral_behavior': False,
-            'expansion_signal': False,
-            'friction_encountered': False,
-            'help_seeking_behavior': False,
-            'churn_risk_indicator': False,
-            'conversion_signal': False
-        }
-        
-        # Premium feature exposure
-        premium_events = ['premium_feature_explore', 'enterprise_trial', 'advanced_analytics', 'api_integration', 'automation_setup']
-        signals['premium_feature_exposure'] = event_type in premium_events
+        bits = self.tier_event_signal_bits.get((tier, event_type))
+        if bits is None:
+            bits = self.event_signal_bits.get(event_type, 0)
+        signals = dict(self.signal_flags[bits])
+        signals['usage_limit_proximity'] = 'low'
         
         # Usage limits (mainly for Free tier)
         if tier == 'Free' and segment == 'conversion_ready':
             if event_type == 'usage_limit_hit':
                 signals['usage_limit_proximity'] = 'exceeded'
             elif event_type in ['core_feature_usage', 'data_export']:
-                signals['usage_limit_proximity'] = random.choice(['medium', 'high'])
-        
-        # Value realization
-        value_events = ['insight_discovery', 'workflow_success', 'share_result', 'success_showcase', 'report_generate']
-        signals['value_realization_event'] = event_type in value_events
-        
-        # Viral behavior
-        viral_events = ['external_demo', 'advanced_sharing', 'thought_leadership', 'referral_program']
-        signals['viral_behavior'] = event_type in viral_events
-        
-        # Expansion signals
-        if tier == 'Free':
-            expansion_events = ['premium_feature_explore', 'pricing_page_view', 'paywall_encounter']
-            signals['expansion_signal'] = event_type in expansion_events
-        elif tier == 'Basic':
-            expansion_events = ['enterprise_trial', 'team_management_view', 'api_exploration', 'advanced_feature_usage']
-            signals['expansion_signal'] = event_type in expansion_events
-        
-        # Friction indicators
-        friction_events = ['error_event', 'feature_abandon', 'payment_issue_check', 'support_ticket_create']
-        signals['friction_encountered'] = event_type in friction_events
-        
-        # Help seeking
-        help_events = ['help_search', 'support_ticket_create', 'account_reactivation_view']
-        signals['help_seeking_behavior'] = event_type in help_events
-        
-        # Churn risk
-        churn_events = ['cost_review', 'competitor_comparison', 'declining_usage', 'data_export_final']
-        signals['churn_risk_indicator'] = event_type in churn_events
-        
-        # Conversion signals (Free users showing buying intent)
-        if tier == 'Free':
-            conversion_events = ['usage_limit_hit', 'premium_feature_explore', 'pricing_page_view']
-            signals['conversion_signal'] = event_type in conversion_events
+                signals['usage_limit_proximity'] = self.random.choice(['medium', 'high'])
         
         return signals
     
-    def create_telemetry_event(self, user_profile, event_type, timestamp, session_id, session_start, session_pattern):
-        """Create a comprehensive telemetry event with tier-based PLG fields"""
-        event_id = f'evt_{timestamp.strftime("%Y%m%d")}_{uuid.uuid4().hex[:6]}'
-        
+    def create_telemetry_event(self, user_profile, event_type, timestamp, session_id, session_start, session_pattern,
+                               event_id):
+        """Create a comprehensive telemetry event with tier-based PLG fields
+        
+        Returns (record, context): record holds the event's values for plg_records.record_columns
+        (the event columns not copied from user_profile, see EventRecords.append), context the
+        tier-specific fields set by add_tier_specific_context.
+        """
+
         # Calculate session duration
-        session_duration = (timestamp - session_start).total_seconds() / 60
+        session_duration = (timestamp - session_start) / MICROS_PER_MINUTE
+        hour = timestamp // MICROS_PER_HOUR % 24
+        weekday = (timestamp // MICROS_PER_DAY + 3) % 7  # 1970-01-01 was a Thursday
         
         # Get business metrics
         business_metrics = self.calculate_business_metrics(user_profile, event_type, session_start)
@@ -737,359 +856,1071 @@ class PLGTelemetryGenerator:
         # Get PLG signals based on tier and scenario
         plg_signals = self.get_plg_signals(event_type, user_profile['tier'], user_profile['segment'], user_profile['plg_scenario'])
         
-        # Build comprehensive event
-        event = {
-            # Core event fields
-            'event_id': event_id,
-            'user_id': user_profile['user_id'],
-            'session_id': session_id,
-            'event_type': event_type,
-            'timestamp': timestamp.isoformat() + 'Z',
-            'session_start_time': session_start.isoformat() + 'Z',
-            'session_duration_minutes': round(session_duration, 2),
+        # Build comprehensive event, in EVENT_COLUMNS order
+        record = (
+            # Core event fields (user_id comes from the profile)
+            event_id,
+            session_id,
+            event_type,
+            timestamp,
+            session_start,
+            round(session_duration, 2),
             
             # Product context
-            'product_name': random.choice(self.product_names),
-            'feature_name': self.feature_mapping.get(event_type, 'General Feature'),
-            'page_url': f'/app/{event_type.replace("_", "-")}',
-            'device_type': random.choice(self.device_types),
-            'browser_name': random.choice(self.browsers),
-            'operating_system': random.choice(self.operating_systems),
-            'response_time_ms': self.get_response_time_by_tier(user_profile['tier'], event_type),
+            self.random.choice(self.product_names),
+            self.feature_mapping.get(event_type, 'General Feature'),
+            f'/app/{event_type.replace("_", "-")}',
+            self.random.choice(self.device_types),
+            self.random.choice(self.browsers),
+            self.random.choice(self.operating_systems),
+            self.get_response_time_by_tier(user_profile['tier'], event_type),
             
             # Geographic data
-            'geography_country': 'US',
-            'geography_region': random.choice(self.regions),
-            'geography_city': random.choice(self.cities),
-            'ip_address': f'192.168.{random.randint(1, 255)}.xxx',
+            'US',
+            self.random.choice(self.regions),
+            self.random.choice(self.cities),
+            f'192.168.{self.random.randint(1, 255)}.xxx',
             
-            # User profile data (including tier)
-            'contact_external_id': user_profile['external_id'],
-            'user_email': user_profile['email'],
-            'user_first_name': user_profile['first_name'],
-            'user_last_name': user_profile['last_name'],
-            'user_title': user_profile['title'],
-            'user_department': user_profile['department'],
-            'subscription_tier': user_profile['tier'],  # KEY FIELD for tier tracking
+            # User profile data (including tier), user_segment and plg_scenario are stored per user
             
             # PLG behavioral intelligence (tier-aware)
-            'user_segment': user_profile['segment'],
-            'plg_scenario': user_profile['plg_scenario'],  # CAC/Conversion, PLG/Upsell, etc.
-            'session_type': session_pattern,
-            'engagement_depth': self.calculate_engagement_depth(event_type, user_profile['tier'], user_profile['segment']),
-            'feature_sophistication': self.get_feature_sophistication(event_type),
+            session_pattern,
+            self.calculate_engagement_depth(event_type, user_profile['tier'], user_profile['segment']),
+            self.get_feature_sophistication(event_type),
             
             # Business context
-            'business_hours_indicator': 8 <= timestamp.hour <= 18 and timestamp.weekday() < 5,
-            'mobile_usage_indicator': random.choice(self.device_types) == 'mobile',
-            'weekend_usage_indicator': timestamp.weekday() >= 5,
+            8 <= hour <= 18 and weekday < 5,
+            self.random.choice(self.device_types) == 'mobile',
+            weekday >= 5,
             
             # PLG signals (tier-specific)
-            'premium_feature_exposure': plg_signals['premium_feature_exposure'],
-            'usage_limit_proximity': plg_signals['usage_limit_proximity'],
-            'value_realization_event': plg_signals['value_realization_event'],
-            'viral_behavior': plg_signals['viral_behavior'],
-            'expansion_signal': plg_signals['expansion_signal'],
-            'conversion_signal': plg_signals['conversion_signal'],
+            plg_signals['premium_feature_exposure'],
+            plg_signals['usage_limit_proximity'],
+            plg_signals['value_realization_event'],
+            plg_signals['viral_behavior'],
+            plg_signals['expansion_signal'],
+            plg_signals['conversion_signal'],
             
             # Risk indicators
-            'friction_encountered': plg_signals['friction_encountered'],
-            'help_seeking_behavior': plg_signals['help_seeking_behavior'],
-            'churn_risk_indicator': plg_signals['churn_risk_indicator'],
-            'feature_adoption_success': not plg_signals['friction_encountered'],
+            plg_signals['friction_encountered'],
+            plg_signals['help_seeking_behavior'],
+            plg_signals['churn_risk_indicator'],
+            not plg_signals['friction_encountered'],
             
             # Revenue & subscription metrics (tier-based)
-            'current_plan_tier': business_metrics['current_plan_tier'],
-            'mrr_contribution': business_metrics['mrr_contribution'],
-            'arr_contribution': business_metrics['arr_contribution'],
-            'customer_lifetime_value': business_metrics['customer_lifetime_value'],
-            'payment_status': self.get_payment_status(user_profile['tier']),
+            business_metrics['current_plan_tier'],
+            business_metrics['mrr_contribution'],
+            business_metrics['arr_contribution'],
+            business_metrics['customer_lifetime_value'],
+            self.get_payment_status(user_profile['tier']),
             
             # Account health metrics (tier-adjusted)
-            'account_health_score': business_metrics['account_health_score'],
-            'engagement_score': business_metrics['engagement_score'],
-            'seat_utilization': business_metrics['seat_utilization'],
-            'storage_utilization': business_metrics['storage_utilization'],
-            'integration_count': business_metrics['integration_count'],
-            'support_ticket_count': business_metrics['support_ticket_count'],
+            business_metrics['account_health_score'],
+            business_metrics['engagement_score'],
+            business_metrics['seat_utilization'],
+            business_metrics['storage_utilization'],
+            business_metrics['integration_count'],
+            business_metrics['support_ticket_count'],
             
             # Predictive features for Einstein Model Builder (tier-aware)
-            'churn_risk_score': self.calculate_churn_risk_score(user_profile['tier'], user_profile['segment']),
-            'conversion_propensity': self.calculate_conversion_propensity(user_profile['tier'], user_profile['segment'], event_type),
-            'upsell_propensity': self.calculate_upsell_propensity(user_profile['tier'], user_profile['segment'], event_type),
-            'retention_probability': self.calculate_retention_probability(user_profile['tier'], user_profile['segment']),
+            self.calculate_churn_risk_score(user_profile['tier'], user_profile['segment']),
+            self.calculate_conversion_propensity(user_profile['tier'], user_profile['segment'], event_type),
+            self.calculate_upsell_propensity(user_profile['tier'], user_profile['segment'], event_type),
+            self.calculate_retention_probability(user_profile['tier'], user_profile['segment']),
             
             # Agentforce context (scenario-specific)
-            'next_best_action': self.get_next_best_action_by_scenario(user_profile['plg_scenario'], event_type),
-            'intervention_priority': self.get_intervention_priority_by_tier(user_profile['tier'], user_profile['segment'], event_type),
+            self.get_next_best_action_by_scenario(user_profile['plg_scenario'], event_type),
+            self.get_intervention_priority_by_tier(user_profile['tier'], user_profile['segment'], event_type),
             
             # Metadata
-            'is_demo_data': True,
-            'source_system': 'plg_telemetry_generator_v2.0_tier_aware',
-            'custom_properties': json.dumps({
-                'session_pattern': session_pattern,
-                'plg_scenario': user_profile['plg_scenario'],
-                'tier_transition_candidate': self.is_tier_transition_candidate(user_profile, event_type),
-                'cohort': f'2024-{random.randint(1, 12):02d}',
-                'experiment_variant': random.choice(['control', 'variant_a', 'variant_b'])
-            })
-        }
+            True,
+            'plg_telemetry_generator_v2.0_tier_aware'
+        )
+        
+        # Custom properties, in CUSTOM_PROPERTY_KEYS order
+        properties = (session_pattern, user_profile['plg_scenario'],
+                      self.is_tier_transition_candidate(user_profile, event_type),
+                      f'2024-{self.random.randint(1, 12):02d}', self.random.choice(['control', 'variant_a', 'variant_b']))
+        if self.properties_format == 'columns':
+            record += properties
+        else:
+            record += (self.properties_json(properties),)
         
         # Add tier-specific event context
-        self.add_tier_specific_context(event, event_type, user_profile)
+        context = {}
+        self.add_tier_specific_context(context, event_type, user_profile)
         
-        return event
+        return record, context
+    
+    def properties_json(self, properties):
+        """custom_properties JSON for a tuple of property values; each distinct tuple is serialized once"""
+        text = self.properties_json_cache.get(properties)
+        if text is None:
+            text = self.properties_json_cache[properties] = json.dumps(dict(zip(CUSTOM_PROPERTY_KEYS, properties)))
+        return text
     
-    def add_tier_specific_context(self, event, event_type, user_profile):
-        """Add tier-specific context to events"""
+    def get_response_time_by_tier(self, tier, event_type):
+        """Calculate response time based on tier (Premium users get better performance)"""
+        base_range = self.response_time_ranges.get(event_type, (300, 1800))
+        multiplier = self.get_tier_params(tier)['response_multiplier']
+        base_time = self.random.randint(*base_range)
+        return int(base_time * multiplier)
+    
+    def get_payment_status(self, tier):
+        """Get payment status based on tier"""
+        if tier in ['Basic', 'Premium']:
+            return self.payment_status_sampler.draw(self.sampler_random)
+        elif tier == 'Free':
+            return 'n/a'
+        else:  # Cancelled
+            return 'cancelled'
+    
+    def calculate_churn_risk_score(self, tier, segment):
+        """Calculate churn risk based on tier and segment"""
+        base_score = self.get_scenario_params(tier, segment)['churn_base']
+        return base_score + self.random.randint(-10, 15)
+    
+    def calculate_conversion_propensity(self, tier, segment, event_type):
+        """Calculate conversion propensity (Free→Paid or Basic→Premium)"""
+        params = self.get_scenario_params(tier, segment)
+        if params['conversion_base'] is None:
+            return 0  # Premium and Cancelled users don't convert up
+        
+        boost = self.conversion_boosts.get((tier, event_type), 0)
+        return min(95, params['conversion_base'] + boost + self.random.randint(*params['conversion_noise']))
+    
+    def calculate_upsell_propensity(self, tier, segment, event_type):
+        """Calculate upsell propensity (Basic→Premium)"""
+        params = self.get_scenario_params(tier, segment)
+        if params['upsell_base'] is None:
+            return 0  # Only Basic users can upsell to Premium
+        
+        boost = self.upsell_boosts.get((tier, event_type), 0)
+        return min(95, params['upsell_base'] + boost + self.random.randint(*params['upsell_noise']))
+    
+    def calculate_retention_probability(self, tier, segment):
+        """Calculate retention probability"""
+        base_score = self.get_scenario_params(tier, segment)['retention_base']
+        return base_score + self.random.randint(-10, 10)
+    
+    def get_next_best_action_by_scenario(self, plg_scenario, event_type):
+        """Get next best action based on PLG scenario"""
+        actions = self.scenario_actions.get(plg_scenario, ['standard_engagement'])
+        return self.random.choice(actions)
+    
+    def get_intervention_priority_by_tier(self, tier, segment, event_type):
+        """Calculate intervention priority based on tier, segment, and event"""
+        priority = self.intervention_priorities.get((tier, segment, event_type))
+        if priority is None:
+            priority = self.intervention_priority_rule(tier, segment, event_type)
+        return priority
+    
+    def intervention_priority_rule(self, tier, segment, event_type):
+        """Intervention priority rules (compiled into intervention_priorities)"""
+        # High priority conditions
+        if segment == 'at_risk' and tier in ['Basic', 'Premium']:
+            return 'high'  # Paying customers at risk = high priority
+        if tier == 'Free' and segment == 'conversion_ready' and event_type in ['usage_limit_hit', 'pricing_page_view']:
+            return 'high'  # Hot conversion leads = high priority
+        if event_type in ['support_ticket_create', 'payment_issue_check', 'competitor_comparison']:
+            return 'high'  # Critical events = high priority
+        
+        # Medium priority conditions
+        if tier in ['Basic', 'Premium'] and segment in ['engaged', 'casual']:
+            return 'medium'  # Paying customers = medium priority
+        if tier == 'Free' and segment in ['conversion_ready', 'engaged']:
+            return 'medium'  # Potential converts = medium priority
+        
+        # Low priority (everything else)
+        return 'low'
+    
+    def is_tier_transition_candidate(self, user_profile, event_type):
+        """Determine if user is a candidate for tier transition"""
+        return self.get_scenario_params(user_profile['tier'], user_profile['segment'])['transition_candidate']
+    
+    def tier_transition_rule(self, tier, segment):
+        """Tier transition candidate rules (compiled into scenario_params)"""
+        if tier == 'Free' and segment == 'conversion_ready':
+            return 'free_to_paid_candidate'
+        elif tier == 'Basic' and segment == 'champion':
+            return 'basic_to_premium_candidate'
+        elif segment == 'at_risk' and tier in ['Basic', 'Premium']:
+            return 'churn_risk_candidate'
+        elif tier == 'Cancelled':
+            return 'winback_candidate'
+        else:
+            return 'stable'
+    
+    def add_tier_specific_context(self, context, event_type, user_profile):
+        """Add tier-specific context fields for an event to the context dict"""
         tier = user_profile['tier']
         
         # Free tier specific fields
         if tier == 'Free':
             if event_type == 'usage_limit_hit':
-                event.update({
-                    'limit_type': random.choice(['reports', 'data_export', 'api_calls', 'storage']),
-                    'usage_percentage': random.randint(95, 120),  # 95-120% of limit
+                context.update({
+                    'limit_type': self.random.choice(['reports', 'data_export', 'api_calls', 'storage']),
+                    'usage_percentage': self.random.randint(95, 120),  # 95-120% of limit
                     'free_tier_limit': True,
                     'upgrade_prompt_shown': True
                 })
             elif event_type == 'pricing_page_view':
-                event.update({
-                    'plans_viewed': random.choice([['Basic'], ['Premium'], ['Basic', 'Premium']]),
-                    'time_on_page_seconds': random.randint(30, 300),
-                    'conversion_intent_score': random.randint(60, 95)
+                context.update({
+                    'plans_viewed': self.random.choice([['Basic'], ['Premium'], ['Basic', 'Premium']]),
+                    'time_on_page_seconds': self.random.randint(30, 300),
+                    'conversion_intent_score': self.random.randint(60, 95)
                 })
         
         # Basic tier specific fields
         elif tier == 'Basic':
             if event_type == 'enterprise_trial':
-                event.update({
-                    'trial_feature': random.choice(['advanced_analytics', 'api_access', 'team_management', 'custom_branding']),
-                    'trial_days_remaining': random.randint(1, 14),
+                context.update({
+                    'trial_feature': self.random.choice(['advanced_analytics', 'api_access', 'team_management', 'custom_branding']),
+                    'trial_days_remaining': self.random.randint(1, 14),
                     'premium_upgrade_eligible': True
                 })
             elif event_type == 'team_management_view':
-                event.update({
-                    'current_team_size': random.randint(3, 15),
-                    'team_limit_approached': random.choice([True, False]),
+                context.update({
+                    'current_team_size': self.random.randint(3, 15),
+                    'team_limit_approached': self.random.choice([True, False]),
                     'premium_team_features_explored': True
                 })
         
         # Premium tier specific fields
         elif tier == 'Premium':
             if event_type == 'automation_setup':
-                event.update({
-                    'automation_type': random.choice(['data_sync', 'report_scheduling', 'alert_system', 'workflow_trigger']),
+                context.update({
+                    'automation_type': self.random.choice(['data_sync', 'report_scheduling', 'alert_system', 'workflow_trigger']),
                     'complexity_level': 'advanced',
                     'premium_feature_utilized': True
                 })
             elif event_type == 'api_integration':
-                event.update({
-                    'api_calls_this_month': random.randint(1000, 5000),
-                    'integration_type': random.choice(['crm', 'marketing_automation', 'data_warehouse', 'bi_tool']),
+                context.update({
+                    'api_calls_this_month': self.random.randint(1000, 5000),
+                    'integration_type': self.random.choice(['crm', 'marketing_automation', 'data_warehouse', 'bi_tool']),
                     'enterprise_grade': True
                 })
         
         # Cancelled tier specific fields
         elif tier == 'Cancelled':
             if event_type == 'account_reactivation_view':
-                event.update({
-                    'days_since_cancellation': random.randint(1, 90),
-                    'cancellation_reason': random.choice(['cost', 'feature_gap', 'competitor', 'internal_change']),
+                context.update({
+                    'days_since_cancellation': self.random.randint(1, 90),
+                    'cancellation_reason': self.random.choice(['cost', 'feature_gap', 'competitor', 'internal_change']),
                     'winback_offer_eligible': True
                 })
             elif event_type == 'data_export_final':
-                event.update({
+                context.update({
                     'export_type': 'account_closure',
-                    'data_retention_days': random.randint(7, 30),
+                    'data_retention_days': self.random.randint(7, 30),
                     'reactivation_window': True
                 })
         
         # Add conversion value based on tier and event
-        if event_type in ['insight_discovery', 'workflow_success', 'report_generate']:
-            value_ranges = {
-                'Premium': (200, 1000),
-                'Basic': (50, 400), 
-                'Free': (10, 100),
-                'Cancelled': (0, 20)
-            }
-            range_values = value_ranges.get(tier, (10, 100))
-            event['conversion_value'] = random.randint(*range_values)
+        if event_type in self.value_events:
+            context['conversion_value'] = self.random.randint(*self.get_tier_params(tier)['value_range'])
         
         # Add error context for friction events
         if event_type == 'error_event':
-            event.update({
-                'error_code': random.choice(['ERR_404', 'ERR_500', 'ERR_TIMEOUT', 'ERR_AUTH', 'ERR_LIMIT']),
-                'error_message': random.choice([
-                    'Resource not found', 'Internal server error', 'Request timeout', 
-                    'Authentication failed', 'Usage limit exceeded'
-                ]),
-                'tier_related_error': tier == 'Free' and random.choice([True, False])
+            context.update({
+                'error_code': self.random.choice(self.error_codes),
+                'error_message': self.random.choice(self.error_messages),
+                'tier_related_error': tier == 'Free' and self.random.choice([True, False])
             })
         
         # Add file operation context
-        if event_type in ['data_export', 'data_export_final']:
-            size_ranges = {
-                'Premium': (5000000, 50000000),  # 5-50MB
-                'Basic': (1000000, 10000000),    # 1-10MB
-                'Free': (100000, 1000000),       # 100KB-1MB
-                'Cancelled': (0, 100000)         # Up to 100KB
-            }
-            range_values = size_ranges.get(tier, (100000, 1000000))
-            event['file_size_bytes'] = random.randint(*range_values)
+        if event_type in self.file_events:
+            context['file_size_bytes'] = self.random.randint(*self.get_tier_params(tier)['file_size_range'])
     
-    def generate_dataset(self, total_records=1000):
-        """Generate the complete dataset with tier-based PLG patterns"""
-        print(f"Generating {total_records} tier-aware PLG telemetry records...")
+    def generate_dataset(self, total_records=1000, engine='scalar', seed=None, reference_time=None, workers=None,
+                         compact=False, summary=None):
+        """Generate the complete dataset with tier-based PLG patterns
+        
+        engine='scalar' generates one event at a time into a columnar buffer (see plg_records); with
+        seed each user and session draws from its own stream (see plg_streams), otherwise from the
+        global random state.
+        engine='batch' generates whole columns per block of users with NumPy (see plg_batch)
+        and is seeded from seed, or from the global NumPy state when seed is None.
+        Any one user of a seeded run can be regenerated alone with events_for_user.
+        workers=N shards the batch engine over N processes (see plg_parallel); output for a
+        given seed and reference_time is identical for every N, and to a run without workers.
+        Sessions fall in the 30 days before reference_time (default now); timestamp columns are
+        datetime64[us] and are formatted as ISO 'Z' strings only when written (see plg_writers).
+        compact=True returns label columns as pandas categoricals and scores in narrow numeric
+        dtypes (see plg_batch.compact_frame); values are unchanged.
+        If summary is a plg_summary.DatasetSummary it is filled with the report statistics as
+        events are generated.
+        """
+        self.check_engine(engine, workers)
+        if summary is None:
+            summary = DatasetSummary()
+        if workers:
+            return self.generate_dataset_parallel(total_records, workers, seed=seed, reference_time=reference_time,
+                                                  compact=compact, summary=summary)
+        if engine == 'batch':
+            return self.generate_dataset_batch(total_records, seed=seed, reference_time=reference_time, compact=compact,
+                                               summary=summary)
         
-        # Calculate number of users needed (average events per user varies by tier)
-        tier_session_counts = {
-            'Premium': random.randint(4, 8),    # Heavy users
-            'Basic': random.randint(2, 5),      # Moderate users
-            'Free': random.randint(1, 3),       # Light users
-            'Cancelled': 1                      # Minimal activity
-        }
+        print(f"Generating {total_records} tier-aware PLG telemetry records...")
         
-        avg_events_per_user = 4
-        num_users = total_records // avg_events_per_user
+        num_users = total_records // AVG_EVENTS_PER_USER
         
-        all_events = []
-        tier_distribution = []
-        scenario_distribution = []
+        records = EventRecords(self.event_columns)
         
-        for user_idx in range(num_users):
-            # Generate user profile with tier
-            user_profile = self.generate_user_profile(user_idx)
-            tier_distribution.append(user_profile['tier'])
-            scenario_distribution.append(user_profile['plg_scenario'])
-            
-            # Determine number of sessions based on tier and segment
-            base_sessions = tier_session_counts.get(user_profile['tier'], 2)
-            
-            # Segment adjustments
-            if user_profile['segment'] == 'champion':
-                session_count = base_sessions + random.randint(1, 2)
-            elif user_profile['segment'] == 'at_risk':
-                session_count = max(1, base_sessions - random.randint(1, 2))
-            else:
-                session_count = base_sessions
-            
-            # Generate events for this user
-            user_events = self.generate_session_events(user_profile, session_count)
-            all_events.extend(user_events)
-            
-            if len(all_events) >= total_records:
-                break
+        for user_profile in self.iter_user_events(total_records, reference_time, seed, records):
+            summary.add_user(user_profile['tier'], user_profile['plg_scenario'],
+                             self.calculate_mrr_contribution(user_profile['tier']))
         
         # Trim to exact count and sort by timestamp
-        all_events = all_events[:total_records]
-        all_events.sort(key=lambda x: x['timestamp'])
+        records = records.split(total_records)
+        with self.profiler.stage('dataframe'):
+            event_df = records.to_frame()
+        with self.profiler.stage('sort'):
+            event_df = sort_events_by_time(event_df)
+        if compact:
+            with self.profiler.stage('compact'):
+                event_df = compact_frame(event_df, self.compact_category_dtypes())
+        self.profiler.count('events', len(event_df))
+        summary.add_frame(event_df)
+        
+        print(f"Generated {len(records)} events for {num_users} users")
+        
+        # Event-level analysis
+        self.print_distributions(summary.tiers, summary.scenarios, summary.segments_by_frequency(), len(records))
         
-        print(f"Generated {len(all_events)} events for {num_users} users")
+        return event_df
+    
+    def enable_profiling(self, profiler=None):
+        """Time this generator's stages with profiler (default: a new plg_profiling.StageProfiler) and start it
+        
+        PROFILED_METHODS (and PROFILED_SESSION_METHODS, for a sample of users) get per-call timers on
+        this instance only; coarse stages
+        (generate, dataframe, sort, write) are timed where they run. Returns the profiler, whose
+        report() / print_report() give the structured report at the end of the run.
+        """
+        self.profiler = profiler or StageProfiler()
+        self.profiler.instrument(self, PROFILED_METHODS)
+        self.profiler.instrument_sampled(self, 'generate_session_events', PROFILED_SESSION_METHODS,
+                                         PROFILE_SAMPLE_EVERY)
+        self.profiler.start()
+        return self.profiler
+    
+    def __getstate__(self):
+        """Pickle without the profiler or its method wrappers (worker processes do not profile)"""
+        state = dict(self.__dict__)
+        for method in list(PROFILED_METHODS) + list(PROFILED_SESSION_METHODS):
+            state.pop(method, None)
+        state['profiler'] = NULL_PROFILER
+        # Modules do not pickle; __setstate__ restores the global source
+        state.pop('random', None)
+        state['sampler_random'] = None
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.random = random
+    
+    def check_engine(self, engine, workers=None):
+        """Validate the engine name and that multi-process generation and Markov sessions use the batch engine"""
+        if engine not in ('scalar', 'batch'):
+            raise ValueError(f"Unknown engine '{engine}' (expected 'scalar' or 'batch')")
+        if workers is not None and engine != 'batch':
+            # Only batch-engine shards are generated in worker processes (see plg_parallel)
+            raise ValueError("workers requires engine='batch'")
+        if self.session_model == 'markov' and engine != 'batch':
+            # Chains are sampled for whole blocks of sessions at once (see plg_markov)
+            raise ValueError("session_model='markov' requires engine='batch'")
+    
+    def compact_category_dtypes(self):
+        """CategoricalDtype of every compact label column, compiled once per generator
+        
+        These are the batch engine's categories, so scalar and batch compact frames concatenate.
+        """
+        if self._category_dtypes is None:
+            self._category_dtypes = BatchTelemetryEngine(self).category_dtypes
+        return self._category_dtypes
+    
+    def draw_tier_session_counts(self, random_source=random):
+        """Base number of sessions per user for each tier (drawn once per dataset from random_source)"""
+        return {tier: random_source.randint(low, high) if low < high else low
+                for tier, (low, high) in self.tier_session_ranges.items()}
+    
+    def get_session_count(self, user_profile, tier_session_counts):
+        """Number of sessions for a user based on tier and segment"""
+        base_sessions = tier_session_counts.get(user_profile['tier'], 2)
+        
+        # Segment adjustments
+        if user_profile['segment'] == 'champion':
+            return base_sessions + self.random.randint(1, 2)
+        elif user_profile['segment'] == 'at_risk':
+            return max(1, base_sessions - self.random.randint(1, 2))
+        return base_sessions
+    
+    def max_events_per_user(self):
+        """Upper bound on events per user: most sessions (champion bonus included) times the longest session"""
+        max_sessions = max(high for low, high in self.tier_session_ranges.values()) + 2
+        max_pattern = max(len(events) for tier_patterns in self.tier_session_patterns.values()
+                          for segment_patterns in tier_patterns.values() for events in segment_patterns.values())
+        if self.session_model == 'markov':
+            max_pattern = max(max_pattern, MAX_SESSION_EVENTS)
+        return max_sessions * max(max_pattern, 3)
+    
+    def new_telemetry_ids(self, random_source=random, num_users=None):
+        """Event/session ID scheme for one dataset, keyed from random_source (NumPy Generator or random module)
+        
+        With num_users, raises ValueError unless the configured ID widths keep every ID unique.
+        """
+        ids = TelemetryIds.from_rng(random_source, event_chars=self.event_id_chars, session_chars=self.session_id_chars)
+        if num_users is not None:
+            ids.check_capacity(num_users, self.max_events_per_user())
+        return ids
+    
+    def iter_user_events(self, total_records, reference_time=None, seed=None, records=None):
+        """Append each user's events to records (plg_records.EventRecords) and yield its profile, until
+        at least total_records events exist
         
-        # Print distributions
-        from collections import Counter
-        tier_counts = Counter(tier_distribution)
-        scenario_counts = Counter(scenario_distribution)
+        With seed, every user and session draws from its own stream (see generate_user_events);
+        otherwise all draws come from the global random state in order.
+        """
+        # Calculate number of users needed (average events per user varies by tier)
+        num_users = total_records // AVG_EVENTS_PER_USER
+        tier_session_counts, ids = self.scalar_dataset_draws(seed, num_users)
+        # Resolved once so every user shares the same clock
+        reference_time = reference_time or datetime.now()
+        
+        if records is None:
+            records = EventRecords(self.event_columns)
+        
+        generated = 0
+        for user_idx in range(num_users):
+            user_events = len(records)
+            user_profile = self.generate_user_events(user_idx, tier_session_counts, ids, reference_time, seed, records)
+            generated += len(records) - user_events
+            yield user_profile
+            
+            if generated >= total_records:
+                break
+    
+    def scalar_dataset_draws(self, seed=None, num_users=None):
+        """(tier session counts, TelemetryIds) of a scalar dataset, from seed's dataset stream or the global state"""
+        random_source = random if seed is None else dataset_random(seed)
+        return self.draw_tier_session_counts(random_source), self.new_telemetry_ids(random_source, num_users)
+    
+    def generate_user_events(self, user_index, tier_session_counts, ids, reference_time=None, seed=None, records=None):
+        """Append one user's events to records (plg_records.EventRecords) and return its profile
+        
+        With seed, its profile and session count come from the user's own stream and each session
+        from its own (see plg_streams), so they do not depend on any other user.
+        """
+        previous = self.random, self.sampler_random
+        if seed is not None:
+            self.random = self.sampler_random = user_random(seed, user_index)
+        try:
+            user_profile = self.generate_user_profile(user_index)
+            session_count = self.get_session_count(user_profile, tier_session_counts)
+        finally:
+            self.random, self.sampler_random = previous
+        self.generate_session_events(user_profile, session_count, ids, reference_time, seed, records)
+        return user_profile
+    
+    def generate_dataset_batch(self, total_records=1000, seed=None, reference_time=None, compact=False, summary=None):
+        """Vectorized generate_dataset: same columns and distributions, built column-wise with NumPy"""
+        print(f"Generating {total_records} tier-aware PLG telemetry records (batch engine)...")
+        
+        if seed is None:
+            seed = np.random.randint(0, 2**31 - 1)
+        
+        num_users = total_records // AVG_EVENTS_PER_USER
+        
+        with self.profiler.stage('compile_tables'):
+            engine = BatchTelemetryEngine(self)
+        if num_users == 0:
+            # Fewer records than one user's worth: no blocks at all
+            print(f"Generated 0 events for {num_users} users")
+            return empty_frame(self.properties_format)
+        with self.profiler.stage('generate'):
+            users, cols = engine.generate(total_records, num_users, seed, reference_time)
+        with self.profiler.stage('sort'):
+            cols = engine.sort_by_time(cols)
+        self.profiler.count('users', len(users['tier']))
+        self.profiler.count('events', len(cols['timestamp']))
+        if summary is None:
+            summary = DatasetSummary()
+        summary.add_block(engine, users, cols)
+        
+        print(f"Generated {len(cols['timestamp'])} events for {num_users} users")
+        
+        self.print_distributions(summary.tiers, summary.scenarios, summary.segments_by_frequency(),
+                                 len(cols['timestamp']))
+        
+        with self.profiler.stage('dataframe'):
+            return engine.to_frame(cols, compact)
+    
+    def generate_dataset_parallel(self, total_records=1000, workers=2, seed=None, reference_time=None, compact=False,
+                                  summary=None):
+        """Batch generate_dataset sharded by user range over a process pool"""
+        print(f"Generating {total_records} tier-aware PLG telemetry records (batch engine, {workers} workers)...")
+        
+        num_users = total_records // AVG_EVENTS_PER_USER
+        
+        runner = ShardedTelemetryRunner(self, workers, seed, reference_time)
+        with self.profiler.stage('generate'):
+            users, cols, df = runner.generate(total_records, num_users, compact)
+        if not cols:
+            print(f"Generated 0 events for {num_users} users")
+            return df
+        self.profiler.count('users', len(users['tier']))
+        self.profiler.count('events', len(df))
+        if summary is None:
+            summary = DatasetSummary()
+        summary.add_block(runner.engine, users, cols)
+        
+        print(f"Generated {len(df)} events for {num_users} users")
+        
+        self.print_distributions(summary.tiers, summary.scenarios, summary.segments_by_frequency(), len(df))
+        
+        return df
+    
+    def events_for_user(self, user_index, total_records, seed, reference_time=None, engine='scalar'):
+        """DataFrame of one user's events in the seeded dataset of total_records, sorted by timestamp
+        
+        Only that user is generated (scalar engine) or only its block of users (batch engine, which
+        matches every batch run of the seed, streamed or sharded). Pass the reference_time of the run
+        being reproduced. The dataset stops at the user that reaches total_records and trims that
+        user's last events, which this does not repeat.
+        """
+        self.check_engine(engine)
+        num_users = total_records // AVG_EVENTS_PER_USER
+        if not 0 <= user_index < num_users:
+            raise ValueError(f"user_index must be in [0, {num_users}) for {total_records} records (got {user_index})")
+        reference_time = reference_time or datetime.now()
+        
+        if engine == 'batch':
+            runner = ShardedTelemetryRunner(self, 1, seed, reference_time)
+            return runner.engine.to_frame(runner.user_block(user_index, num_users))
+        tier_session_counts, ids = self.scalar_dataset_draws(seed, num_users)
+        records = EventRecords(self.event_columns)
+        self.generate_user_events(user_index, tier_session_counts, ids, reference_time, seed, records)
+        return sort_events_by_time(records.to_frame())
+    
+    def iter_dataset_chunks(self, total_records=1000, chunk_size=100000, engine='scalar', seed=None,
+                            reference_time=None, summary=None):
+        """Yield the dataset as DataFrames of at most chunk_size events, each sorted by timestamp
+        
+        Peak memory is bounded by chunk_size (plus one block of users for the batch engine) rather than
+        total_records, and the events are the same for any chunk_size. Chunks follow generation
+        (user) order; plg_writers.write_chunks(time_ordered=True) merges them into global time order.
+        If summary is a plg_summary.DatasetSummary it is filled with the report statistics chunk by chunk.
+        """
+        if summary is None:
+            summary = DatasetSummary()
+        
+        self.check_engine(engine)
+        if engine == 'batch':
+            yield from self._iter_batch_chunks(total_records, chunk_size, seed, reference_time, summary)
+            return
+        
+        pending = EventRecords(self.event_columns)
+        emitted = 0
+        for user_profile in self.iter_user_events(total_records, reference_time, seed, pending):
+            summary.add_user(user_profile['tier'], user_profile['plg_scenario'],
+                             self.calculate_mrr_contribution(user_profile['tier']))
+            while len(pending) >= chunk_size and emitted + chunk_size <= total_records:
+                chunk = pending.split(chunk_size)
+                emitted += len(chunk)
+                yield self._events_to_frame(chunk, summary)
+        
+        pending = pending.split(total_records - emitted)
+        if len(pending):
+            yield self._events_to_frame(pending, summary)
+    
+    def _events_to_frame(self, records, summary):
+        """Time-sorted DataFrame of plg_records.EventRecords in the declared output schema (plg_schema)"""
+        with self.profiler.stage('dataframe'):
+            df = records.to_frame()
+        with self.profiler.stage('sort'):
+            df = sort_events_by_time(df)
+        self.profiler.count('events', len(df))
+        summary.add_frame(df)
+        return df
+    
+    def _iter_batch_chunks(self, total_records, chunk_size, seed, reference_time, summary):
+        """Batch-engine chunks: fixed blocks of users (plg_batch BLOCK_USERS) re-cut to exactly chunk_size"""
+        if seed is None:
+            seed = np.random.randint(0, 2**31 - 1)
+        engine = BatchTelemetryEngine(self)
+        num_users = total_records // AVG_EVENTS_PER_USER
+        blocks = engine.iter_blocks(total_records, num_users, seed, reference_time)
+        yield from self._chunk_blocks(engine, blocks, chunk_size, summary)
+    
+    def _chunk_blocks(self, engine, blocks, chunk_size, summary, identities=None):
+        """Re-cut batch-engine (users, cols) blocks into time-sorted DataFrames of chunk_size events"""
+        buffered = []
+        buffered_rows = 0
+        for users, cols in blocks:
+            summary.add_block(engine, users, cols)
+            buffered.append(cols)
+            buffered_rows += len(cols['timestamp'])
+            while buffered_rows >= chunk_size:
+                cols = engine.concat(buffered)
+                chunk = {key: values[:chunk_size] for key, values in cols.items()}
+                buffered = [{key: values[chunk_size:] for key, values in cols.items()}]
+                buffered_rows -= chunk_size
+                yield self._block_frame(engine, chunk, identities)
+        
+        if buffered_rows:
+            yield self._block_frame(engine, engine.concat(buffered), identities)
+    
+    def _block_frame(self, engine, cols, identities=None):
+        """Time-sorted DataFrame of one chunk of raw batch-engine columns"""
+        with self.profiler.stage('sort'):
+            cols = engine.sort_by_time(cols)
+        self.profiler.count('events', len(cols['timestamp']))
+        with self.profiler.stage('dataframe'):
+            return engine.to_frame(cols, identities=identities)
+    
+    def write_dataset(self, path, total_records=1000, chunk_size=100000, output_format='csv', engine='scalar',
+                      seed=None, reference_time=None, time_ordered=True, tmp_dir=None, workers=None,
+                      compression=None, row_group_size=None, merge_rows=DEFAULT_MERGE_ROWS):
+        """Generate and write the dataset chunk by chunk with memory bounded by chunk_size
+        
+        With time_ordered, chunks are spilled as sorted runs under tmp_dir and merged at the end with
+        merge_rows rows read ahead, so the output may be far larger than memory (see plg_writers).
+        With workers, each worker writes whole shards as runs instead and chunk_size is not used.
+        compression (gzip / zstd for CSV and JSON lines, a codec for Parquet / Arrow IPC) and row_group_size
+        configure the output file (see plg_writers).
+        """
+        self.check_engine(engine, workers)
+        if workers:
+            print(f"Streaming {total_records} tier-aware PLG telemetry records to {path} "
+                  f"in shards ({engine} engine, {workers} workers)...")
+            runner = ShardedTelemetryRunner(self, workers, seed, reference_time)
+            rows, summary = runner.write(path, total_records, total_records // AVG_EVENTS_PER_USER,
+                                         output_format, time_ordered=time_ordered, tmp_dir=tmp_dir,
+                                         compression=compression, row_group_size=row_group_size,
+                                         merge_rows=merge_rows)
+        else:
+            print(f"Streaming {total_records} tier-aware PLG telemetry records to {path} "
+                  f"in chunks of {chunk_size} ({engine} engine)...")
+            summary = DatasetSummary()
+            chunks = self.iter_dataset_chunks(total_records, chunk_size, engine, seed, reference_time, summary)
+            # Generation happens as chunks are pulled, so 'write' includes the nested chunk stages
+            with self.profiler.stage('write'):
+                rows = write_chunks(chunks, path, output_format, time_ordered=time_ordered, tmp_dir=tmp_dir,
+                                    compression=compression, row_group_size=row_group_size, merge_rows=merge_rows)
+        
+        print(f"Generated {rows} events for {summary.users} users")
+        self.print_distributions(summary.tiers, summary.scenarios, summary.segments_by_frequency(), rows)
+        return summary
+    
+    def generate_history(self, contacts_path, seed=None, reference_time=None, compact=False, cache_dir=None,
+                         summary=None):
+        """Full session history for every contact of a Contact export with a Background__c persona
+        
+        Each contact's sessions run from its persona's SIGNUP to its LAST_LOGIN date, at its
+        AVERAGE_SESSION_FREQUENCY, weighted toward its PRIMARY_FEATURES (see plg_history).
+        With reference_time, persona dates are shifted so the latest LAST_LOGIN falls on that day.
+        User columns come from the contact records; the batch engine is used and seeded from seed.
+        summary (a plg_summary.DatasetSummary) is filled as in generate_dataset.
+        """
+        print(f"Generating contact session histories from {contacts_path} (batch engine)...")
+        
+        if seed is None:
+            seed = np.random.randint(0, 2**31 - 1)
+        rng = np.random.default_rng(seed)
+        
+        engine = BatchTelemetryEngine(self)
+        history = load_contact_history(engine, contacts_path, reference_time, cache_dir)
+        if not history.num_contacts:
+            print("Generated 0 events for 0 contacts")
+            return empty_frame(self.properties_format)
+        blocks = list(history.iter_blocks(rng))
+        users = engine.concat([users for users, cols in blocks])
+        cols = engine.sort_by_time(engine.concat([cols for users, cols in blocks]))
+        
+        if summary is None:
+            summary = DatasetSummary()
+        summary.add_block(engine, users, cols)
+        
+        print(f"Generated {len(cols['timestamp'])} events for {history.num_contacts} contacts")
+        
+        self.print_distributions(summary.tiers, summary.scenarios, summary.segments_by_frequency(),
+                                 len(cols['timestamp']))
+        
+        return engine.to_frame(cols, compact, history.identities)
+    
+    def write_history(self, path, contacts_path, chunk_size=100000, output_format='csv', seed=None,
+                      reference_time=None, time_ordered=True, tmp_dir=None, compression=None, row_group_size=None,
+                      cache_dir=None, merge_rows=DEFAULT_MERGE_ROWS):
+        """Stream generate_history to disk chunk by chunk, like write_dataset"""
+        print(f"Streaming contact session histories from {contacts_path} to {path} in chunks of {chunk_size}...")
+        
+        if seed is None:
+            seed = np.random.randint(0, 2**31 - 1)
+        rng = np.random.default_rng(seed)
+        
+        engine = BatchTelemetryEngine(self)
+        history = load_contact_history(engine, contacts_path, reference_time, cache_dir)
+        summary = DatasetSummary()
+        chunks = self._chunk_blocks(engine, history.iter_blocks(rng), chunk_size, summary, history.identities)
+        rows = write_chunks(chunks, path, output_format, time_ordered=time_ordered, tmp_dir=tmp_dir,
+                            compression=compression, row_group_size=row_group_size, merge_rows=merge_rows)
+        
+        print(f"Generated {rows} events for {history.num_contacts} contacts")
+        self.print_distributions(summary.tiers, summary.scenarios, summary.segments_by_frequency(), rows)
+        return summary
+    
+    def write_incremental(self, path, total_records=1000, output_format='parquet', seed=None, reference_time=None,
+                          compression=None, row_group_size=None):
+        """Append the events since the previous run to the date-partitioned dataset at path
+        
+        The first run creates total_records // AVG_EVENTS_PER_USER users (seeded from seed) and
+        backfills the last 30 days; later runs only generate sessions between the stored watermark
+        and reference_time (default now), continuing each user's IDs (see plg_incremental).
+        """
+        now = reference_time or datetime.now()
+        dataset = IncrementalDataset(self, path, output_format, compression, row_group_size)
+        if dataset.exists():
+            dataset.load()
+        else:
+            if seed is None:
+                seed = np.random.randint(0, 2**31 - 1)
+            dataset.create(total_records // AVG_EVENTS_PER_USER, seed, now)
+        since = np.datetime64(dataset.state['watermark'], 'us').item()
+        print(f"Appending tier-aware PLG telemetry from {since} to {now} to {path} "
+              f"(run {dataset.state['runs'] + 1}, {dataset.state['num_users']} users)...")
+        
+        rows, summary = dataset.append(now)
+        
+        print(f"Generated {rows} events for {summary.users} active users")
+        if rows:
+            self.print_distributions(summary.tiers, summary.scenarios, summary.segments_by_frequency(), rows)
+        return summary
+    
+    def replay(self, target, total_records=1000, seed=None, reference_time=None, rate=None, speedup=None,
+               batch_size=DEFAULT_REPLAY_BATCH, summary=None):
+        """Stream the dataset as time-ordered JSON lines to target at a controlled pace (see plg_replay)
+        
+        target is '-' (stdout), a file path or a tcp://, unix:// or http:// URL. rate is events/sec;
+        speedup replays the 30-day timeline at that multiple of real time; with neither, events go out
+        as fast as the target accepts them. The batch engine is used and seeded from seed. With stdout
+        as the target, progress messages go to stderr. Returns the replay stats.
+        """
+        replay = EventReplay(self, rate, speedup, batch_size)
+        if seed is None:
+            seed = np.random.randint(0, 2**31 - 1)
+        if summary is None:
+            summary = DatasetSummary()
+        
+        with contextlib.redirect_stdout(sys.stderr) if target == '-' else contextlib.nullcontext():
+            pace = f"{rate:g} events/sec" if rate else f"{speedup:g}x real time" if speedup else "full speed"
+            print(f"Replaying {total_records} tier-aware PLG telemetry records to {target} at {pace} (batch engine)...")
+            with self.profiler.stage('generate'):
+                events = replay.load(total_records, total_records // AVG_EVENTS_PER_USER, seed, reference_time,
+                                     summary)
+            with self.profiler.stage('replay'):
+                stats = asyncio.run(replay.run(target))
+            self.profiler.count('events', stats['events'])
+            
+            print(f"Replayed {stats['events']} of {events} events in {stats['seconds']:.2f}s "
+                  f"({stats['events_per_sec']:,.0f} events/sec, max lag {stats['max_lag']:.3f}s)")
+            self.print_distributions(summary.tiers, summary.scenarios, summary.segments_by_frequency(), events)
+        return stats
+    
+    def upload_dataset(self, uploader, total_records=1000, chunk_size=100000, engine='scalar', seed=None,
+                       reference_time=None):
+        """Generate the dataset chunk by chunk and send it through uploader (a plg_upload.BulkUploader)
+        
+        Payloads are compressed and sent while later chunks are generated; memory is bounded by
+        chunk_size plus the uploader's in-flight payloads. Returns (DatasetSummary, upload stats).
+        """
+        self.check_engine(engine)
+        print(f"Uploading {total_records} tier-aware PLG telemetry records to {uploader.url} as "
+              f"{uploader.upload_format} in chunks of {chunk_size} ({engine} engine, {uploader.workers} connections)...")
+        summary = DatasetSummary()
+        chunks = self.iter_dataset_chunks(total_records, chunk_size, engine, seed, reference_time, summary)
+        # Generation happens as chunks are pulled, so 'upload' includes the nested chunk stages
+        with self.profiler.stage('upload'):
+            stats = uploader.upload(chunks)
+        
+        print(f"Uploaded {stats['rows']} events for {summary.users} users in {stats['payloads']} payloads "
+              f"({stats['rows_per_sec']:,.0f} events/sec)")
+        self.print_distributions(summary.tiers, summary.scenarios, summary.segments_by_frequency(), stats['rows'])
+        return summary, stats
+    
+    def print_distributions(self, tier_counts, scenario_counts, segment_counts, total_events):
+        """Print user tier/scenario and event segment distributions for a generated dataset"""
+        total_users = sum(tier_counts.values())
         
         print("\n🎯 Tier Distribution:")
         for tier, count in tier_counts.items():
-            percentage = (count / len(tier_distribution)) * 100
+            percentage = (count / total_users) * 100
             print(f"  {tier}: {count} users ({percentage:.1f}%)")
         
         print("\n📊 PLG Scenario Distribution:")
         for scenario, count in scenario_counts.items():
-            percentage = (count / len(scenario_distribution)) * 100
+            percentage = (count / total_users) * 100
             print(f"  {scenario}: {count} users ({percentage:.1f}%)")
         
-        # Event-level analysis
-        event_df = pd.DataFrame(all_events)
-        segments = event_df['user_segment'].value_counts()
         print(f"\n🔍 Event Segment Distribution:")
-        for segment, count in segments.items():
-            print(f"  {segment}: {count} events ({count/len(all_events)*100:.1f}%)")
-        
-        return event_df
+        for segment, count in segment_counts.items():
+            print(f"  {segment}: {count} events ({count/total_events*100:.1f}%)")
 
 # ============================================================================
 # MAIN EXECUTION WITH TIER ANALYTICS
 # ============================================================================
 
-def main():
-    """Main execution function with tier-focused analytics"""
+def main(total_records=1000, engine='scalar', chunk_size=None, output_format='csv', time_ordered=True,
+         workers=None, seed=None, reference_time=None, event_id_chars=DEFAULT_EVENT_ID_CHARS,
+         session_id_chars=DEFAULT_SESSION_ID_CHARS, compression=None, row_group_size=None, compact=False,
+         properties_format='json', contacts=None, incremental=None, profiler=None, profile_output=None,
+         replay=None, replay_rate=None, replay_speed=None, upload=None, upload_format='json',
+         upload_source=DEFAULT_SOURCE, upload_object=DEFAULT_OBJECT, upload_workers=DEFAULT_UPLOAD_WORKERS,
+         upload_token=None, upload_report=None, tmp_dir=None, merge_rows=DEFAULT_MERGE_ROWS,
+         session_model='patterns'):
+    """Main execution function with tier-focused analytics
+    
+    With chunk_size set, the dataset is streamed to disk chunk by chunk and no DataFrame is returned;
+    the report is the same either way, as it comes from a DatasetSummary filled during generation.
+    compact=True keeps the in-memory DataFrame in categorical / narrow numeric dtypes.
+    properties_format='columns' writes custom_properties as typed property_* columns instead of JSON.
+    contacts is a Contact export path: generate each persona contact's full session history
+    (generate_history) instead of total_records synthetic events.
+    incremental is a dataset directory: append only the events since its previous run to its
+    date partitions (write_incremental); no DataFrame is returned.
+    profiler (a plg_profiling.StageProfiler) times the run's stages and prints its report at the end,
+    also saved as JSON to profile_output when given.
+    replay is a target ('-', a file path, tcp://, unix:// or http:// URL): stream the events there as
+    time-ordered JSON lines at replay_rate events/sec or replay_speed times real time (see replay);
+    no file is written and no DataFrame is returned. The CLI sends its messages to stderr for '-'.
+    upload is an Ingestion API base URL, or 'stub' for the bundled local stub (plg_ingest_stub): send
+    the events there in chunks (default 100000) as gzip'd upload_format ('json' Streaming API or 'csv'
+    Bulk API) payloads over upload_workers connections (see upload_dataset); no file is written and
+    no DataFrame is returned. The per-payload upload stats are saved as JSON to upload_report when given.
+    Time-ordered streaming runs spill sorted runs under tmp_dir and merge them with merge_rows rows read ahead.
+    session_model='markov' samples variable-length sessions from per-(tier, segment) transition matrices
+    derived from the session patterns (see plg_markov); it needs engine='batch' unless contacts, incremental
+    or replay is set, as those always generate with the batch engine.
+    """
     print("🚀 Tier-Aware PLG Product Telemetry Data Generator")
     print("=" * 60)
     
     # Initialize generator
-    generator = PLGTelemetryGenerator()
+    generator = PLGTelemetryGenerator(event_id_chars, session_id_chars, properties_format, session_model)
+    if profiler:
+        generator.enable_profiling(profiler)
+    filename = (f'tier_aware_plg_telemetry_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+                f'{output_suffix(output_format, compression)}')
+    
+    # Paced JSON-lines replay for load testing
+    if replay:
+        generator.replay(replay, total_records, seed, reference_time, rate=replay_rate, speedup=replay_speed)
+        report_profile(profiler, profile_output)
+        return None
+    
+    # Bulk upload to an Ingestion API endpoint (or the local stub) instead of a file
+    if upload:
+        with IngestionStub() if upload == 'stub' else contextlib.nullcontext() as stub:
+            uploader = BulkUploader(stub.url if stub else upload, upload_format, upload_source, upload_object,
+                                    upload_token, workers=upload_workers)
+            summary, stats = generator.upload_dataset(uploader, total_records, chunk_size or 100000, engine, seed,
+                                                      reference_time)
+        summary.print_overview()
+        summary.print_analytics()
+        uploader.print_report(stats)
+        if stub:
+            stub.print_report()
+        if upload_report:
+            uploader.save(upload_report, stats)
+            print(f"💾 Upload report saved as: {upload_report}")
+        summary.print_insights()
+        report_profile(profiler, profile_output)
+        return None
+    
+    # Incremental run appending to a partitioned dataset
+    if incremental:
+        summary = generator.write_incremental(incremental, total_records, output_format, seed, reference_time,
+                                              compression=compression, row_group_size=row_group_size)
+        if summary.events:
+            summary.print_overview()
+            summary.print_analytics()
+        print(f"\n💾 Dataset updated in: {incremental}")
+        if summary.events:
+            summary.print_insights()
+        report_profile(profiler, profile_output)
+        return None
+    
+    # Bounded-memory streaming run: the report comes from the summary alone
+    if chunk_size:
+        if contacts:
+            summary = generator.write_history(filename, contacts, chunk_size, output_format, seed, reference_time,
+                                              time_ordered=time_ordered, tmp_dir=tmp_dir, compression=compression,
+                                              row_group_size=row_group_size, merge_rows=merge_rows)
+        else:
+            summary = generator.write_dataset(filename, total_records, chunk_size, output_format, engine, seed,
+                                              reference_time, time_ordered=time_ordered, tmp_dir=tmp_dir,
+                                              workers=workers, compression=compression,
+                                              row_group_size=row_group_size, merge_rows=merge_rows)
+        summary.print_overview()
+        summary.print_analytics()
+        print(f"\n💾 Dataset saved as: {filename}")
+        summary.print_insights()
+        report_profile(profiler, profile_output)
+        return None
     
     # Generate dataset
-    df = generator.generate_dataset(1000)
-    
-    # Display comprehensive summary statistics
-    print(f"\n📊 Dataset Summary:")
-    print(f"Total records: {len(df)}")
-    print(f"Unique users: {df['user_id'].nunique()}")
-    print(f"Unique sessions: {df['session_id'].nunique()}")
-    print(f"Date range: {df['timestamp'].min()} to {df['timestamp'].max()}")
-    
-    # Tier-specific analytics
-    print(f"\n🎯 Tier-Based Analytics:")
-    tier_summary = df.groupby('subscription_tier').agg({
-        'user_id': 'nunique',
-        'mrr_contribution': 'mean',
-        'engagement_score': 'mean',
-        'churn_risk_score': 'mean',
-        'conversion_propensity': 'mean'
-    }).round(2)
-    print(tier_summary)
-    
-    # PLG Scenario Analysis
-    print(f"\n📈 PLG Scenario Breakdown:")
-    scenario_summary = df.groupby('plg_scenario').agg({
-        'user_id': 'nunique',
-        'conversion_signal': 'sum',
-        'expansion_signal': 'sum',
-        'churn_risk_indicator': 'sum',
-        'value_realization_event': 'sum'
-    })
-    print(scenario_summary)
+    summary = DatasetSummary()
+    if contacts:
+        df = generator.generate_history(contacts, seed=seed, reference_time=reference_time, compact=compact,
+                                        summary=summary)
+    else:
+        df = generator.generate_dataset(total_records, engine=engine, seed=seed, reference_time=reference_time,
+                                        workers=workers, compact=compact, summary=summary)
+    
+    # Display comprehensive summary statistics (accumulated during generation; only the checks below scan df)
+    summary.print_overview()
+    print(f"Duplicate event ids: {duplicate_count(df['event_id'])}")
+    print(f"In-memory size: {df.memory_usage(deep=True).sum() / 1e6:.1f} MB")
+    
+    # Tier-specific analytics and PLG scenario analysis
+    summary.print_analytics()
     
     # Show sample records with key tier fields
     print(f"\n📋 Sample Records (Key Tier Fields):")
     sample_cols = ['event_id', 'subscription_tier', 'user_segment', 'plg_scenario', 'event_type', 'mrr_contribution', 'conversion_propensity']
     print(df[sample_cols].head(10).to_string(index=False))
     
-    # Save to CSV
-    filename = f'tier_aware_plg_telemetry_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-    df.to_csv(filename, index=False)
+    # Save to CSV / JSON lines / Parquet / Arrow IPC
+    with generator.profiler.stage('write'), open_chunk_writer(filename, output_format, compression,
+                                                              row_group_size) as writer:
+        writer.write(df)
     print(f"\n💾 Dataset saved as: {filename}")
     
     # Display tier-specific PLG insights
-    print(f"\n🎯 Tier-Specific PLG Insights:")
-    
-    # Conversion insights
-    free_users = df[df['subscription_tier'] == 'Free']
-    conversion_signals = free_users['conversion_signal'].sum()
-    print(f"Free tier conversion signals: {conversion_signals} ({(conversion_signals/len(free_users)*100):.1f}% of Free events)")
-    
-    # Upsell insights  
-    basic_users = df[df['subscription_tier'] == 'Basic']
-    upsell_signals = basic_users['expansion_signal'].sum()
-    print(f"Basic tier upsell signals: {upsell_signals} ({(upsell_signals/len(basic_users)*100):.1f}% of Basic events)")
-    
-    # Churn insights
-    paid_users = df[df['subscription_tier'].isin(['Basic', 'Premium'])]
-    churn_indicators = paid_users['churn_risk_indicator'].sum()
-    print(f"Paid tier churn indicators: {churn_indicators} ({(churn_indicators/len(paid_users)*100):.1f}% of paid events)")
-    
-    # Revenue analysis
-    total_mrr = df.groupby('user_id')['mrr_contribution'].first().sum()
-    print(f"Total MRR represented: ${total_mrr:,.2f}")
-    print(f"Average MRR per user: ${df.groupby('user_id')['mrr_contribution'].first().mean():.2f}")
+    summary.print_insights()
     
+    report_profile(profiler, profile_output)
     return df
 
+def report_profile(profiler, path=None):
+    """Print a run's stage profile and save it as JSON to path; nothing when profiler is None"""
+    if not profiler:
+        return
+    report = profiler.print_report()
+    if path:
+        profiler.save(path, report)
+        print(f"💾 Profile saved as: {path}")
+
+def parse_args(argv=None):
+    """Command-line options for main(); unknown arguments (e.g. from a notebook kernel) are ignored"""
+    parser = argparse.ArgumentParser(description='Tier-aware PLG product telemetry data generator')
+    parser.add_argument('--records', type=int, default=1000, help='number of telemetry events to generate')
+    parser.add_argument('--engine', choices=['scalar', 'batch'], default='scalar',
+                        help='per-event Python generation or vectorized NumPy batches')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help='stream to disk in chunks of this many events (bounded memory)')
+    parser.add_argument('--format', dest='output_format', choices=OUTPUT_FORMATS, default='csv', help='output file format')
+    parser.add_argument('--unordered', action='store_true',
+                        help='when streaming, skip the final merge into global timestamp order')
+    parser.add_argument('--tmp-dir', default=None, metavar='DIR',
+                        help='directory for the sorted runs spilled while streaming (default: the system temp dir)')
+    parser.add_argument('--merge-rows', type=int, default=DEFAULT_MERGE_ROWS,
+                        help='rows held in memory across all sorted runs while merging them into time order')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='generate batch-engine shards in this many processes')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='root seed of the batch engine, or of the per-user streams of the scalar engine')
+    parser.add_argument('--reference-time', type=datetime.fromisoformat, default=None,
+                        help="'now' for generated timestamps (ISO format); fix it for reproducible output")
+    parser.add_argument('--event-id-chars', type=int, default=DEFAULT_EVENT_ID_CHARS,
+                        help='hex characters in event_id suffixes (6 gives the original evt_YYYYMMDD_xxxxxx shape)')
+    parser.add_argument('--session-id-chars', type=int, default=DEFAULT_SESSION_ID_CHARS,
+                        help='hex characters in session_id suffixes')
+    parser.add_argument('--compression', default=None,
+                        help="csv/jsonl: gzip or zstd, compressed on worker threads while writing (default: none); "
+                             "parquet/arrow codec, e.g. snappy, zstd, lz4 or none (default: snappy for parquet, "
+                             "none for arrow)")
+    parser.add_argument('--row-group-size', type=int, default=None,
+                        help='rows per parquet row group / arrow record batch (default: one per written chunk)')
+    parser.add_argument('--properties-format', choices=PROPERTIES_FORMATS, default='json',
+                        help='custom_properties as one JSON column or as typed property_* columns')
+    parser.add_argument('--session-model', choices=SESSION_MODELS, default='patterns',
+                        help='replay the fixed per-tier session patterns, or sample variable-length sessions from '
+                             'Markov chains derived from them (batch engine only)')
+    parser.add_argument('--compact', action='store_true',
+                        help='hold the in-memory DataFrame in categorical and narrow numeric dtypes')
+    parser.add_argument('--contacts', default=None, metavar='CSV',
+                        help='Contact export (e.g. All_Contacts.csv): generate the full session history of every '
+                             'contact with a Background__c persona instead of --records synthetic events')
+    parser.add_argument('--incremental', default=None, metavar='DIR',
+                        help='append only the events since the previous run to the date-partitioned dataset in DIR '
+                             '(created with --records worth of users on the first run)')
+    parser.add_argument('--replay', default=None, metavar='TARGET',
+                        help="stream events as time-ordered JSON lines to TARGET instead of writing a file: "
+                             "- (stdout), a file path, tcp://HOST:PORT, unix:///PATH or http://HOST:PORT/PATH")
+    parser.add_argument('--replay-rate', type=float, default=None, metavar='EPS',
+                        help='replay at this many events per second (default: as fast as the target accepts)')
+    parser.add_argument('--replay-speed', type=float, default=None, metavar='X',
+                        help='replay the generated timeline at X times real time (1 = real time)')
+    parser.add_argument('--upload', default=None, metavar='URL',
+                        help='send the events to a Data Cloud Ingestion API base URL instead of writing a file, '
+                             "or 'stub' to start the bundled local stub server and upload to it "
+                             '(bearer token from $PLG_UPLOAD_TOKEN)')
+    parser.add_argument('--upload-format', choices=UPLOAD_FORMATS, default='json',
+                        help='json: Streaming API payloads; csv: a Bulk API job of CSV batches')
+    parser.add_argument('--upload-source', default=DEFAULT_SOURCE, help='Ingestion API connector source name')
+    parser.add_argument('--upload-object', default=DEFAULT_OBJECT, help='Ingestion API object name')
+    parser.add_argument('--upload-workers', type=int, default=DEFAULT_UPLOAD_WORKERS,
+                        help='concurrent upload connections (compression runs on the same threads)')
+    parser.add_argument('--upload-report', default=None, metavar='JSON',
+                        help='save the upload stats, with per-payload latency, as JSON')
+    parser.add_argument('--profile', action='store_true',
+                        help='time generation stages (profile creation, business metrics, DataFrame, sort, write)')
+    parser.add_argument('--profile-calls', action='store_true', help='also run cProfile and report the top functions')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='also trace allocations with tracemalloc and report the peak and top sites')
+    parser.add_argument('--profile-output', default=None, metavar='JSON', help='save the profile report as JSON')
+    args, _ = parser.parse_known_args(argv)
+    if args.contacts and args.workers:
+        parser.error('--workers does not apply to --contacts')
+    if args.incremental and (args.contacts or args.workers or args.chunk_size):
+        parser.error('--incremental cannot be combined with --contacts, --workers or --chunk-size')
+    if args.replay and (args.contacts or args.incremental or args.workers or args.chunk_size):
+        parser.error('--replay cannot be combined with --contacts, --incremental, --workers or --chunk-size')
+    if args.upload and (args.contacts or args.incremental or args.replay or args.workers):
+        parser.error('--upload cannot be combined with --contacts, --incremental, --replay or --workers')
+    if args.session_model == 'markov' and args.engine != 'batch' and not (args.contacts or args.incremental
+                                                                          or args.replay):
+        parser.error('--session-model markov requires --engine batch')
+    if args.upload_report and not args.upload:
+        parser.error('--upload-report requires --upload')
+    if (args.replay_rate or args.replay_speed) and not args.replay:
+        parser.error('--replay-rate and --replay-speed require --replay')
+    if args.replay_rate and args.replay_speed:
+        parser.error('--replay-rate and --replay-speed are mutually exclusive')
+    if args.output_format in TEXT_FORMATS and args.row_group_size:
+        parser.error('--row-group-size applies to parquet and arrow output only')
+    if args.output_format in TEXT_FORMATS and args.compression not in (None, 'none', *TEXT_COMPRESSIONS):
+        parser.error(f'{args.output_format} output takes --compression {" or ".join(TEXT_COMPRESSIONS)}')
+    return args
+
 # Run the generator
 if __name__ == "__main__":
-    telemetry_df = main()
+    args = parse_args()
+    profiler = None
+    if args.profile or args.profile_calls or args.trace_memory or args.profile_output:
+        profiler = StageProfiler(profile_calls=args.profile_calls, trace_memory=args.trace_memory)
+    # Replayed JSON lines own stdout, so every message goes to stderr
+    with contextlib.redirect_stdout(sys.stderr) if args.replay == '-' else contextlib.nullcontext():
+        telemetry_df = main(total_records=args.records, engine=args.engine, chunk_size=args.chunk_size,
+                            output_format=args.output_format, time_ordered=not args.unordered, workers=args.workers,
+                            seed=args.seed, reference_time=args.reference_time, event_id_chars=args.event_id_chars,
+                            session_id_chars=args.session_id_chars, compression=args.compression,
+                            row_group_size=args.row_group_size, compact=args.compact,
+                            properties_format=args.properties_format, contacts=args.contacts,
+                            incremental=args.incremental, profiler=profiler, profile_output=args.profile_output,
+                            replay=args.replay, replay_rate=args.replay_rate, replay_speed=args.replay_speed,
+                            upload=args.upload, upload_format=args.upload_format, upload_source=args.upload_source,
+                            upload_object=args.upload_object, upload_workers=args.upload_workers,
+                            upload_token=os.environ.get('PLG_UPLOAD_TOKEN'), upload_report=args.upload_report,
+                            tmp_dir=args.tmp_dir, merge_rows=args.merge_rows, session_model=args.session_model)
@@ -0,0 +1,385 @@
+"""
+Bulk Upload Sink for PLG Telemetry
+Sends generated event chunks straight to an ingestion endpoint modeled on the
+Salesforce Data Cloud Ingestion API, instead of saving a CSV and uploading it
+by hand:
+
+    json  Streaming API: POST /api/v1/ingest/sources/{source}/{object} with {"data": [...]}
+    csv   Bulk API: POST /api/v1/ingest/jobs opens a job, PUT /api/v1/ingest/jobs/{id}/batches
+          sends each CSV payload, PATCH /api/v1/ingest/jobs/{id} {"state": "UploadComplete"} closes it
+
+Rows are packed into payloads of at most max_payload_bytes (uncompressed, so
+the compressed request is always within the cap), carried over from chunk to
+chunk, and gzip'd (Content-Encoding: gzip) by a pool of worker threads that
+each hold one keep-alive connection; zlib and socket I/O release the GIL, so
+compression and sending overlap generation. At most max_in_flight payloads
+are queued or being sent, so generation waits for a slow endpoint instead of
+buffering ahead. Connection errors and 408 / 429 / 5xx answers are retried
+with exponential backoff and jitter (or the server's Retry-After); anything
+else fails the upload and aborts an open bulk job. Every payload's rows,
+bytes, attempts and latency are kept for the report.
+
+plg_ingest_stub serves the same endpoints locally, for end-to-end runs
+without a Salesforce org.
+
+Used by PLGTelemetryGenerator.upload_dataset and main(--upload)
+"""
+
+import gzip
+import http.client
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from plg_writers import encode_json_lines, format_timestamps
+
+UPLOAD_FORMATS = ['json', 'csv']
+
+# Uncompressed payload caps: the Streaming API's 200 KB request limit, and well under the Bulk API's 150 MB per file
+DEFAULT_MAX_PAYLOAD_BYTES = {'json': 200000, 'csv': 50000000}
+
+# Data Cloud Ingestion API connector source and object the events are sent to
+DEFAULT_SOURCE = 'plg_telemetry'
+DEFAULT_OBJECT = 'plg_telemetry_event'
+
+# Worker threads, each with its own keep-alive connection
+DEFAULT_UPLOAD_WORKERS = 4
+
+# Payloads queued or being sent per worker before generation waits
+IN_FLIGHT_PER_WORKER = 2
+
+# Retries of one request, with exponential backoff from BACKOFF_BASE seconds up to BACKOFF_MAX
+DEFAULT_RETRIES = 5
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+# Seconds to wait for the endpoint on one request
+UPLOAD_TIMEOUT = 60
+
+DEFAULT_GZIP_LEVEL = 6
+
+JOBS_PATH = '/api/v1/ingest/jobs'
+
+
+def streaming_path(source, object_name):
+    """Streaming API path of one connector source and object"""
+    return f'/api/v1/ingest/sources/{source}/{object_name}'
+
+
+def json_rows(df):
+    """UTF-8 JSON object per event of df (timestamps as ISO 'Z' strings, missing values null)"""
+    return [line.encode() for line in encode_json_lines(df)]
+
+
+def csv_rows(df, columns=None):
+    """(header, rows) of df as UTF-8 CSV lines, formatted like CSVChunkWriter output"""
+    df = format_timestamps(df)
+    lines = df.to_csv(index=False, columns=columns, lineterminator='\n').split('\n')
+    if len(lines) != len(df) + 2:
+        # A quoted value holds a newline, so rows are rendered one at a time
+        lines = [df.iloc[:0].to_csv(index=False, columns=columns, lineterminator='\n')[:-1]]
+        lines += [df.iloc[i:i + 1].to_csv(index=False, header=False, columns=columns, lineterminator='\n')[:-1]
+                  for i in range(len(df))] + ['']
+    return lines[0].encode(), [line.encode() for line in lines[1:-1]]
+
+
+def _retry_after(value):
+    """Seconds of a Retry-After header given in seconds (HTTP dates are ignored)"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class PayloadPacker:
+    """Packs encoded rows into size-capped payload bodies, carrying a partial payload across calls"""
+
+    def __init__(self, max_bytes, prefix, separator, suffix):
+        self.max_bytes = max_bytes
+        self.prefix = prefix
+        self.separator = separator
+        self.suffix = suffix
+        self.overhead = len(prefix) + len(suffix)
+        self.rows = []
+        self.size = 0
+
+    def add(self, rows):
+        """Yield (row count, body) for each payload rows fill up; the remainder waits for more rows"""
+        step = len(self.separator)
+        for row in rows:
+            size = len(row) + step
+            if self.rows and self.overhead + self.size + size > self.max_bytes:
+                yield self.flush()
+            if self.overhead + size > self.max_bytes:
+                raise ValueError(f"A {len(row)}-byte row does not fit in {self.max_bytes}-byte payloads")
+            self.rows.append(row)
+            self.size += size
+
+    def flush(self):
+        """(row count, body) of the pending rows, or None without any"""
+        if not self.rows:
+            return None
+        payload = (len(self.rows), self.prefix + self.separator.join(self.rows) + self.suffix)
+        self.rows = []
+        self.size = 0
+        return payload
+
+
+class BulkUploader:
+    """Uploads event DataFrame chunks as gzip'd, size-capped payloads over a pool of keep-alive connections
+
+    url is the endpoint's base URL (http:// or https://, optionally with a path prefix); token, when
+    given, is sent as a Bearer token.
+    """
+
+    def __init__(self, url, upload_format='json', source=DEFAULT_SOURCE, object_name=DEFAULT_OBJECT, token=None,
+                 max_payload_bytes=None, workers=DEFAULT_UPLOAD_WORKERS, max_in_flight=None,
+                 retries=DEFAULT_RETRIES, gzip_level=DEFAULT_GZIP_LEVEL):
+        if upload_format not in UPLOAD_FORMATS:
+            raise ValueError(f"Unknown upload format '{upload_format}' (expected one of {UPLOAD_FORMATS})")
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f"Upload URL must be http:// or https:// with a host: {url}")
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.url = url
+        self.upload_format = upload_format
+        self.source = source
+        self.object_name = object_name
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip('/')
+        self.headers = {'Authorization': f'Bearer {token}'} if token else {}
+        self.max_payload_bytes = max_payload_bytes or DEFAULT_MAX_PAYLOAD_BYTES[upload_format]
+        self.workers = workers
+        self.max_in_flight = max_in_flight or workers * IN_FLIGHT_PER_WORKER
+        self.retries = retries
+        self.gzip_level = gzip_level
+        # Jitter has its own generator so uploads never touch the global random state generation draws from
+        self.jitter = random.Random()
+        self.local = threading.local()
+        self.connections = []
+        self.lock = threading.Lock()
+        self.job_id = None
+        self.columns = None
+        self.stats = None
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+
+    def _connection(self):
+        """This thread's keep-alive connection, opened on first use"""
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = self.local.connection = self.connection_class(self.host, self.port, timeout=UPLOAD_TIMEOUT)
+            with self.lock:
+                self.connections.append(connection)
+        return connection
+
+    def _drop_connection(self):
+        """Close this thread's connection so the next request reconnects"""
+        connection = getattr(self.local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self.local.connection = None
+
+    def backoff(self, attempt, retry_after=None):
+        """Seconds to wait before retry number attempt + 1"""
+        if retry_after is not None:
+            return min(retry_after, BACKOFF_MAX)
+        return min(BACKOFF_BASE * 2 ** attempt, BACKOFF_MAX) * self.jitter.uniform(0.5, 1.0)
+
+    def request(self, method, path, body=b'', headers=None):
+        """Send one request, retrying connection errors and RETRY_STATUSES; returns (response body, attempts, latency)
+
+        latency is the wall time of the successful attempt. Raises ConnectionError when the endpoint
+        rejects the request or the retries run out.
+        """
+        headers = dict(self.headers, **(headers or {}))
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            start = time.perf_counter()
+            try:
+                connection = self._connection()
+                connection.request(method, self.prefix + path, body, headers)
+                response = connection.getresponse()
+                data = response.read()
+                if response.will_close:
+                    self._drop_connection()
+            except (OSError, http.client.HTTPException) as error:
+                self._drop_connection()
+                failure = f'{type(error).__name__}: {error}'
+            else:
+                if response.status < 300:
+                    return data, attempt + 1, time.perf_counter() - start
+                failure = f"HTTP {response.status}: {data[:200].decode('utf-8', 'replace')}"
+                if response.status not in RETRY_STATUSES:
+                    raise ConnectionError(f"{method} {self.url}{path} failed with {failure}")
+                retry_after = _retry_after(response.getheader('Retry-After'))
+            if attempt < self.retries:
+                time.sleep(self.backoff(attempt, retry_after))
+        raise ConnectionError(f"{method} {self.url}{path} failed after {self.retries + 1} attempts ({failure})")
+
+    def _json_request(self, method, path, payload):
+        """Send a JSON body and return the decoded JSON answer"""
+        data = self.request(method, path, json.dumps(payload).encode(), {'Content-Type': 'application/json'})[0]
+        return json.loads(data) if data else {}
+
+    # ------------------------------------------------------------------
+    # Bulk jobs
+    # ------------------------------------------------------------------
+
+    def open_job(self):
+        """Open a Bulk API upsert job for the object; returns its id"""
+        job = self._json_request('POST', JOBS_PATH, {'object': self.object_name, 'sourceName': self.source,
+                                                     'operation': 'upsert'})
+        self.job_id = job['id']
+        return self.job_id
+
+    def close_job(self, state='UploadComplete'):
+        """Move the open job to state (UploadComplete queues it for processing, Aborted discards it)"""
+        self._json_request('PATCH', f'{JOBS_PATH}/{self.job_id}', {'state': state})
+
+    # ------------------------------------------------------------------
+    # Payloads
+    # ------------------------------------------------------------------
+
+    def new_packer(self, header=None):
+        """PayloadPacker for this format: a {"data": [...]} array or a CSV file under header"""
+        if self.upload_format == 'json':
+            return PayloadPacker(self.max_payload_bytes, b'{"data":[', b',', b']}')
+        return PayloadPacker(self.max_payload_bytes, header + b'\n', b'\n', b'\n')
+
+    def send_payload(self, index, rows, body):
+        """Compress and send one payload (runs on a worker thread); returns its stats"""
+        start = time.perf_counter()
+        compressed = gzip.compress(body, self.gzip_level)
+        headers = {'Content-Encoding': 'gzip'}
+        if self.upload_format == 'json':
+            headers['Content-Type'] = 'application/json'
+            data, attempts, latency = self.request('POST', streaming_path(self.source, self.object_name),
+                                                   compressed, headers)
+        else:
+            headers['Content-Type'] = 'text/csv'
+            data, attempts, latency = self.request('PUT', f'{JOBS_PATH}/{self.job_id}/batches', compressed, headers)
+        return {'batch': index, 'rows': rows, 'bytes': len(body), 'gzip_bytes': len(compressed),
+                'attempts': attempts, 'latency': round(latency, 4),
+                'seconds': round(time.perf_counter() - start, 4)}
+
+    def _collect(self, pending, batches, block):
+        """Move finished payloads' stats into batches, waiting for one first when block is set"""
+        done, pending = wait(pending, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        for future in done:
+            batches.append(future.result())
+        return pending
+
+    def _send_chunks(self, pool, chunks):
+        """Pack and submit every chunk's rows, keeping at most max_in_flight payloads pending; returns their stats"""
+        batches = []
+        pending = set()
+        packer = None
+        submitted = 0
+        try:
+            for chunk in chunks:
+                if self.upload_format == 'json':
+                    header, rows = None, json_rows(chunk)
+                else:
+                    if self.columns is None:
+                        self.columns = list(chunk.columns)
+                    header, rows = csv_rows(chunk, self.columns)
+                if packer is None:
+                    packer = self.new_packer(header)
+                for payload in packer.add(rows):
+                    while len(pending) >= self.max_in_flight:
+                        pending = self._collect(pending, batches, block=True)
+                    pending.add(pool.submit(self.send_payload, submitted, *payload))
+                    submitted += 1
+                pending = self._collect(pending, batches, block=False)
+            payload = packer.flush() if packer is not None else None
+            if payload is not None:
+                pending.add(pool.submit(self.send_payload, submitted, *payload))
+            while pending:
+                pending = self._collect(pending, batches, block=True)
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+        return batches
+
+    def upload(self, chunks):
+        """Send every row of an iterable of event DataFrames; returns the run stats (also kept as self.stats)
+
+        Stats hold totals (rows, payloads, bytes before and after gzip, retries), rows/sec and MB/sec
+        over the whole upload (generation of the chunks included), latency percentiles, and one
+        entry per payload under 'batches'.
+        """
+        started = time.perf_counter()
+        self.job_id = None
+        try:
+            # Leaving the pool waits for payloads already being sent, even when one has failed
+            with ThreadPoolExecutor(self.workers, thread_name_prefix='plg_upload') as pool:
+                if self.upload_format == 'csv':
+                    self.open_job()
+                batches = self._send_chunks(pool, chunks)
+            if self.upload_format == 'csv':
+                self.close_job()
+        except BaseException:
+            if self.job_id is not None:
+                try:
+                    self.close_job('Aborted')
+                except ConnectionError:
+                    pass
+            raise
+        finally:
+            for connection in self.connections:
+                connection.close()
+        self.stats = self.summarize(batches, time.perf_counter() - started)
+        return self.stats
+
+    def summarize(self, batches, seconds):
+        """Run stats from the per-payload stats"""
+        batches = sorted(batches, key=lambda batch: batch['batch'])
+        rows = sum(batch['rows'] for batch in batches)
+        raw_bytes = sum(batch['bytes'] for batch in batches)
+        latencies = np.array([batch['latency'] for batch in batches]) if batches else np.zeros(1)
+        return {
+            'url': self.url, 'format': self.upload_format, 'object': self.object_name, 'job_id': self.job_id,
+            'rows': rows, 'payloads': len(batches), 'bytes': raw_bytes,
+            'gzip_bytes': sum(batch['gzip_bytes'] for batch in batches),
+            'retries': sum(batch['attempts'] - 1 for batch in batches),
+            'seconds': round(seconds, 3),
+            'rows_per_sec': round(rows / seconds, 1) if seconds else None,
+            'mb_per_sec': round(raw_bytes / 1e6 / seconds, 2) if seconds else None,
+            'latency_p50': round(float(np.percentile(latencies, 50)), 4),
+            'latency_p95': round(float(np.percentile(latencies, 95)), 4),
+            'latency_max': round(float(latencies.max()), 4),
+            'batches': batches
+        }
+
+    def print_report(self, stats=None):
+        """Print the upload totals, throughput, latency percentiles and slowest payloads"""
+        stats = stats or self.stats
+        ratio = stats['bytes'] / stats['gzip_bytes'] if stats['gzip_bytes'] else 0
+        print(f"\n📤 Upload Report ({stats['format']} to {stats['url']}):")
+        print(f"  {stats['rows']} rows in {stats['payloads']} payloads, {stats['bytes'] / 1e6:.1f} MB "
+              f"({stats['gzip_bytes'] / 1e6:.1f} MB gzip'd, {ratio:.1f}x), {stats['retries']} retries")
+        print(f"  {stats['seconds']:.2f}s: {stats['rows_per_sec'] or 0:,.0f} rows/sec, {stats['mb_per_sec'] or 0:.1f} MB/sec")
+        print(f"  Payload latency: p50 {stats['latency_p50'] * 1000:.1f} ms, p95 {stats['latency_p95'] * 1000:.1f} ms, "
+              f"max {stats['latency_max'] * 1000:.1f} ms")
+        for batch in sorted(stats['batches'], key=lambda batch: batch['latency'], reverse=True)[:3]:
+            print(f"  Slow payload {batch['batch']}: {batch['rows']} rows, {batch['gzip_bytes'] / 1e3:.1f} kB, "
+                  f"{batch['latency'] * 1000:.1f} ms, {batch['attempts']} attempt(s)")
+        return stats
+
+    def save(self, path, stats=None):
+        """Write the stats, with every payload's entry, as JSON"""
+        with open(path, 'w') as f:
+            json.dump(stats or self.stats, f, indent=2)
@@ -0,0 +1,780 @@
+"""
+Chunked Output Writers for PLG Telemetry
+Append event DataFrames to CSV, JSON lines, Parquet or Arrow IPC as they are
+produced, so memory is bounded by the chunk size rather than the dataset size,
+and merge per-chunk time-sorted runs into one globally time-ordered file.
+
+Time-ordered output is an external merge sort: chunks are sorted and spilled
+as run files on background threads while the next chunk is generated, then
+k-way merged with a fixed number of rows (merge_rows) read ahead across all
+runs. More than MAX_MERGE_FAN_IN runs are first merged in consecutive groups
+into intermediate runs, so neither memory nor open files grow with the
+number of runs.
+
+Columns are written in the declared output order of plg_schema, whatever
+order a chunk has them in. Generated frames carry datetime64 timestamp
+columns; CSV and JSON lines output format them as ISO 'Z' strings here,
+Parquet and Arrow IPC store them as native timestamps under an explicit
+schema built from the declared fields, with dictionary-encoded
+categories. encode_json_lines turns a frame into one JSON object per
+event, for the JSON lines writer and streaming sinks (see plg_replay).
+
+CSV and JSON lines are compressed as they are written (gzip or zstd), off
+the generating thread: gzip blocks of COMPRESSION_BLOCK_BYTES are compressed
+on a thread pool and written in order as concatenated gzip members, and zstd
+uses the zstandard package's own worker threads for a single frame. Both are
+read by the standard gzip / zstd tools and by pandas.
+"""
+
+import gzip
+import json
+import os
+import pickle
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from json.encoder import encode_basestring
+
+import numpy as np
+import pandas as pd
+
+from plg_batch import MICROS_PER_DAY, iso_strings
+from plg_schema import EVENT_FIELDS, TIMESTAMP_COLUMNS, ordered_columns
+
+OUTPUT_FORMATS = ['csv', 'jsonl', 'parquet', 'arrow']
+
+# Formats written as text, and the compressions they take with the suffix added to their file names
+TEXT_FORMATS = ['csv', 'jsonl']
+TEXT_COMPRESSIONS = {'gzip': '.gz', 'zstd': '.zst'}
+DEFAULT_COMPRESSION_LEVELS = {'gzip': 6, 'zstd': 3}
+
+# Uncompressed bytes per independently gzip'd block, and the threads compressing text output
+COMPRESSION_BLOCK_BYTES = 4 << 20
+COMPRESSION_WORKERS = min(8, os.cpu_count() or 1)
+
+# Rows encoded at a time by the text writers, bounding the encoded text held in memory
+TEXT_ENCODE_ROWS = 10000
+
+# Format each output format's sorted runs are spilled in (JSON lines as pickled frames, which read back exactly)
+RUN_FORMATS = {'csv': 'csv', 'jsonl': 'pickle', 'parquet': 'parquet', 'arrow': 'arrow'}
+
+# Rows read from each run per step when copying runs
+DEFAULT_MERGE_BATCH_ROWS = 50000
+
+# Rows per pickled batch / Parquet row group / Arrow record batch of a spilled run, the most a merge reads at once
+RUN_BATCH_ROWS = 10000
+
+# Rows read ahead across all runs of a merge (split evenly between them), and the fewest per run
+DEFAULT_MERGE_ROWS = 500000
+MIN_MERGE_BATCH_ROWS = 1000
+
+# Most runs merged at once; more are first merged in groups into intermediate runs
+MAX_MERGE_FAN_IN = 64
+
+# Threads sorting and spilling runs while the next chunk is generated (each holds one chunk)
+SPILL_WORKERS = min(2, os.cpu_count() or 1)
+
+# Integer columns spanning at most this many values are JSON-encoded through a lookup table
+JSON_INT_TABLE_SPAN = 1 << 16
+
+
+def format_timestamps(df):
+    """Copy of df with datetime64 timestamp columns formatted as ISO 'Z' strings"""
+    formatted = {column: iso_strings(df[column].to_numpy()).astype(object) for column in TIMESTAMP_COLUMNS
+                 if column in df and df[column].dtype.kind == 'M'}
+    return df.assign(**formatted) if formatted else df
+
+
+def timestamp_sort_key(timestamps):
+    """Sortable form of a timestamp column: datetime64 as is, ISO 'Z' strings padded ('...:SSZ' to '...:SS.000000Z')"""
+    timestamps = pd.Series(timestamps, copy=False)
+    if timestamps.dtype.kind == 'M':
+        return timestamps
+    timestamps = timestamps.astype(object)
+    whole_seconds = timestamps.str.len() == 20
+    if whole_seconds.any():
+        timestamps = timestamps.where(~whole_seconds, timestamps.str[:-1] + '.000000Z')
+    return timestamps
+
+
+def sort_events_by_time(df):
+    """Stable sort of an event DataFrame on its timestamp column"""
+    if df['timestamp'].dtype.kind == 'M':
+        return df.sort_values('timestamp', kind='stable', ignore_index=True)
+    return df.sort_values('timestamp', key=timestamp_sort_key, kind='stable', ignore_index=True)
+
+
+class GzipBlockStream:
+    """Binary output file gzip'ing fixed-size blocks on a thread pool, written in order as concatenated members
+
+    At most two blocks per worker wait for compression, so memory stays bounded when the
+    producer is faster than the pool.
+    """
+
+    def __init__(self, path, level=None, workers=COMPRESSION_WORKERS, block_bytes=COMPRESSION_BLOCK_BYTES):
+        self.file = open(path, 'wb')
+        self.level = DEFAULT_COMPRESSION_LEVELS['gzip'] if level is None else level
+        self.block_bytes = block_bytes
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix='plg_gzip')
+        self.max_pending = 2 * workers
+        self.pending = deque()
+        self.blocks = 0
+        self.buffer = []
+        self.buffered = 0
+
+    def _submit(self, block):
+        while len(self.pending) >= self.max_pending:
+            self.file.write(self.pending.popleft().result())
+        # mtime=0 keeps the output identical between runs
+        self.pending.append(self.pool.submit(gzip.compress, block, self.level, mtime=0))
+        self.blocks += 1
+
+    def write(self, data):
+        self.buffer.append(data)
+        self.buffered += len(data)
+        if self.buffered < self.block_bytes:
+            return
+        data = memoryview(b''.join(self.buffer))
+        whole = len(data) - len(data) % self.block_bytes
+        for offset in range(0, whole, self.block_bytes):
+            self._submit(data[offset:offset + self.block_bytes])
+        self.buffer = [bytes(data[whole:])]
+        self.buffered = len(data) - whole
+
+    def close(self):
+        try:
+            if self.buffered or not self.blocks:
+                # An empty file still gets one (empty) member, which gzip tools read as empty
+                self._submit(b''.join(self.buffer))
+            while self.pending:
+                self.file.write(self.pending.popleft().result())
+        finally:
+            self.pool.shutdown()
+            self.file.close()
+
+
+def open_text_stream(path, compression=None, level=None, workers=COMPRESSION_WORKERS):
+    """Binary output file for a text format: plain, gzip (GzipBlockStream) or zstd (multi-threaded zstandard)"""
+    if compression is None:
+        return open(path, 'wb')
+    if compression == 'gzip':
+        return GzipBlockStream(path, level, workers)
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError("zstd text output requires zstandard (pip install zstandard)") from e
+        level = DEFAULT_COMPRESSION_LEVELS['zstd'] if level is None else level
+        # threads=N hands blocks to libzstd's worker threads, which write one standard frame
+        compressor = zstandard.ZstdCompressor(level=level, threads=workers if workers > 1 else 0)
+        return compressor.stream_writer(open(path, 'wb'), closefd=True)
+    raise ValueError(f"Unknown text compression '{compression}' (expected one of {list(TEXT_COMPRESSIONS)})")
+
+
+class TextChunkWriter:
+    """Base for text chunk writers: encodes each chunk (encode) onto a plain or compressed output stream"""
+
+    def __init__(self, path, compression=None, level=None):
+        self.path = path
+        self.stream = open_text_stream(path, compression, level)
+        self.columns = None
+        self.rows_written = 0
+
+    def write(self, df):
+        # An empty first chunk still gives the CSV its header
+        for offset in range(0, max(len(df), 1), TEXT_ENCODE_ROWS):
+            self.stream.write(self.encode(df.iloc[offset:offset + TEXT_ENCODE_ROWS]))
+        self.rows_written += len(df)
+
+    def ordered(self, df):
+        """df in the file's columns: the declared ones in output order (empty where df lacks them), then its others"""
+        if self.columns is None:
+            self.columns = ordered_columns(df.columns)
+        if list(df.columns) == self.columns:
+            return df
+        return df.reindex(columns=self.columns)
+
+    def close(self):
+        self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CSVChunkWriter(TextChunkWriter):
+    """Appends DataFrame chunks to one CSV file, writing the header once"""
+
+    def encode(self, df):
+        header = self.columns is None
+        df = format_timestamps(self.ordered(df))
+        return df.to_csv(header=header, index=False).encode()
+
+
+class JSONLinesChunkWriter(TextChunkWriter):
+    """Appends DataFrame chunks to one JSON lines file, one compact object per event"""
+
+    def encode(self, df):
+        lines = encode_json_lines(self.ordered(df))
+        return ('\n'.join(lines) + '\n').encode() if lines else b''
+
+
+class PickleRunWriter:
+    """Spills a sorted run as pickled frames of RUN_BATCH_ROWS rows, for formats that do not read back exactly"""
+
+    def __init__(self, path):
+        self.file = open(path, 'wb')
+        self.rows_written = 0
+
+    def write(self, df):
+        for offset in range(0, len(df), RUN_BATCH_ROWS):
+            pickle.dump(df.iloc[offset:offset + RUN_BATCH_ROWS], self.file, pickle.HIGHEST_PROTOCOL)
+        self.rows_written += len(df)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ArrowTableWriter:
+    """Base for Arrow-backed chunk writers: converts chunks to tables under one explicit schema
+
+    Schema columns are the declared fields of plg_schema (columns missing from a chunk are
+    written as nulls); other columns are typed from the first chunk. Low-cardinality
+    strings are dictionary-encoded against a per-file vocabulary that only grows, so every batch's
+    dictionary extends the previous one. With row_group_size, rows are buffered and written in
+    groups of exactly that many rows; otherwise each chunk is written as it arrives.
+    """
+
+    def __init__(self, path, row_group_size=None):
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError(f"{self.format_name} output requires pyarrow (pip install pyarrow)") from e
+        self.pa = pa
+        self.path = path
+        self.row_group_size = row_group_size
+        self.rows_written = 0
+        self.schema = None
+        self.writer = None
+        self.vocabularies = {}
+        self.pending = []
+        self.pending_rows = 0
+
+    def _field_type(self, name, values):
+        pa = self.pa
+        field = EVENT_FIELDS.get(name)
+        if field is None:
+            field_type = pa.array(values, from_pandas=True).type
+            return pa.string() if pa.types.is_large_string(field_type) or pa.types.is_null(field_type) else field_type
+        if field.dictionary:
+            return pa.dictionary(pa.int32(), pa.string())
+        return {'timestamp': pa.timestamp('us'), 'int': pa.int64(), 'float': pa.float64(), 'bool': pa.bool_(),
+                'string': pa.string(), 'list': pa.list_(pa.string())}[field.kind]
+
+    def _schema_for(self, df):
+        """Declared columns in output order, then any other columns of the first chunk"""
+        names = ordered_columns(df.columns)
+        return self.pa.schema([self.pa.field(name, self._field_type(name, df[name] if name in df else None))
+                               for name in names])
+
+    def _dictionary_array(self, name, values):
+        """Encode values against the file's vocabulary for name, appending unseen labels"""
+        pa = self.pa
+        vocabulary = self.vocabularies.setdefault(name, {})
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Factorizes the category codes; labels come out in order of appearance as below
+            codes, uniques = pd.factorize(values)
+        else:
+            codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+        for label in uniques:
+            if label not in vocabulary:
+                vocabulary[label] = len(vocabulary)
+        mapping = np.array([vocabulary[label] for label in uniques], dtype=np.int32)
+        indices = mapping[np.maximum(codes, 0)] if len(mapping) else np.zeros(len(codes), dtype=np.int32)
+        return pa.DictionaryArray.from_arrays(pa.array(indices, mask=codes < 0),
+                                              pa.array(list(vocabulary), type=pa.string()))
+
+    def _to_table(self, df):
+        pa = self.pa
+        arrays = []
+        for field in self.schema:
+            if pa.types.is_dictionary(field.type):
+                # Always against the file vocabulary (a null-only dictionary would be a replacement in IPC)
+                values = df[field.name] if field.name in df else np.full(len(df), None, dtype=object)
+                arrays.append(self._dictionary_array(field.name, values))
+            elif field.name not in df or (df[field.name].dtype.kind == 'f' and not pa.types.is_floating(field.type)
+                                          and df[field.name].isna().all()):
+                # Missing, or a context column that is all NaN in this chunk
+                arrays.append(pa.nulls(len(df), field.type))
+            else:
+                values = df[field.name]
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    values = values.astype(object)
+                elif values.dtype == np.float32 and pa.types.is_float64(field.type):
+                    # Compact frames: widen through the shortest float32 repr so 0.73 stays 0.73
+                    values = values.to_numpy().astype(str).astype(np.float64)
+                arrays.append(pa.array(values, type=field.type, from_pandas=True))
+        return pa.Table.from_arrays(arrays, schema=self.schema)
+
+    def write(self, df):
+        if self.schema is None:
+            self.schema = self._schema_for(df)
+            self.writer = self._open()
+        table = self._to_table(df)
+        self.rows_written += len(df)
+        if not self.row_group_size:
+            self._write_table(table)
+            return
+        self.pending.append(table)
+        self.pending_rows += len(table)
+        if self.pending_rows >= self.row_group_size:
+            table = self.pa.concat_tables(self.pending)
+            full = len(table) - len(table) % self.row_group_size
+            self._write_table(table.slice(0, full))
+            self.pending = [table.slice(full)]
+            self.pending_rows = len(table) - full
+
+    def close(self):
+        if self.writer is not None:
+            if self.pending_rows:
+                self._write_table(self.pa.concat_tables(self.pending))
+            self.pending = []
+            self.pending_rows = 0
+            self._finish()
+            self.writer.close()
+            self.writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ParquetChunkWriter(ArrowTableWriter):
+    """Appends DataFrame chunks to one Parquet file as row groups under a single schema"""
+
+    format_name = 'Parquet'
+
+    def __init__(self, path, compression=None, row_group_size=None):
+        super().__init__(path, row_group_size)
+        import pyarrow.parquet as pq
+        self.pq = pq
+        self.compression = compression or 'snappy'
+
+    def _open(self):
+        return self.pq.ParquetWriter(self.path, self.schema, compression=self.compression)
+
+    def _write_table(self, table):
+        self.writer.write_table(table, row_group_size=self.row_group_size)
+
+    def _finish(self):
+        pass
+
+
+class ArrowChunkWriter(ArrowTableWriter):
+    """Appends DataFrame chunks to one Arrow IPC file as record batches
+
+    IPC files only allow dictionary deltas, and an empty first dictionary cannot be extended. Sparse
+    label columns, which a whole file may never populate, start from their declared labels; batches are
+    held back only while some other dictionary column has not seen a value yet (or until the file closes).
+    """
+
+    format_name = 'Arrow IPC'
+
+    def __init__(self, path, compression=None, row_group_size=None):
+        super().__init__(path, row_group_size)
+        self.compression = compression
+        self.held = []
+
+    def _open(self):
+        for field in self.schema:
+            declared = EVENT_FIELDS.get(field.name)
+            if declared is not None and declared.labels and self.pa.types.is_dictionary(field.type):
+                self.vocabularies[field.name] = {label: code for code, label in enumerate(declared.labels)}
+        options = self.pa.ipc.IpcWriteOptions(compression=self.compression, emit_dictionary_deltas=True)
+        return self.pa.ipc.new_file(self.path, self.schema, options=options)
+
+    def _write_table(self, table):
+        self.held.append(table)
+        if all(self.vocabularies.get(field.name) for field in self.schema if self.pa.types.is_dictionary(field.type)):
+            self._finish()
+
+    def _finish(self):
+        """Write held batches, unified onto the (grown) vocabulary of each dictionary column"""
+        if self.held:
+            table = self.pa.concat_tables(self.held).unify_dictionaries()
+            self.held = []
+            self.writer.write_table(table, max_chunksize=self.row_group_size)
+
+
+def _json_default(value):
+    """JSON form of NumPy scalars and arrays inside object columns"""
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _json_value(value):
+    """JSON text of one object-column value; None and NaN become null"""
+    if isinstance(value, str):
+        return encode_basestring(value)
+    if value is None or value is pd.NA or (isinstance(value, float) and value != value):
+        return 'null'
+    return json.dumps(value, default=_json_default)
+
+
+@lru_cache(maxsize=None)
+def _clock_table():
+    """'HH:MM:SS' for every second of a day"""
+    seconds = np.arange(86400)
+    return np.array([f'{h:02d}:{m:02d}:{s:02d}' for h, m, s in zip(seconds // 3600, seconds // 60 % 60, seconds % 60)])
+
+
+def _json_timestamps(key, values):
+    """'"key":"<iso>Z"' members for datetime64 values, formatted like iso_strings (NaT is null)"""
+    micros = values.astype('datetime64[us]').view(np.int64)
+    days, rest = np.divmod(micros, MICROS_PER_DAY)
+    seconds, fraction = np.divmod(rest, 1000000)
+    unique_days, day_index = np.unique(days, return_inverse=True)
+    prefixes = np.array([f'{key}"{day}T' for day in unique_days.astype('datetime64[D]')])
+    suffix = np.strings.add(np.strings.add('.', np.strings.zfill(fraction.astype(str), 6)), 'Z"')
+    suffix[fraction == 0] = 'Z"'
+    members = np.strings.add(np.strings.add(prefixes[day_index], _clock_table()[seconds]), suffix).astype(object)
+    members[np.isnat(values)] = key + 'null'
+    return members
+
+
+def _json_distinct(key, values):
+    """Members for an object array, encoding each distinct value once (values must be hashable)"""
+    codes, uniques = pd.factorize(values)
+    uniques = np.asarray(uniques, dtype=object)
+    text = ''.join(uniques) if all(isinstance(value, str) for value in uniques) else None
+    if text is not None and text.isprintable() and '"' not in text and '\\' not in text:
+        # Plain strings need no escaping, so they are quoted in one vectorized step
+        table = np.strings.add(np.strings.add(key + '"', uniques.astype(str)), '"').astype(object)
+    else:
+        table = np.array([key + _json_value(value) for value in uniques], dtype=object)
+    return np.append(table, key + 'null')[codes]
+
+
+def json_members(name, values):
+    """Object array of '"name":<JSON value>' members, one per value of a column (array, Categorical or Series)
+
+    Categories, booleans, small integer ranges and distinct floats and strings are encoded once and
+    taken by code; timestamps are assembled from day / clock tables; unhashable values (lists) go
+    through the json module one by one.
+    """
+    key = encode_basestring(name) + ':'
+    dtype = values.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        table = np.array([key + _json_value(label) for label in dtype.categories] + [key + 'null'], dtype=object)
+        codes = values.codes if isinstance(values, pd.Categorical) else values.cat.codes.to_numpy()
+        return table[codes]
+    if isinstance(dtype, pd.BooleanDtype):
+        table = np.array([key + 'false', key + 'true', key + 'null'], dtype=object)
+        return table[values.to_numpy(dtype=np.int8, na_value=2)]
+    array = np.asarray(values, dtype=object) if not isinstance(dtype, np.dtype) else np.asarray(values)
+    if array.dtype.kind == 'b':
+        return np.array([key + 'false', key + 'true'], dtype=object)[array.astype(np.int8)]
+    if array.dtype.kind == 'M':
+        return _json_timestamps(key, array)
+    if array.dtype.kind in 'iu' and len(array):
+        low, high = int(array.min()), int(array.max())
+        if high - low < JSON_INT_TABLE_SPAN:
+            table = np.strings.add(key, np.arange(low, high + 1).astype(str)).astype(object)
+            return table[array - low]
+        return np.strings.add(key, array.astype(str)).astype(object)
+    if array.dtype.kind == 'f':
+        # Scores and durations repeat heavily, so each distinct value is formatted once
+        members = np.full(len(array), key + 'null', dtype=object)
+        finite = np.flatnonzero(np.isfinite(array))
+        unique, inverse = np.unique(array[finite], return_inverse=True)
+        members[finite] = np.strings.add(key, unique.astype(str)).astype(object)[inverse]
+        return members
+    array = array.astype(object, copy=False)
+    try:
+        return _json_distinct(key, array)
+    except TypeError:
+        return np.array([key + _json_value(value) for value in array], dtype=object)
+
+
+def encode_json_lines(columns):
+    """One compact JSON object string per row (no trailing newlines), built column by column
+
+    columns is a DataFrame or a {name: values} mapping such as BatchTelemetryEngine.frame_columns.
+    Missing values are null and timestamps ISO 'Z' strings, as in the CSV output.
+    """
+    members = [json_members(name, columns[name]) for name in columns]
+    if not members or not len(members[0]):
+        return []
+    members[0] = '{' + members[0]
+    members[-1] = members[-1] + '}'
+    return list(map(','.join, zip(*members)))
+
+
+def output_suffix(output_format, compression=None):
+    """File name suffix of an output, e.g. '.csv.gz' for gzip'd CSV"""
+    if output_format in TEXT_FORMATS:
+        return f'.{output_format}' + TEXT_COMPRESSIONS.get(compression, '')
+    return f'.{output_format}'
+
+
+def open_chunk_writer(path, output_format='csv', compression=None, row_group_size=None):
+    """Create a chunk writer for output_format ('csv', 'jsonl', 'parquet' or 'arrow')
+
+    compression is 'gzip', 'zstd' or 'none' for CSV and JSON lines, and a Parquet / Arrow IPC codec
+    ('snappy', 'zstd', 'lz4', ... or 'none') otherwise; row_group_size applies to Parquet and Arrow IPC.
+    """
+    if output_format in TEXT_FORMATS:
+        if row_group_size:
+            raise ValueError("row_group_size applies to parquet and arrow output only")
+        if compression not in (None, 'none', *TEXT_COMPRESSIONS):
+            raise ValueError(f"{output_format} output takes {list(TEXT_COMPRESSIONS)} compression, not '{compression}'")
+        compression = None if compression == 'none' else compression
+        if output_format == 'csv':
+            return CSVChunkWriter(path, compression)
+        return JSONLinesChunkWriter(path, compression)
+    if compression == 'none':
+        compression = None if output_format == 'arrow' else 'none'
+    if output_format == 'parquet':
+        return ParquetChunkWriter(path, compression, row_group_size)
+    if output_format == 'arrow':
+        return ArrowChunkWriter(path, compression, row_group_size)
+    raise ValueError(f"Unknown output format '{output_format}' (expected one of {OUTPUT_FORMATS})")
+
+
+def open_run_writer(path, output_format='csv'):
+    """Writer spilling one sorted run for output_format (in its RUN_FORMATS format, uncompressed)"""
+    run_format = RUN_FORMATS[output_format]
+    if run_format == 'pickle':
+        return PickleRunWriter(path)
+    return open_chunk_writer(path, output_format, row_group_size=None if run_format == 'csv' else RUN_BATCH_ROWS)
+
+
+def run_file_name(index, output_format, prefix='run'):
+    """File name of sorted run number index"""
+    return f'{prefix}_{index:06d}.{RUN_FORMATS[output_format]}'
+
+
+def _decoded_frame(batch):
+    """DataFrame of an Arrow record batch with dictionary columns decoded to plain strings
+
+    Categoricals of a run's growing vocabulary differ from batch to batch, and concatenating
+    many of them in each merge step costs far more than the strings themselves.
+    """
+    columns = [column.dictionary_decode() if hasattr(column, 'dictionary_decode') else column
+               for column in batch.columns]
+    return type(batch).from_arrays(columns, names=batch.schema.names).to_pandas()
+
+
+def _read_run(path, output_format, batch_rows):
+    """Yield DataFrame batches from a sorted run file"""
+    run_format = RUN_FORMATS[output_format]
+    if run_format == 'pickle':
+        with open(path, 'rb') as f:
+            while True:
+                try:
+                    batch = pickle.load(f)
+                except EOFError:
+                    return
+                for offset in range(0, len(batch), batch_rows):
+                    yield batch.iloc[offset:offset + batch_rows]
+    elif run_format == 'csv':
+        # Read as text so values are written back exactly as they were spilled
+        yield from pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=batch_rows)
+    elif run_format == 'parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows):
+            yield _decoded_frame(batch)
+    else:
+        import pyarrow as pa
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                for offset in range(0, batch.num_rows, batch_rows):
+                    yield _decoded_frame(batch.slice(offset, batch_rows))
+
+
+class _MergeCursor:
+    """Position in one sorted run during a merge: its current batch, sort keys and the rows taken from it"""
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.batch = None
+        self.keys = None
+        self.start = 0          # first row not yet handed out
+        self.end = 0            # end of the rows taken so far
+        self.exhausted = False
+        self.refill()
+
+    def take(self):
+        """DataFrame of the rows taken since the last call, or None"""
+        if self.end == self.start:
+            return None
+        piece = self.batch.iloc[self.start:self.end]
+        self.start = self.end
+        return piece
+
+    def refill(self):
+        """Read the next batch behind the untaken rows (taken rows must be handed out by take() first)"""
+        rest = None if self.batch is None or self.end == len(self.batch) else self.batch.iloc[self.end:]
+        batch = next(self.reader, None)
+        if batch is None:
+            self.exhausted = True
+            batch = rest
+        elif rest is not None:
+            batch = pd.concat([rest, batch], ignore_index=True)
+        self.batch = batch
+        self.keys = None if batch is None else timestamp_sort_key(batch['timestamp']).to_numpy()
+        self.start = self.end = 0
+
+    def pending(self):
+        """Whether rows of the current batch are still untaken"""
+        return self.batch is not None and self.end < len(self.batch)
+
+
+def _merge_runs(run_paths, writer, output_format, merge_rows):
+    """K-way merge of time-sorted run files into writer, reading merge_rows rows ahead across the runs
+
+    Each step takes every buffered row before the smallest 'last timestamp' among the runs' current
+    batches (the bound), as nothing unread can precede them, and reads the next batch of the runs
+    ending at the bound; rows equal to it wait until every run is past it, so equal timestamps come
+    out in run order whatever the batch size. Taken rows are only cut out of their batches, sorted
+    and written once half of merge_rows have been taken, so a step costs a searchsorted per run.
+    """
+    batch_rows = max(MIN_MERGE_BATCH_ROWS, merge_rows // max(len(run_paths), 1))
+    flush_rows = max(batch_rows, merge_rows // 2)
+    cursors = [_MergeCursor(_read_run(path, output_format, batch_rows)) for path in run_paths]
+    taken = []
+    taken_rows = 0
+    while True:
+        active = [(i, cursor) for i, cursor in enumerate(cursors) if cursor.pending()]
+        bounds = [cursor.keys[-1] for i, cursor in active if not cursor.exhausted]
+        # Once every run is fully read, whatever is left goes out in full
+        bound = min(bounds) if bounds else None
+        for i, cursor in active:
+            cut = len(cursor.keys) if bound is None else int(np.searchsorted(cursor.keys, bound, side='left'))
+            taken_rows += cut - cursor.end
+            cursor.end = cut
+            if bound is not None and not cursor.exhausted and cursor.keys[-1] == bound:
+                piece = cursor.take()
+                if piece is not None:
+                    taken.append((i, piece))
+                cursor.refill()
+        if taken_rows >= flush_rows or not active:
+            for i, cursor in enumerate(cursors):
+                piece = cursor.take()
+                if piece is not None:
+                    taken.append((i, piece))
+            if taken:
+                # In run order, so the stable sort keeps equal timestamps in run order
+                taken.sort(key=lambda item: item[0])
+                writer.write(sort_events_by_time(pd.concat([piece for i, piece in taken], ignore_index=True)))
+            taken = []
+            taken_rows = 0
+        if not active:
+            return
+
+
+def merge_sorted_runs(run_paths, writer, output_format='csv', merge_rows=DEFAULT_MERGE_ROWS,
+                      fan_in=MAX_MERGE_FAN_IN):
+    """Merge time-sorted run files into writer with about merge_rows rows read ahead
+
+    With more than fan_in runs, consecutive groups are first merged into intermediate runs (next
+    to the first run, removed once merged again) until fan_in remain. Groups keep run order, so
+    rows with equal timestamps come out in run order exactly as in a single merge.
+    """
+    if fan_in < 2:
+        raise ValueError(f"fan_in must be at least 2, not {fan_in}")
+    run_paths = list(run_paths)
+    merge_dir = None
+    merged = 0
+    try:
+        while len(run_paths) > fan_in:
+            if merge_dir is None:
+                merge_dir = tempfile.mkdtemp(prefix='plg_merge_', dir=os.path.dirname(run_paths[0]))
+            # Merge just enough runs, fan_in at a time, to leave fan_in (or as few as one pass can)
+            excess = len(run_paths) - fan_in
+            next_paths = []
+            start = 0
+            while excess > 0 and len(run_paths) - start > 1:
+                group = run_paths[start:start + min(fan_in, excess + 1)]
+                merged_path = os.path.join(merge_dir, run_file_name(merged, output_format, 'merged'))
+                with open_run_writer(merged_path, output_format) as run_writer:
+                    _merge_runs(group, run_writer, output_format, merge_rows)
+                for path in group:
+                    if os.path.dirname(path) == merge_dir:
+                        os.remove(path)
+                next_paths.append(merged_path)
+                merged += 1
+                start += len(group)
+                excess -= len(group) - 1
+            run_paths = next_paths + run_paths[start:]
+        _merge_runs(run_paths, writer, output_format, merge_rows)
+    finally:
+        if merge_dir is not None:
+            shutil.rmtree(merge_dir, ignore_errors=True)
+
+
+def copy_runs(run_paths, writer, output_format='csv', batch_rows=DEFAULT_MERGE_BATCH_ROWS):
+    """Append run files to writer in the given order (no merge)"""
+    for path in run_paths:
+        for batch in _read_run(path, output_format, batch_rows):
+            writer.write(batch)
+
+
+def spill_run(chunk, path, output_format='csv'):
+    """Write chunk as a time-sorted run file (sorting it unless it already is); returns path"""
+    if not timestamp_sort_key(chunk['timestamp']).is_monotonic_increasing:
+        chunk = sort_events_by_time(chunk)
+    with open_run_writer(path, output_format) as run_writer:
+        run_writer.write(chunk)
+    return path
+
+
+def write_chunks(chunks, path, output_format='csv', time_ordered=False, tmp_dir=None, compression=None,
+                 row_group_size=None, merge_rows=DEFAULT_MERGE_ROWS, spill_workers=SPILL_WORKERS):
+    """Stream DataFrame chunks to path; with time_ordered, spill sorted runs and merge them at the end
+
+    Runs are sorted and written on spill_workers threads while the next chunk is pulled, so at most
+    spill_workers + 1 chunks are held. compression and row_group_size apply to the output file (runs
+    use the format defaults); merge_rows bounds the rows read ahead by the merge (merge_sorted_runs).
+    Returns the number of rows written.
+    """
+    with open_chunk_writer(path, output_format, compression, row_group_size) as writer:
+        if not time_ordered:
+            for chunk in chunks:
+                writer.write(chunk)
+            return writer.rows_written
+
+        run_dir = tempfile.mkdtemp(prefix='plg_runs_', dir=tmp_dir)
+        try:
+            run_paths = []
+            with ThreadPoolExecutor(spill_workers, thread_name_prefix='plg_spill') as pool:
+                pending = deque()
+                for i, chunk in enumerate(chunks):
+                    while len(pending) >= spill_workers:
+                        pending.popleft().result()
+                    run_path = os.path.join(run_dir, run_file_name(i, output_format))
+                    pending.append(pool.submit(spill_run, chunk, run_path, output_format))
+                    run_paths.append(run_path)
+                    # Only the spill thread holds the chunk while the next one is generated
+                    del chunk
+                for future in pending:
+                    future.result()
+            merge_sorted_runs(run_paths, writer, output_format, merge_rows)
+        finally:
+            shutil.rmtree(run_dir, ignore_errors=True)
+        return writer.rows_written
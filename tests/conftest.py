@@ -0,0 +1,49 @@
+"""
+Shared fixtures for the PLG telemetry tests: the repository modules on sys.path,
+a fixed reference time and a quiet generator factory.
+"""
+
+import contextlib
+import io
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plg_telemetry_generator import PLGTelemetryGenerator  # noqa: E402
+
+REFERENCE_TIME = datetime(2026, 1, 15, 12, 0)
+
+
+@pytest.fixture
+def quiet():
+    """Context manager that swallows the generator's progress output"""
+    return lambda: contextlib.redirect_stdout(io.StringIO())
+
+
+@pytest.fixture
+def generator():
+    return PLGTelemetryGenerator()
+
+
+def plain_values(series):
+    """Python values of a column for comparisons across dtypes (NaN / None / NaT become None, arrays lists)"""
+    values = []
+    for value in series.astype(object):
+        if isinstance(value, (list, np.ndarray)):
+            values.append(list(value))
+        elif pd.isna(value):
+            values.append(None)
+        else:
+            values.append(value.item() if isinstance(value, np.generic) else value)
+    return values
+
+
+def by_event_id(df):
+    """Rows ordered by event_id with a fresh index, so runs that differ only in tie order compare equal"""
+    return df.sort_values('event_id', kind='stable').reset_index(drop=True)
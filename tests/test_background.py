@@ -0,0 +1,109 @@
+"""Background__c persona tags parse into typed profile values (plg_background)"""
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from plg_background import (FEATURE_NAMES, BackgroundParseError, load_background_profiles, parse_background,
+                            parse_backgrounds)
+
+GUIDE_TEXT = """## **STORY SUMMARY** ;
+• Analyst exploring premium dashboards ;
+• Shares reports with a small team ;
+
+## **TAGS** ;
+### User Status & Risk ;
+** [SEGMENT]: conversion_ready ;
+** [CHURN_RISK]: medium ;
+** [CONVERSION_PROBABILITY]: 72 ;
+### Usage & Activity ;
+** [AVERAGE_SESSION_FREQUENCY]: 1/day, 5/week, 22/month ;
+** [PRIMARY_FEATURES]: core_analytics:80,data_export:35 ;
+** [ERROR_RATE]: 1.5 ;
+** [USAGE_LIMITS_HIT]: 3 ;
+### Account & Tenure ;
+** [SIGNUP]: Fixed Date = 2024-03-01 09:30:00, Relative Date = -400 ;
+** [LAST_LOGIN]: Fixed Date = 2025-07-10 17:05:00, Relative Date = -3 ;
+** [CURRENT_PLAN]: starter ;
+### User Sophistication & Collaboration ;
+** [API_USAGE]: false ;
+** [UPGRADE_EXPLORATION]: true ;
+"""
+
+INLINE_TEXT = ('[SEGMENT]: Champion [SESSION_FREQUENCY]: weekly [CHURN_RISK]: low [CONVERSION_PROBABILITY]: 88\n'
+               '[SIGNUP]: 2024-04-28 [LAST_LOGIN]: 2025-07-10 [UNKNOWN_TAG]: ignored\n\n• CEO using dashboards')
+
+
+def test_guide_layout():
+    profile = parse_background(GUIDE_TEXT)
+    assert profile['segment'] == 'conversion_ready'
+    assert profile['churn_risk'] == 'medium'
+    assert profile['conversion_probability'] == 72
+    assert profile['usage_limits_hit'] == 3
+    assert profile['error_rate'] == 1.5
+    assert profile['current_plan'] == 'starter'
+    assert profile['api_usage'] is False and profile['upgrade_exploration'] is True
+    assert profile['signup'] == datetime(2024, 3, 1, 9, 30)
+    assert profile['last_login'] == datetime(2025, 7, 10, 17, 5)
+    assert (profile['sessions_per_day'], profile['sessions_per_week'], profile['sessions_per_month']) == (1, 5, 22)
+    assert profile['feature_core_analytics'] == 80 and profile['feature_data_export'] == 35
+    assert all(profile[f'feature_{name}'] == 0 for name in FEATURE_NAMES if name not in ('core_analytics', 'data_export'))
+    assert profile['story'] == 'Analyst exploring premium dashboards\nShares reports with a small team'
+
+
+def test_inline_layout_with_legacy_session_frequency():
+    profile = parse_background(INLINE_TEXT)
+    assert profile['segment'] == 'champion'
+    assert profile['session_frequency'] == 'weekly'
+    assert (profile['sessions_per_day'], profile['sessions_per_week'], profile['sessions_per_month']) == (0, 2, 8)
+    assert profile['signup'] == datetime(2024, 4, 28)
+    assert 'unknown_tag' not in profile
+    assert profile['story'] == 'CEO using dashboards'
+
+
+@pytest.mark.parametrize('tag, value', [
+    ('SEGMENT', 'whale'),
+    ('CHURN_RISK', 'extreme'),
+    ('CONVERSION_PROBABILITY', '101'),
+    ('USAGE_LIMITS_HIT', '-2'),
+    ('ERROR_RATE', 'often'),
+    ('API_USAGE', 'yes'),
+    ('LAST_LOGIN', '2025-13-40'),
+    ('SIGNUP', 'last spring'),
+    ('AVERAGE_SESSION_FREQUENCY', 'daily-ish'),
+    ('PRIMARY_FEATURES', 'core_analytics:180'),
+    ('PRIMARY_FEATURES', 'teleportation:10')
+])
+def test_malformed_tag_value(tag, value):
+    # A repeated tag replaces the earlier value
+    with pytest.raises(BackgroundParseError, match=rf'\[{tag}\]'):
+        parse_background(f'{INLINE_TEXT}\n[{tag}]: {value}')
+
+
+def test_missing_required_tags():
+    with pytest.raises(BackgroundParseError, match='missing required tags: CHURN_RISK'):
+        parse_background(INLINE_TEXT.replace('[CHURN_RISK]: low', ''))
+
+
+def test_parse_backgrounds_skips_empty_texts_and_collects_errors():
+    profiles, errors = parse_backgrounds(['a', 'b', 'c', 'd'], [GUIDE_TEXT, '', '[SEGMENT]: champion', GUIDE_TEXT])
+    assert list(profiles.index) == ['a', 'd']
+    assert profiles['segment'].dtype == pd.CategoricalDtype(['champion', 'engaged', 'casual', 'conversion_ready',
+                                                               'at_risk'])
+    assert [key for key, message in errors] == ['c']
+
+
+def test_profiles_are_cached_by_export_content(tmp_path):
+    path = tmp_path / 'contacts.csv'
+    pd.DataFrame({'Id': ['a', 'b'], 'Background__c': [GUIDE_TEXT, INLINE_TEXT]}).to_csv(path, index=False)
+    profiles, errors = load_background_profiles(str(path))
+    assert not errors and list(profiles.index) == ['a', 'b']
+    assert len(list((tmp_path / '.plg_cache').glob('background_*.pkl'))) == 1
+
+    cached, _ = load_background_profiles(str(path))
+    pd.testing.assert_frame_equal(cached, profiles)
+
+    pd.DataFrame({'Id': ['a'], 'Background__c': [INLINE_TEXT]}).to_csv(path, index=False)
+    changed, _ = load_background_profiles(str(path))
+    assert list(changed.index) == ['a'] and changed.loc['a', 'segment'] == 'champion'
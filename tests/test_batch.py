@@ -0,0 +1,68 @@
+"""The batch engine returns exactly the requested records, in time order (plg_batch)"""
+
+import json
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import REFERENCE_TIME, plain_values
+from plg_batch import CUSTOM_PROPERTY_KEYS
+
+
+@pytest.mark.parametrize('total_records', [4, 997, 20000])
+def test_batch_returns_total_records_sorted_by_time(quiet, generator, total_records):
+    with quiet():
+        df = generator.generate_dataset(total_records, engine='batch', seed=1, reference_time=REFERENCE_TIME)
+    assert len(df) == total_records
+    assert df['timestamp'].is_monotonic_increasing
+
+
+@pytest.mark.parametrize('workers', [None, 2])
+def test_batch_run_without_users_is_empty_with_every_column(quiet, generator, workers):
+    with quiet():
+        full = generator.generate_dataset(100, engine='batch', seed=1, reference_time=REFERENCE_TIME)
+        empty = generator.generate_dataset(3, engine='batch', seed=1, reference_time=REFERENCE_TIME, workers=workers)
+    assert empty.empty
+    assert list(empty.columns) == list(full.columns)
+
+
+def test_compact_frames_keep_values_and_share_categories(quiet, generator):
+    with quiet():
+        full = generator.generate_dataset(3000, engine='batch', seed=4, reference_time=REFERENCE_TIME)
+        compact = generator.generate_dataset(3000, engine='batch', seed=4, reference_time=REFERENCE_TIME,
+                                             compact=True)
+        scalar = generator.generate_dataset(3000, engine='scalar', reference_time=REFERENCE_TIME, compact=True)
+    assert compact.memory_usage(deep=True).sum() < full.memory_usage(deep=True).sum() / 4
+    for column in full.columns:
+        if compact[column].dtype == 'float32':
+            assert np.allclose(compact[column], full[column], equal_nan=True), column
+        else:
+            assert plain_values(compact[column]) == plain_values(full[column]), column
+
+    categories = generator.compact_category_dtypes()
+    for column in compact.columns.intersection(list(categories)):
+        assert compact[column].dtype == categories[column], column
+    assert scalar['event_type'].dtype == categories['event_type']
+    assert scalar['subscription_tier'].dtype == categories['subscription_tier']
+
+
+@pytest.mark.parametrize('engine', ['scalar', 'batch'])
+def test_property_columns_hold_the_custom_properties_values(quiet, engine):
+    from plg_telemetry_generator import PLGTelemetryGenerator
+    seed = 6 if engine == 'batch' else None
+    with quiet():
+        # The scalar engine draws from the global random states
+        random.seed(6)
+        np.random.seed(6)
+        as_json = PLGTelemetryGenerator().generate_dataset(2000, engine=engine, seed=seed,
+                                                           reference_time=REFERENCE_TIME)
+        random.seed(6)
+        np.random.seed(6)
+        as_columns = PLGTelemetryGenerator(properties_format='columns').generate_dataset(
+            2000, engine=engine, seed=seed, reference_time=REFERENCE_TIME)
+    assert 'custom_properties' not in as_columns
+    properties = pd.DataFrame([json.loads(value) for value in as_json['custom_properties']])
+    for key in CUSTOM_PROPERTY_KEYS:
+        assert as_columns[f'property_{key}'].tolist() == properties[key].tolist(), key
@@ -0,0 +1,45 @@
+"""Contact exports load only the needed fields, through a snapshot rebuilt when the export changes (plg_contacts)"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from plg_contacts import CONTACT_COLUMNS, load_contacts, read_contacts_csv
+
+
+def write_export(path, rows):
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+def test_only_contact_columns_are_read(tmp_path):
+    path = tmp_path / 'All_Contacts.csv'
+    write_export(path, {'Id': ['003A', '003B'], 'Email': ['a@x.io', 'b@x.io'], 'Unused__c': ['1', '2'],
+                        'Background__c': ['[SEGMENT]: Champion\n• multi-line', '']})
+    contacts = read_contacts_csv(str(path))
+    assert list(contacts.columns) == CONTACT_COLUMNS
+    assert contacts['Background__c'].tolist() == ['[SEGMENT]: Champion\n• multi-line', '']
+    assert contacts['Title'].tolist() == ['', '']
+
+
+def test_missing_id_column_is_an_error(tmp_path):
+    path = tmp_path / 'All_Contacts.csv'
+    write_export(path, {'Email': ['a@x.io']})
+    with pytest.raises(ValueError, match='Id'):
+        read_contacts_csv(str(path))
+
+
+def test_snapshot_is_rebuilt_when_the_export_changes(tmp_path):
+    pytest.importorskip('pyarrow')
+    path = tmp_path / 'All_Contacts.csv'
+    cache_dir = str(tmp_path / 'cache')
+    write_export(path, {'Id': ['003A'], 'Tier__c': ['Free']})
+    assert load_contacts(str(path), cache_dir)['Tier__c'].tolist() == ['Free']
+    assert load_contacts(str(path), cache_dir)['Tier__c'].tolist() == ['Free']
+
+    # Same size, different contents: the export is re-hashed and a new snapshot written
+    write_export(path, {'Id': ['003A'], 'Tier__c': ['Paid']})
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert load_contacts(str(path), cache_dir)['Tier__c'].tolist() == ['Paid']
+    assert len([name for name in os.listdir(cache_dir) if name.endswith('.parquet')]) == 2
@@ -0,0 +1,67 @@
+"""Seeded datasets do not depend on how they are produced: chunk size, streaming or worker count"""
+
+import pandas as pd
+import pytest
+
+from conftest import REFERENCE_TIME, by_event_id
+
+# Enough users for several batch-engine blocks (plg_batch BLOCK_USERS)
+SHARDED_RECORDS = 48000
+
+
+def test_sharded_output_matches_for_any_worker_count(quiet, generator):
+    with quiet():
+        single = generator.generate_dataset(SHARDED_RECORDS, engine='batch', seed=7, reference_time=REFERENCE_TIME)
+        two = generator.generate_dataset(SHARDED_RECORDS, engine='batch', seed=7, reference_time=REFERENCE_TIME,
+                                         workers=2)
+        three = generator.generate_dataset(SHARDED_RECORDS, engine='batch', seed=7, reference_time=REFERENCE_TIME,
+                                           workers=3)
+    assert len(single) == SHARDED_RECORDS
+    pd.testing.assert_frame_equal(two, three)
+    pd.testing.assert_frame_equal(single, two)
+
+
+@pytest.mark.parametrize('engine', ['scalar', 'batch'])
+def test_seeded_chunks_are_stable_across_chunk_sizes(quiet, generator, engine):
+    runs = []
+    with quiet():
+        for chunk_size in (700, 2600):
+            chunks = list(generator.iter_dataset_chunks(6000, chunk_size, engine=engine, seed=11,
+                                                        reference_time=REFERENCE_TIME))
+            assert all(len(chunk) <= chunk_size for chunk in chunks)
+            runs.append(by_event_id(pd.concat(chunks)))
+    pd.testing.assert_frame_equal(runs[0], runs[1])
+
+
+def test_streamed_and_in_memory_batch_runs_match(quiet, generator, tmp_path):
+    paths = [tmp_path / 'small.parquet', tmp_path / 'large.parquet', tmp_path / 'sharded.parquet']
+    with quiet():
+        df = generator.generate_dataset(20000, engine='batch', seed=11, reference_time=REFERENCE_TIME)
+        generator.write_dataset(str(paths[0]), 20000, 2000, 'parquet', engine='batch', seed=11,
+                                reference_time=REFERENCE_TIME)
+        generator.write_dataset(str(paths[1]), 20000, 7000, 'parquet', engine='batch', seed=11,
+                                reference_time=REFERENCE_TIME)
+        generator.write_dataset(str(paths[2]), 20000, 2000, 'parquet', engine='batch', seed=11,
+                                reference_time=REFERENCE_TIME, workers=2)
+    expected = by_event_id(df)[['event_id', 'session_id', 'user_id', 'event_type']]
+    for path in paths:
+        written = by_event_id(pd.read_parquet(path))[expected.columns].astype(object)
+        pd.testing.assert_frame_equal(written, expected.astype(object))
+
+
+def test_batch_event_ids_are_unique(quiet, generator):
+    with quiet():
+        df = generator.generate_dataset(SHARDED_RECORDS, engine='batch', seed=3, reference_time=REFERENCE_TIME)
+    assert df['event_id'].is_unique
+    assert df.groupby('session_id')['user_id'].nunique().max() == 1
+
+
+@pytest.mark.parametrize('engine', ['scalar', 'batch'])
+def test_events_for_user_matches_the_dataset(quiet, generator, engine):
+    with quiet():
+        df = generator.generate_dataset(20000, engine=engine, seed=11, reference_time=REFERENCE_TIME)
+    for row in (0, len(df) // 2):
+        user_id = df['user_id'].iloc[row]
+        user_index = int(user_id.rsplit('_', 1)[-1])
+        one = generator.events_for_user(user_index, 20000, 11, REFERENCE_TIME, engine=engine)
+        assert sorted(one['event_id']) == sorted(df.loc[df['user_id'] == user_id, 'event_id'])
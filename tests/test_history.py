@@ -0,0 +1,58 @@
+"""Contact histories span each persona's tenure and stream like in-memory runs (plg_history)"""
+
+import pandas as pd
+import pytest
+
+from conftest import by_event_id
+
+PERSONAS = {
+    '003A': ('[SEGMENT]: champion [CHURN_RISK]: low [CONVERSION_PROBABILITY]: 90 [SIGNUP]: 2025-01-10 '
+             '[LAST_LOGIN]: 2025-06-30 [AVERAGE_SESSION_FREQUENCY]: 0/day, 3/week, 0/month '
+             '[PRIMARY_FEATURES]: core_analytics:90 [ERROR_RATE]: 5'),
+    '003B': ('[SEGMENT]: casual [CHURN_RISK]: high [CONVERSION_PROBABILITY]: 10 [SIGNUP]: 2025-05-01 '
+             '[LAST_LOGIN]: 2025-07-04 [AVERAGE_SESSION_FREQUENCY]: 0/day, 0/week, 2/month'),
+    '003C': '',
+}
+
+
+@pytest.fixture
+def contacts_path(tmp_path):
+    path = tmp_path / 'All_Contacts.csv'
+    pd.DataFrame({'Id': list(PERSONAS), 'FirstName': ['Ada', 'Ben', 'Cy'], 'LastName': ['Park', 'Ruiz', 'Ode'],
+                  'Email': ['ada@corp.io', '', ''], 'Tier__c': ['Premium', '', ''],
+                  'Background__c': list(PERSONAS.values())}).to_csv(path, index=False)
+    return str(path)
+
+
+def test_sessions_span_signup_to_last_login(quiet, generator, contacts_path):
+    with quiet():
+        df = generator.generate_history(contacts_path, seed=3)
+
+    assert df['user_email'].nunique() == 2 and 'ada@corp.io' in set(df['user_email'])
+    assert set(df.loc[df['user_email'] == 'ada@corp.io', 'subscription_tier']) == {'Premium'}
+    assert df['timestamp'].is_monotonic_increasing
+    for email, signup, last_login in [('ada@corp.io', '2025-01-10', '2025-06-30'),
+                                      ('ben.ruiz@example.com', '2025-05-01', '2025-07-04')]:
+        days = df.loc[df['user_email'] == email, 'timestamp'].dt.normalize()
+        assert days.min() >= pd.Timestamp(signup)
+        assert (days == pd.Timestamp(last_login)).any()
+        assert days.max() <= pd.Timestamp(last_login) + pd.Timedelta(days=1)
+
+
+def test_streamed_history_matches_in_memory(quiet, generator, contacts_path, tmp_path):
+    pytest.importorskip('pyarrow')
+    path = tmp_path / 'history.parquet'
+    with quiet():
+        df = generator.generate_history(contacts_path, seed=3)
+        generator.write_history(str(path), contacts_path, chunk_size=50, output_format='parquet', seed=3)
+    columns = ['event_id', 'session_id', 'user_id', 'event_type', 'timestamp']
+    written = by_event_id(pd.read_parquet(path))[columns].astype(object)
+    pd.testing.assert_frame_equal(written, by_event_id(df)[columns].astype(object))
+
+
+def test_contacts_without_personas_give_an_empty_history(quiet, generator, tmp_path):
+    path = tmp_path / 'All_Contacts.csv'
+    pd.DataFrame({'Id': ['003C'], 'Background__c': ['']}).to_csv(path, index=False)
+    with quiet():
+        df = generator.generate_history(str(path), seed=3)
+    assert df.empty and 'user_email' in df
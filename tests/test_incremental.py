@@ -0,0 +1,40 @@
+"""Incremental runs append only past events and never reuse an ID (plg_incremental)"""
+
+import glob
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+RUN_TIMES = ['2026-10-01 09:00', '2026-10-02 18:00', '2026-10-02 18:07', '2026-10-03 12:00']
+
+
+def read_dataset(path):
+    return pd.concat([pd.read_parquet(part) for part in glob.glob(f'{path}/event_date=*/*.parquet')],
+                     ignore_index=True)
+
+
+def test_ids_unique_and_events_before_watermark_across_runs(quiet, generator, tmp_path):
+    pytest.importorskip('pyarrow')
+    path = str(tmp_path / 'dataset')
+    previous = 0
+    for run_time in RUN_TIMES:
+        now = datetime.fromisoformat(run_time)
+        with quiet():
+            generator.write_incremental(path, 8000, 'parquet', seed=4, reference_time=now)
+        df = read_dataset(path)
+        assert len(df) > previous
+        assert df['timestamp'].max() < pd.Timestamp(now)
+        assert df['event_id'].is_unique
+        assert df.groupby('session_id')['user_id'].nunique().max() == 1
+        previous = len(df)
+
+
+def test_rerun_at_the_watermark_appends_nothing(quiet, generator, tmp_path):
+    pytest.importorskip('pyarrow')
+    path = str(tmp_path / 'dataset')
+    now = datetime.fromisoformat(RUN_TIMES[0])
+    with quiet():
+        generator.write_incremental(path, 4000, 'parquet', seed=4, reference_time=now)
+        summary = generator.write_incremental(path, 4000, 'parquet', seed=4, reference_time=now)
+    assert summary.events == 0
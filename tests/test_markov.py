@@ -0,0 +1,61 @@
+"""Markov sessions are well-formed walks of their (tier, segment) chains (plg_markov)"""
+
+import numpy as np
+import pytest
+
+from conftest import REFERENCE_TIME
+from plg_batch import BatchTelemetryEngine
+from plg_markov import MAX_SESSION_EVENTS
+from plg_telemetry_generator import PLGTelemetryGenerator
+
+SESSIONS_PER_PATTERN = 20000
+
+
+@pytest.fixture(scope='module')
+def engine():
+    return BatchTelemetryEngine(PLGTelemetryGenerator(session_model='markov'))
+
+
+@pytest.fixture(scope='module')
+def sampled(engine):
+    pattern = np.repeat(np.arange(len(engine.pattern_names)), SESSIONS_PER_PATTERN)
+    length, events = engine.markov.sample(np.random.default_rng(4), pattern)
+    return pattern, length, events
+
+
+def test_transition_rows_are_distributions(engine):
+    matrices = engine.markov.matrices
+    assert (matrices >= 0).all()
+    np.testing.assert_allclose(matrices.sum(axis=2), 1.0)
+    frame = engine.markov.transitions(engine.tiers[0], engine.segments[0])
+    np.testing.assert_allclose(frame.sum(axis=1), 1.0)
+
+
+def test_sessions_are_capped_and_open_like_their_pattern(engine, sampled):
+    pattern, length, events = sampled
+    assert length.sum() == len(events)
+    assert 1 <= length.min() and length.max() <= MAX_SESSION_EVENTS
+    first = np.cumsum(length) - length
+    np.testing.assert_array_equal(events[first], engine.pattern_events[engine.pattern_offset[pattern]])
+    # Every session of a pattern with a second event opens with it
+    opened = engine.pattern_length[pattern] > 1
+    assert (length[opened] >= 2).all()
+    np.testing.assert_array_equal(events[first[opened] + 1],
+                                  engine.pattern_events[engine.pattern_offset[pattern[opened]] + 1])
+
+
+def test_mean_length_matches_the_sampled_sessions(engine, sampled):
+    pattern, length, events = sampled
+    empirical = np.bincount(pattern, weights=length) / SESSIONS_PER_PATTERN
+    np.testing.assert_allclose(empirical, engine.markov.mean_length, rtol=0.03)
+
+
+def test_markov_datasets_are_seeded_and_batch_only(quiet):
+    generator = PLGTelemetryGenerator(session_model='markov')
+    with quiet():
+        runs = [generator.generate_dataset(5000, engine='batch', seed=2, reference_time=REFERENCE_TIME)
+                for _ in range(2)]
+    assert runs[0]['event_id'].tolist() == runs[1]['event_id'].tolist()
+    assert runs[0].groupby('session_id').size().max() <= MAX_SESSION_EVENTS
+    with pytest.raises(ValueError, match='markov'):
+        generator.generate_dataset(100, engine='scalar', seed=2)
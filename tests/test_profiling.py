@@ -0,0 +1,62 @@
+"""Profiled runs report their stages and counters without changing the output (plg_profiling)"""
+
+import json
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import REFERENCE_TIME
+from plg_profiling import NULL_PROFILER, StageProfiler
+from plg_telemetry_generator import PLGTelemetryGenerator, PROFILE_SAMPLE_EVERY
+
+
+def stage_names(report):
+    return {stage['stage'] for stage in report['stages']}
+
+
+@pytest.mark.parametrize('engine, stages', [
+    ('scalar', {'user_profiles', 'sessions', 'events', 'dataframe', 'sort'}),
+    ('batch', {'compile_tables', 'generate', 'sort', 'dataframe'})
+])
+def test_profiled_run_matches_and_reports_stages(quiet, generator, engine, stages):
+    profiled_generator = PLGTelemetryGenerator()
+    profiler = profiled_generator.enable_profiling()
+    runs = []
+    with quiet():
+        for gen in (generator, profiled_generator):
+            # The scalar engine draws from the global random states
+            random.seed(6)
+            np.random.seed(6)
+            runs.append(gen.generate_dataset(2000, engine=engine, seed=6, reference_time=REFERENCE_TIME))
+        report = profiler.print_report()
+    plain, profiled = runs
+
+    pd.testing.assert_frame_equal(profiled, plain)
+    assert stages <= stage_names(report)
+    assert report['counters']['events'] == len(plain)
+    assert all(stage['seconds'] >= 0 and stage['calls'] > 0 for stage in report['stages'])
+    if engine == 'scalar':
+        sampled = {stage['stage']: stage for stage in report['stages']}['events']
+        assert sampled['sampled_every'] == PROFILE_SAMPLE_EVERY
+
+
+def test_profiling_hooks_and_saved_report(tmp_path):
+    profiler = StageProfiler(profile_calls=True, trace_memory=True, top=5)
+    profiler.start()
+    with profiler.stage('work'):
+        sorted(range(100000), key=lambda value: -value)
+    profiler.count('items', 3)
+    report = profiler.report()
+
+    assert stage_names(report) == {'work'} and report['counters'] == {'items': 3}
+    assert len(report['top_functions']) <= 5 and report['memory']['peak_mb'] >= 0
+    profiler.save(str(tmp_path / 'profile.json'), report)
+    assert json.loads((tmp_path / 'profile.json').read_text()) == report
+
+
+def test_null_profiler_is_a_no_op():
+    with NULL_PROFILER.stage('anything'):
+        NULL_PROFILER.count('events', 5)
+    assert not NULL_PROFILER.enabled
@@ -0,0 +1,34 @@
+"""Replays send every event once, in timestamp order, at the requested pace (plg_replay)"""
+
+import json
+
+import pandas as pd
+import pytest
+
+from conftest import REFERENCE_TIME
+
+RECORDS = 2000
+RATE = 8000
+
+
+def read_lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.parametrize('rate', [None, RATE])
+def test_replay_sends_the_dataset_in_time_order(quiet, generator, tmp_path, rate):
+    path = str(tmp_path / 'replay.jsonl')
+    with quiet():
+        df = generator.generate_dataset(RECORDS, engine='batch', seed=9, reference_time=REFERENCE_TIME)
+        stats = generator.replay(path, RECORDS, seed=9, reference_time=REFERENCE_TIME, rate=rate, batch_size=300)
+    events = read_lines(path)
+
+    assert stats['events'] == len(events) == len(df)
+    assert [event['event_id'] for event in events] == df['event_id'].tolist()
+    timestamps = pd.to_datetime([event['timestamp'] for event in events], utc=True, format='ISO8601')
+    assert timestamps.is_monotonic_increasing
+    if rate:
+        # Event i is not due before i / rate seconds after the first
+        assert stats['seconds'] >= (len(events) - 1) / rate * 0.95
+        assert stats['events_per_sec'] <= rate * 1.05
@@ -0,0 +1,50 @@
+"""Samplers reproduce np.random.choice and their declared probabilities (plg_sampling)"""
+
+import numpy as np
+import pytest
+
+from plg_sampling import CategoricalSampler, ConditionalSampler
+
+DRAWS = 200000
+
+
+@pytest.mark.parametrize('weights', [
+    {'Free': 0.6, 'Basic': 0.25, 'Premium': 0.12, 'Cancelled': 0.03},
+    {'current': 0.92, 'past_due': 0.06, 'failed': 0.02},
+    {'only': 1.0}
+])
+def test_categorical_draw_matches_np_random_choice(weights):
+    sampler = CategoricalSampler(weights)
+    labels, p = list(weights.keys()), list(weights.values())
+
+    np.random.seed(1234)
+    expected = [np.random.choice(labels, p=p) for _ in range(2000)]
+    np.random.seed(1234)
+    assert [sampler.draw() for _ in range(2000)] == expected
+
+    state = np.random.RandomState(99)
+    expected = [state.choice(labels, p=p) for _ in range(2000)]
+    state = np.random.RandomState(99)
+    assert [sampler.draw(state) for _ in range(2000)] == expected
+
+
+def test_conditional_draw_codes_follow_probabilities(generator):
+    sampler = generator.depth_sampler
+    rng = np.random.default_rng(5)
+    key_codes = rng.integers(0, len(sampler.keys), DRAWS)
+    codes = sampler.draw_codes(key_codes, rng)
+
+    probabilities = sampler.probabilities()
+    assert np.allclose(probabilities.sum(axis=1), 1.0)
+    for key in range(len(sampler.keys)):
+        drawn = codes[key_codes == key]
+        frequencies = np.bincount(drawn, minlength=len(sampler.labels)) / len(drawn)
+        assert np.allclose(frequencies, probabilities[key], atol=0.02), sampler.keys[key]
+
+
+def test_conditional_sampler_uses_the_default_for_unknown_keys():
+    sampler = ConditionalSampler({'Free': {'casual': 0.5, 'power': 0.5}}, default={'casual': 1.0})
+    assert sampler.labels == ['casual', 'power']
+    assert sampler.draw('Enterprise', np.random.RandomState(0)) == 'casual'
+    with pytest.raises(KeyError):
+        ConditionalSampler({'Free': {'casual': 1.0}}).draw('Enterprise')
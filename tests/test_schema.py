@@ -0,0 +1,34 @@
+"""Scalar and batch engines produce the declared output schema (plg_schema)"""
+
+import pytest
+
+from conftest import REFERENCE_TIME
+from plg_schema import output_columns
+
+
+@pytest.mark.parametrize('properties_format', ['json', 'columns'])
+@pytest.mark.parametrize('compact', [False, True])
+def test_scalar_and_batch_columns_and_dtypes_match(quiet, properties_format, compact):
+    from plg_telemetry_generator import PLGTelemetryGenerator
+    generator = PLGTelemetryGenerator(properties_format=properties_format)
+    with quiet():
+        scalar = generator.generate_dataset(2000, engine='scalar', seed=5, reference_time=REFERENCE_TIME,
+                                            compact=compact)
+        batch = generator.generate_dataset(2000, engine='batch', seed=5, reference_time=REFERENCE_TIME,
+                                           compact=compact)
+
+    assert list(scalar.columns) == output_columns(properties_format)
+    assert list(batch.columns) == output_columns(properties_format)
+    assert len(scalar) == len(batch) == 2000
+    if not compact:
+        # Compact categoricals carry each engine's own category list, so only their kinds must agree
+        assert scalar.dtypes.to_dict() == batch.dtypes.to_dict()
+    else:
+        assert [dtype.kind for dtype in scalar.dtypes] == [dtype.kind for dtype in batch.dtypes]
+
+
+@pytest.mark.parametrize('engine', ['scalar', 'batch'])
+def test_empty_dataset_has_the_full_schema(quiet, generator, engine):
+    with quiet():
+        df = generator.generate_dataset(1, engine=engine, seed=1, reference_time=REFERENCE_TIME)
+    assert list(df.columns) == output_columns()
@@ -0,0 +1,63 @@
+"""Report summaries merge across any split of the events (plg_summary)"""
+
+import pytest
+
+from conftest import REFERENCE_TIME
+from plg_summary import DatasetSummary
+
+# Statistics taken from the events alone (users are counted separately, by add_user / add_block)
+EVENT_STATISTICS = ['segments', 'events', 'sessions', 'first_timestamp', 'last_timestamp', 'tier_events',
+                    'tier_sums', 'scenario_sums']
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    import contextlib
+    import io
+    from plg_telemetry_generator import PLGTelemetryGenerator
+    summary = DatasetSummary()
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = PLGTelemetryGenerator().generate_dataset(12000, engine='batch', seed=8, reference_time=REFERENCE_TIME,
+                                                      summary=summary)
+    return df, summary
+
+
+def frame_summary(df):
+    summary = DatasetSummary()
+    summary.add_frame(df)
+    return summary
+
+
+def event_statistics(summary):
+    return {name: getattr(summary, name) for name in EVENT_STATISTICS}
+
+
+@pytest.mark.parametrize('bounds', [[1], [4000, 4001, 9999], list(range(0, 12000, 997))])
+def test_merged_split_summaries_equal_the_whole(dataset, bounds):
+    df, _ = dataset
+    # Splits land inside sessions too; each session still counts once, at its first event
+    edges = [0] + bounds + [len(df)]
+    merged = DatasetSummary()
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        merged.merge(frame_summary(df.iloc[lo:hi]))
+    assert vars(merged) == vars(frame_summary(df))
+
+
+def test_block_summary_matches_the_frame(dataset):
+    df, summary = dataset
+    assert summary.events == len(df)
+    assert summary.sessions == df['session_id'].nunique()
+    assert summary.users == df['user_id'].nunique()
+    assert event_statistics(summary) == event_statistics(frame_summary(df))
+
+
+def test_streamed_and_sharded_summaries_match(quiet, generator, tmp_path, dataset):
+    _, summary = dataset
+    with quiet():
+        streamed = generator.write_dataset(str(tmp_path / 'events.csv'), 12000, 2500, 'csv', engine='batch', seed=8,
+                                           reference_time=REFERENCE_TIME)
+        sharded = DatasetSummary()
+        generator.generate_dataset(12000, engine='batch', seed=8, reference_time=REFERENCE_TIME, workers=2,
+                                   summary=sharded)
+    assert vars(streamed) == vars(summary)
+    assert vars(sharded) == vars(summary)
@@ -0,0 +1,88 @@
+"""Uploads against the local Ingestion API stub: payload packing, retries and aborted jobs (plg_upload)"""
+
+import pytest
+
+import plg_upload
+from conftest import REFERENCE_TIME
+from plg_ingest_stub import IngestionStub
+from plg_upload import BACKOFF_BASE, BACKOFF_MAX, DEFAULT_OBJECT, BulkUploader, PayloadPacker
+
+
+class ScriptedStub(IngestionStub):
+    """Stub answering its first matching requests with scripted (status, headers) failures"""
+
+    def __init__(self, script, method):
+        super().__init__()
+        self.script = list(script)
+        self.method = method
+
+    def handle(self, method, path, headers, body):
+        with self.lock:
+            failure = self.script.pop(0) if method == self.method and self.script else None
+        if failure is not None:
+            status, extra = failure
+            with self.lock:
+                self.requests += 1
+            return status, {'error': 'scripted failure'}, extra
+        return super().handle(method, path, headers, body)
+
+
+@pytest.fixture(scope='module')
+def chunks():
+    import contextlib
+    import io
+    from plg_telemetry_generator import PLGTelemetryGenerator
+    with contextlib.redirect_stdout(io.StringIO()):
+        return list(PLGTelemetryGenerator().iter_dataset_chunks(3000, 700, engine='batch', seed=12,
+                                                                reference_time=REFERENCE_TIME))
+
+
+@pytest.mark.parametrize('upload_format, max_payload_bytes', [('json', 40000), ('csv', 60000)])
+def test_payload_rows_add_up_to_the_chunks(chunks, upload_format, max_payload_bytes):
+    with IngestionStub() as stub:
+        stats = BulkUploader(stub.url, upload_format, max_payload_bytes=max_payload_bytes, workers=3).upload(chunks)
+    rows = sum(len(chunk) for chunk in chunks)
+    assert sum(batch['rows'] for batch in stats['batches']) == stats['rows'] == rows
+    assert stats['payloads'] > len(chunks)
+    assert all(batch['bytes'] <= max_payload_bytes for batch in stats['batches'])
+    assert stub.records[DEFAULT_OBJECT] == rows and stub.rejected == 0
+    if upload_format == 'csv':
+        assert [job['state'] for job in stub.jobs.values()] == ['UploadComplete']
+
+
+def test_throttled_requests_are_retried_after_a_backoff(chunks, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(plg_upload.time, 'sleep', sleeps.append)
+    with ScriptedStub([(429, {'Retry-After': '2'}), (503, {})], 'POST') as stub:
+        stats = BulkUploader(stub.url, 'json', workers=1).upload(chunks[:1])
+    assert stats['retries'] == 2 and stats['batches'][0]['attempts'] == 3
+    # Retry-After is honoured as given; without one the wait is the jittered exponential backoff
+    assert sleeps[0] == 2.0
+    assert BACKOFF_BASE * 2 * 0.5 <= sleeps[1] <= BACKOFF_BASE * 2
+    assert stub.records[DEFAULT_OBJECT] == len(chunks[0])
+
+
+def test_rejected_payload_fails_and_aborts_the_job(chunks):
+    with ScriptedStub([(400, {})], 'PUT') as stub:
+        with pytest.raises(ConnectionError, match='HTTP 400'):
+            BulkUploader(stub.url, 'csv', workers=1).upload(chunks)
+    assert [job['state'] for job in stub.jobs.values()] == ['Aborted']
+    assert stub.records[DEFAULT_OBJECT] == 0
+
+
+def test_row_larger_than_a_payload_is_an_error(chunks):
+    packer = PayloadPacker(64, b'{"data":[', b',', b']}')
+    assert list(packer.add([b'{}'] * 3)) == [] and packer.flush() == (3, b'{"data":[{},{},{}]}')
+    with pytest.raises(ValueError, match='does not fit'):
+        list(packer.add([b'x' * 64]))
+
+    with IngestionStub() as stub:
+        with pytest.raises(ValueError, match='does not fit'):
+            BulkUploader(stub.url, 'json', max_payload_bytes=200).upload(chunks[:1])
+    assert stub.records[DEFAULT_OBJECT] == 0
+
+
+def test_backoff_is_capped():
+    uploader = BulkUploader('http://127.0.0.1:1')
+    assert uploader.backoff(0, retry_after=600) == BACKOFF_MAX
+    assert all(uploader.backoff(20) <= BACKOFF_MAX for _ in range(10))
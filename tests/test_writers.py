@@ -0,0 +1,122 @@
+"""Every output format and compression round-trips the generated values (plg_writers)"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import REFERENCE_TIME, plain_values
+from plg_writers import (MAX_MERGE_FAN_IN, merge_sorted_runs, open_chunk_writer, output_suffix, run_file_name,
+                         sort_events_by_time, spill_run)
+
+CHUNK_ROWS = 700
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    import contextlib
+    import io
+    from plg_telemetry_generator import PLGTelemetryGenerator
+    with contextlib.redirect_stdout(io.StringIO()):
+        return PLGTelemetryGenerator().generate_dataset(3000, engine='batch', seed=2, reference_time=REFERENCE_TIME)
+
+
+def write(df, path, output_format, compression=None, row_group_size=None):
+    with open_chunk_writer(str(path), output_format, compression, row_group_size) as writer:
+        for start in range(0, len(df), CHUNK_ROWS):
+            writer.write(df.iloc[start:start + CHUNK_ROWS])
+    return writer
+
+
+def utc_naive(values):
+    return pd.to_datetime(values, utc=True, format='ISO8601').dt.tz_localize(None)
+
+
+def read_text(path, output_format):
+    if output_format == 'csv':
+        return pd.read_csv(path, keep_default_na=False, na_values=[''])
+    return pd.read_json(path, lines=True, dtype=False, convert_dates=False)
+
+
+@pytest.mark.parametrize('output_format', ['csv', 'jsonl'])
+@pytest.mark.parametrize('compression', [None, 'gzip', 'zstd'])
+def test_text_round_trip(dataset, tmp_path, output_format, compression):
+    if compression == 'zstd':
+        pytest.importorskip('zstandard')
+    path = tmp_path / f'events{output_suffix(output_format, compression)}'
+    write(dataset, path, output_format, compression)
+    back = read_text(path, output_format)
+
+    assert list(back.columns) == list(dataset.columns)
+    assert back['event_id'].tolist() == dataset['event_id'].tolist()
+    assert back['event_type'].tolist() == dataset['event_type'].tolist()
+    assert (utc_naive(back['timestamp']).to_numpy() == dataset['timestamp'].to_numpy()).all()
+    assert np.allclose(back['session_duration_minutes'], dataset['session_duration_minutes'])
+    assert back['conversion_value'].isna().tolist() == dataset['conversion_value'].isna().tolist()
+
+
+@pytest.mark.parametrize('output_format, compression, row_group_size', [
+    ('parquet', None, None), ('parquet', 'zstd', 1000), ('parquet', 'none', None),
+    ('arrow', None, None), ('arrow', 'lz4', 1000), ('arrow', 'zstd', None)
+])
+def test_columnar_round_trip(dataset, tmp_path, output_format, compression, row_group_size):
+    pa = pytest.importorskip('pyarrow')
+    path = tmp_path / f'events.{output_format}'
+    write(dataset, path, output_format, compression, row_group_size)
+    if output_format == 'parquet':
+        back = pd.read_parquet(path)
+    else:
+        back = pa.ipc.open_file(str(path)).read_all().to_pandas()
+
+    assert list(back.columns) == list(dataset.columns)
+    for column in dataset.columns:
+        assert plain_values(back[column]) == plain_values(dataset[column]), column
+
+
+def test_arrow_writes_batches_without_sparse_label_values(dataset, tmp_path):
+    pytest.importorskip('pyarrow')
+    # No Cancelled or Basic users: cancellation_reason, export_type and trial_feature stay empty in the file
+    df = dataset[dataset['subscription_tier'].isin(['Free', 'Premium'])].reset_index(drop=True)
+    assert df['cancellation_reason'].isna().all()
+    with open_chunk_writer(str(tmp_path / 'events.arrow'), 'arrow') as writer:
+        for start in range(0, len(df), CHUNK_ROWS):
+            writer.write(df.iloc[start:start + CHUNK_ROWS])
+            assert not writer.held
+
+
+@pytest.mark.parametrize('output_format, compression', [('csv', None), ('jsonl', 'gzip')])
+def test_time_ordered_text_is_the_sorted_dataset(quiet, generator, tmp_path, output_format, compression):
+    path = tmp_path / f'events{output_suffix(output_format, compression)}'
+    with quiet():
+        generator.write_dataset(str(path), 3000, CHUNK_ROWS, output_format, engine='batch', seed=2,
+                                reference_time=REFERENCE_TIME, compression=compression)
+        expected = generator.generate_dataset(3000, engine='batch', seed=2, reference_time=REFERENCE_TIME)
+    back = read_text(path, output_format)
+    assert back['timestamp'].tolist() == sort_events_by_time(back)['timestamp'].tolist()
+    assert sorted(back['event_id']) == sorted(expected['event_id'])
+
+
+@pytest.mark.parametrize('output_format, num_runs, fan_in', [
+    ('csv', MAX_MERGE_FAN_IN * 2 + 7, MAX_MERGE_FAN_IN), ('parquet', MAX_MERGE_FAN_IN + 1, MAX_MERGE_FAN_IN),
+    ('jsonl', 40, 3)
+])
+def test_merge_through_intermediate_runs_is_sorted_and_stable(dataset, tmp_path, output_format, num_runs, fan_in):
+    if output_format == 'parquet':
+        pytest.importorskip('pyarrow')
+    # Hour-truncated timestamps tie across many runs; ties must come out in run order
+    df = dataset.assign(timestamp=dataset['timestamp'].dt.floor('h'))
+    runs = [sort_events_by_time(df.iloc[i::num_runs]) for i in range(num_runs)]
+    run_paths = [spill_run(run, str(tmp_path / run_file_name(i, output_format)), output_format)
+                 for i, run in enumerate(runs)]
+    path = tmp_path / f'merged.{output_format}'
+    with open_chunk_writer(str(path), output_format) as writer:
+        merge_sorted_runs(run_paths, writer, output_format, merge_rows=1000, fan_in=fan_in)
+
+    back = pd.read_parquet(path) if output_format == 'parquet' else read_text(path, output_format)
+    expected = sort_events_by_time(pd.concat(runs, ignore_index=True))
+    assert len(back) == len(df)
+    assert back['event_id'].tolist() == expected['event_id'].tolist()
+    assert utc_naive(back['timestamp'].astype(str)).is_monotonic_increasing
+    # Intermediate runs are gone once merged
+    assert sorted(os.listdir(tmp_path)) == sorted([path.name] + [os.path.basename(p) for p in run_paths])